@@ -0,0 +1,115 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Same tokens as sklearn's default TfidfVectorizer token_pattern
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+MODEL_PATH = Path(__file__).resolve().parent / "router_model.json"
+
+# Below this probability the LLM router decides instead. Picked from 5-fold
+# held-out predictions (see train_router.py): at 0.85 no rag/hybrid route was
+# wrong, but "sql" is confused with "hybrid" up to ~0.9, and a wrong local sql
+# route skips the docs entirely, so it needs a stricter bar.
+CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+SQL_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_SQL_CONFIDENCE_THRESHOLD", "0.95"))
+
+
+def is_confident(route: str, confidence: float) -> bool:
+    """Whether a local prediction is trusted without asking the LLM router."""
+    if route == "sql":
+        return confidence >= SQL_CONFIDENCE_THRESHOLD
+    return confidence >= CONFIDENCE_THRESHOLD
+
+
+def _features(question: str) -> Counter:
+    """Lowercased word unigrams and bigrams, as used in training."""
+    tokens = TOKEN_RE.findall(question.lower())
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+class FastRouter:
+    """
+    TF-IDF + logistic regression route classifier (rag / sql / hybrid).
+
+    Trained offline with scikit-learn (see train_router.py) and exported to
+    JSON, so inference is a handful of dict lookups in pure Python: no
+    sklearn/numpy import and no LLM call.
+    """
+
+    def __init__(
+        self,
+        classes: List[str],
+        vocab: Dict[str, int],
+        idf: List[float],
+        coef: List[List[float]],
+        intercept: List[float],
+    ):
+        self.classes = classes
+        self.vocab = vocab
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+
+    @classmethod
+    def train(cls, questions: List[str], routes: List[str], C: float = 10.0):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        features = vectorizer.fit_transform(questions)
+        model = LogisticRegression(C=C, max_iter=1000).fit(features, routes)
+        return cls(
+            classes=[str(c) for c in model.classes_],
+            vocab={term: int(i) for term, i in vectorizer.vocabulary_.items()},
+            idf=vectorizer.idf_.tolist(),
+            # Column-major per feature keeps inference to one lookup per term
+            coef=model.coef_.T.tolist(),
+            intercept=model.intercept_.tolist(),
+        )
+
+    def save(self, path: Path = MODEL_PATH):
+        Path(path).write_text(
+            json.dumps(
+                {
+                    "classes": self.classes,
+                    "vocab": self.vocab,
+                    "idf": self.idf,
+                    "coef": self.coef,
+                    "intercept": self.intercept,
+                }
+            ),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "FastRouter":
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def predict_proba(self, question: str) -> Dict[str, float]:
+        weights = {}
+        for term, count in _features(question).items():
+            i = self.vocab.get(term)
+            if i is not None:
+                weights[i] = (1.0 + math.log(count)) * self.idf[i]
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+        logits = list(self.intercept)
+        for i, w in weights.items():
+            for c, beta in enumerate(self.coef[i]):
+                logits[c] += beta * w / norm
+
+        top = max(logits)
+        exps = [math.exp(z - top) for z in logits]
+        total = sum(exps)
+        return {label: e / total for label, e in zip(self.classes, exps)}
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        """Returns (route, probability of that route)."""
+        probs = self.predict_proba(question)
+        route = max(probs, key=probs.get)
+        return route, probs[route]
@@ -0,0 +1,141 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.db_client import NorthwindDB
+
+# "{category:str, quantity:int}" / "list[{product:str, revenue:float}]" / "list[str]"
+FIELD_RE = re.compile(r"(\w+)\s*:\s*(\w+)")
+LIST_RE = re.compile(r"^list\[(.+)\]$", re.I)
+DECIMALS_RE = re.compile(r"round(?:ed)? to (\d+) decimal", re.I)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    # 3.7 is not an int answer; leave it to the LLM synthesizer
+    number = float(value)
+    return int(number) if number.is_integer() else None
+
+
+CASTS: Dict[str, Callable[[Any], Any]] = {
+    "int": _to_int,
+    "float": float,
+    "str": lambda v: v if isinstance(v, str) else None,
+}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def parse_format_hint(format_hint: str) -> Optional[Tuple[bool, Any]]:
+    """
+    (is_list, shape) where shape is a scalar type name ("int") or a list of
+    (key, type) pairs for a record hint. None for hints we don't handle.
+    """
+    hint = format_hint.strip()
+    is_list = False
+    listed = LIST_RE.match(hint)
+    if listed:
+        is_list, hint = True, listed.group(1).strip()
+
+    if hint in CASTS:
+        return is_list, hint
+    if hint.startswith("{") and hint.endswith("}"):
+        fields = FIELD_RE.findall(hint)
+        if fields and all(t in CASTS for _, t in fields):
+            return is_list, fields
+    return None
+
+
+def _map_columns(columns: List[str], fields: List[Tuple[str, str]]) -> List[str]:
+    """
+    Column for each hint key: an exact or partial name match
+    ('category' <- 'CategoryName'); keys left over take the remaining
+    columns in order. Empty if the counts differ or names are ambiguous.
+    """
+    if len(columns) != len(fields):
+        return []
+    mapped = []
+    for key, _ in fields:
+        k = _normalize(key)
+        exact = [c for c in columns if _normalize(c) == k]
+        partial = [c for c in columns if k in _normalize(c) or _normalize(c) in k]
+        matches = exact or partial
+        if len(matches) > 1:
+            return []
+        mapped.append(matches[0] if matches else None)
+
+    named = [c for c in mapped if c]
+    if len(set(named)) != len(named):
+        return []
+    remaining = iter(c for c in columns if c not in named)
+    return [c or next(remaining) for c in mapped]
+
+
+def _cast(value: Any, type_name: str, decimals: Optional[int]) -> Any:
+    if value is None:
+        raise ValueError("NULL value")
+    result = CASTS[type_name](value)
+    if result is None:
+        raise ValueError(f"{value!r} is not a {type_name}")
+    if type_name == "float" and decimals is not None:
+        result = round(result, decimals)
+    return result
+
+
+def format_answer(
+    rows: List[Dict[str, Any]], format_hint: str, question: str = ""
+) -> Optional[Any]:
+    """
+    The final answer read straight off SQL rows, or None when the rows
+    don't fit the hint's shape (the LLM synthesizer handles those).
+    """
+    parsed = parse_format_hint(format_hint)
+    if parsed is None or not rows:
+        return None
+    is_list, shape = parsed
+    if not is_list and len(rows) != 1:
+        return None
+
+    decimals = DECIMALS_RE.search(question)
+    decimals = int(decimals.group(1)) if decimals else None
+    columns = list(rows[0].keys())
+    try:
+        if isinstance(shape, str):
+            if len(columns) != 1:
+                return None
+            values = [_cast(row[columns[0]], shape, decimals) for row in rows]
+        else:
+            mapped = _map_columns(columns, shape)
+            if not mapped:
+                return None
+            values = [
+                {
+                    key: _cast(row[column], type_name, decimals)
+                    for (key, type_name), column in zip(shape, mapped)
+                }
+                for row in rows
+            ]
+    except (TypeError, ValueError):
+        return None
+    return values if is_list else values[0]
+
+
+def cited_tables(sql_query: str) -> List[str]:
+    """Original Northwind table names behind the views a query reads."""
+    return [
+        table
+        for table, view in NorthwindDB.TABLE_MAP.items()
+        if re.search(rf"\b{view}\b", sql_query, re.I) or table in sql_query
+    ]
+
+
+def cited_docs(docs: List[Dict[str, Any]], constraints: Dict[str, Any]) -> List[str]:
+    """Retrieved chunks that state one of the planner's constraints."""
+    needles = [
+        str(constraints[k]) for k in ("campaign", "kpi") if constraints.get(k)
+    ] + list(constraints.get("categories") or [])
+    return [
+        doc["id"]
+        for doc in docs
+        if any(n.lower() in doc.get("content", "").lower() for n in needles)
+    ]
@@ -19,6 +19,7 @@ except ImportError:
     )
 # --- DEFENSIVE IMPORT END ---
 
+from agent.instrumentation import instrument_node
 from agent.nodes.executor import execute_sql_node
 from agent.nodes.nl_sql import generate_sql_node
 from agent.nodes.planner import plan_query
@@ -42,13 +43,18 @@ class RetailAnalyticsWorkflow:
         self.graph = None
 
     def __load_nodes(self):
-        self.builder.add_node("router", route_query)
-        self.builder.add_node("retriever", retrieve_node)
-        self.builder.add_node("planner", plan_query)
-        self.builder.add_node("sql_gen", generate_sql_node)
-        self.builder.add_node("executor", execute_sql_node)
-        self.builder.add_node("repair", repair_sql_node)
-        self.builder.add_node("synthesizer", synthesize_answer_node)
+        nodes = {
+            "router": route_query,
+            "retriever": retrieve_node,
+            "planner": plan_query,
+            "sql_gen": generate_sql_node,
+            "executor": execute_sql_node,
+            "repair": repair_sql_node,
+            "synthesizer": synthesize_answer_node,
+        }
+        # Wrapped only when instrumentation is enabled (run_agent_hybrid --trace)
+        for name, node in nodes.items():
+            self.builder.add_node(name, instrument_node(name, node))
 
     def __load_edges(self):
         self.builder.add_edge(START, "router")
@@ -0,0 +1,174 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Graph nodes reported in the summary, in pipeline order
+NODES = [
+    "router",
+    "retriever",
+    "planner",
+    "sql_gen",
+    "executor",
+    "repair",
+    "synthesizer",
+]
+
+# Record of the node running in this context; None outside traced nodes
+_current: ContextVar[Optional[Dict[str, Any]]] = ContextVar("node_record", default=None)
+
+
+class Recorder:
+    """
+    Collects one record per node run, grouped by question id:
+    wall time, LLM calls / prompt+completion tokens / prompt characters,
+    and SQL execution time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.questions: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add(self, question_id: str, record: Dict[str, Any]):
+        with self._lock:
+            self.questions.setdefault(question_id, []).append(record)
+
+    def write_jsonl(self, path: Path):
+        """One line per question: {"id", "total_ms", "nodes": [...]}."""
+        with self._lock:
+            questions = dict(self.questions)
+        with open(path, "w", encoding="utf-8") as f:
+            for question_id, records in questions.items():
+                total = round(sum(r["wall_ms"] for r in records), 3)
+                f.write(
+                    json.dumps({"id": question_id, "total_ms": total, "nodes": records})
+                    + "\n"
+                )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per node: runs, p50/p95/p99 wall ms, mean tokens and SQL ms."""
+        by_node: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for records in self.questions.values():
+                for r in records:
+                    by_node.setdefault(r["node"], []).append(r)
+
+        summary = {}
+        for node in NODES + sorted(set(by_node) - set(NODES)):
+            records = by_node.get(node)
+            if not records:
+                continue
+            wall = [r["wall_ms"] for r in records]
+            summary[node] = {
+                "runs": len(records),
+                "p50_ms": percentile(wall, 50),
+                "p95_ms": percentile(wall, 95),
+                "p99_ms": percentile(wall, 99),
+                "llm_calls": sum(r["llm_calls"] for r in records),
+                "mean_prompt_tokens": _mean(records, "prompt_tokens"),
+                "mean_completion_tokens": _mean(records, "completion_tokens"),
+                "mean_prompt_chars": _mean(records, "prompt_chars"),
+                "mean_sql_ms": _mean(records, "sql_ms"),
+            }
+        return summary
+
+
+def _mean(records: List[Dict[str, Any]], key: str) -> float:
+    return round(sum(r[key] for r in records) / len(records), 3)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (same as numpy's default)."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (pos - low), 3)
+
+
+# Set by enable(); while None, instrument_node leaves nodes untouched
+_recorder: Optional[Recorder] = None
+
+
+def enable() -> Recorder:
+    """Starts recording for graphs built from now on."""
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+
+
+def instrument_node(name: str, node: Callable[[dict], dict]) -> Callable:
+    """
+    Wraps a graph node so each run is recorded. Returns the node itself
+    when instrumentation is off, so disabled runs pay nothing.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return node
+
+    @wraps(node)
+    def traced(state):
+        record = {
+            "node": name,
+            "wall_ms": 0.0,
+            "llm_calls": 0,
+            "llm_cache_hits": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "prompt_chars": 0,
+            "sql_ms": 0.0,
+        }
+        token = _current.set(record)
+        start = time.perf_counter()
+        try:
+            return node(state)
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            record["sql_ms"] = round(record["sql_ms"], 3)
+            _current.reset(token)
+            recorder.add(state.get("id", "?"), record)
+
+    return traced
+
+
+def record_llm_prompt(prompt: Optional[str], messages: Optional[List[Dict]]):
+    """Counts one LLM request and its prompt size (cache hits included)."""
+    record = _current.get()
+    if record is None:
+        return
+    record["llm_calls"] += 1
+    if prompt:
+        record["prompt_chars"] += len(prompt)
+    for message in messages or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            record["prompt_chars"] += len(content)
+
+
+def record_llm_cache_hit():
+    record = _current.get()
+    if record is not None:
+        record["llm_cache_hits"] += 1
+
+
+def record_llm_usage(usage: Dict[str, Any]):
+    """Adds the token counts reported by the model server."""
+    record = _current.get()
+    if record is None:
+        return
+    record["prompt_tokens"] += usage.get("prompt_tokens") or 0
+    record["completion_tokens"] += usage.get("completion_tokens") or 0
+
+
+def record_sql(seconds: float):
+    record = _current.get()
+    if record is not None:
+        record["sql_ms"] += seconds * 1000
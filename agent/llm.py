@@ -1,37 +1,86 @@
 import logging
 import os
+from pathlib import Path
+from typing import Optional
 
 import dspy
 
+from agent.llm_cache import CachedLM, ResponseCache
+
 # Setup professional logging (consistent with agent/rag/config.py)
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger("LLM")
 
+# Persistent response cache (reruns of unchanged prompts skip the model)
+LLM_CACHE_PATH = (
+    Path(__file__).resolve().parent.parent / ".cache" / "llm_responses.sqlite"
+)
+LLM_CACHE_MAX_ENTRIES = 5000
+
+# Model endpoint; override to point at another server, e.g. the offline
+# stand-in in benchmarks/stub_llm_server.py (LLM_MODEL=openai/stub)
+LLM_MODEL = os.getenv("LLM_MODEL", "ollama/phi3.5:3.8b-mini-instruct-q4_K_M")
+LLM_API_BASE = os.getenv("LLM_API_BASE", "http://localhost:11434")
+LLM_API_KEY = os.getenv("LLM_API_KEY")
 
-def init_dspy():
+
+def init_dspy(
+    use_cache: bool = True,
+    clear_cache: bool = False,
+    max_in_flight: Optional[int] = None,
+):
     """
     Initializes and configures the global DSPy Language Model client.
 
     This function connects to a local Ollama instance running the
     Phi-3.5-mini-instruct model. It sets the temperature to 0.0 for
     deterministic outputs and configures a large context window (8192)
-    to handle RAG context and database schemas.
+    to handle RAG context and database schemas. LLM_MODEL / LLM_API_BASE
+    (and LLM_API_KEY) point it at another server instead.
+
+    Responses are cached on disk (LLM_CACHE_PATH), keyed by model,
+    generation settings and the rendered prompt.
+
+    Args:
+        use_cache: Serve repeated prompts from the cache and store new ones.
+        clear_cache: Drop every cached response before starting.
+        max_in_flight: Cap on concurrent requests to the model server
+            (None = unbounded). Cache hits are not counted.
 
     Returns:
         dspy.LM: The configured language model instance.
     """
-    model_name = "ollama/phi3.5:3.8b-mini-instruct-q4_K_M"
+    model_name = LLM_MODEL
 
-    logger.info(f"🔌 Connecting to local Ollama model: {model_name}...")
+    logger.info(f"🔌 Connecting to local model: {model_name} at {LLM_API_BASE}...")
 
-    lm = dspy.LM(
+    lm_kwargs = dict(
         model=model_name,
-        api_base="http://localhost:11434",
+        api_base=LLM_API_BASE,
         temperature=0.0,
         num_ctx=8192,
     )
+    if LLM_API_KEY:
+        lm_kwargs["api_key"] = LLM_API_KEY
+
+    response_cache = None
+    if use_cache or clear_cache:
+        response_cache = ResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES)
+        if clear_cache:
+            response_cache.clear()
+            logger.info(f"🧹 Cleared LLM response cache at {LLM_CACHE_PATH}")
+    if use_cache:
+        logger.info(f"💾 LLM response cache: {LLM_CACHE_PATH}")
+    else:
+        response_cache = None
+    if max_in_flight:
+        logger.info(f"🚦 At most {max_in_flight} LLM request(s) in flight")
+
+    lm = CachedLM(
+        response_cache=response_cache, max_in_flight=max_in_flight, **lm_kwargs
+    )
 
     dspy.configure(lm=lm)
 
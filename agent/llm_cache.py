@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import dspy
+
+from agent.instrumentation import (
+    record_llm_cache_hit,
+    record_llm_prompt,
+    record_llm_usage,
+)
+
+logger = logging.getLogger("LLMCache")
+
+
+class ResponseCache:
+    """
+    SQLite-backed store of LLM outputs, shared by every process using the
+    same file. Least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 5000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, request: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"model": model, **request}, sort_keys=True, default=str
+        ).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT outputs FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, outputs: List[Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, model, json.dumps(outputs), time.time()),
+            )
+            # Evict the least recently used rows above the bound
+            self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class CachedLM(dspy.LM):
+    """
+    dspy.LM that answers repeated requests from a ResponseCache and caps
+    the number of requests in flight to the model server.
+
+    The key covers the model, the generation kwargs (temperature, max
+    tokens, num_ctx, ...) and the fully rendered prompt/messages, which
+    already embed the signature's instructions, fields and demos.
+    With response_cache=None every request goes to the model.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        response_cache: Optional[ResponseCache] = None,
+        max_in_flight: Optional[int] = None,
+        **kwargs,
+    ):
+        # dspy's own request cache would shadow ours (and ignore --no-cache)
+        kwargs["cache"] = False
+        super().__init__(model, **kwargs)
+        self.response_cache = response_cache
+        # Cache hits never wait for a slot; only real model calls do
+        self.slots = (
+            threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        record_llm_prompt(prompt, messages)
+        if self.response_cache is None:
+            return self._call_model(prompt, messages, kwargs)
+
+        key = self.response_cache.make_key(
+            self.model,
+            {
+                "prompt": prompt,
+                "messages": messages,
+                "kwargs": {
+                    k: v
+                    for k, v in {**self.kwargs, **kwargs}.items()
+                    if not k.startswith("api_")
+                },
+            },
+        )
+        outputs = self.response_cache.get(key)
+        if outputs is not None:
+            self.cache_hits += 1
+            record_llm_cache_hit()
+            return outputs
+
+        self.cache_misses += 1
+        outputs = self._call_model(prompt, messages, kwargs)
+        try:
+            self.response_cache.put(key, self.model, outputs)
+        except (TypeError, ValueError) as e:
+            # Only plain text/dict outputs are stored
+            logger.debug(f"Not caching response: {e}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not write LLM cache: {e}")
+        return outputs
+
+    def update_history(self, entry):
+        # Called once per model response, in the calling node's context
+        record_llm_usage(entry.get("usage") or {})
+        super().update_history(entry)
+
+    def _call_model(self, prompt, messages, kwargs):
+        if self.slots is None:
+            return super().__call__(prompt=prompt, messages=messages, **kwargs)
+        with self.slots:
+            return super().__call__(prompt=prompt, messages=messages, **kwargs)
@@ -1,8 +1,8 @@
-import json
 import logging
 
+from agent.sql_templates import get_template_cache
 from agent.state import AgentState
-from tools.sqlite_tool import execute_sql
+from tools.sqlite_tool import run_query
 
 logger = logging.getLogger("ExecutorNode")
 
@@ -15,38 +15,49 @@ def execute_sql_node(state: AgentState) -> dict:
     query = state.get("sql_query", "")
     logger.info(f"⚡ Executing SQL...")
 
-    result_str = execute_sql(query)
-
-    logger.info(f"🔌 Tool Raw Output: {result_str}")
-
-    # Default values
-    sql_result = []
-    is_error = False
-
-    try:
-        response = json.loads(result_str)
-        status = response.get("status")
-        message = response.get("message", "")
-
-        if status == "success":
-            # We save DATA to state (for the AI to read)
-            sql_result = response.get("data", [])
-            is_error = False
-            # We log the MESSAGE (for you to read)
-            logger.info(f"✅ Success: {message}")
-        else:
-            # On error, the result IS the message (so the AI knows what broke)
-            sql_result = message
-            is_error = True
-            logger.warning(f"⚠️ SQL Execution Error: {sql_result}")
-
-    except json.JSONDecodeError:
-        sql_result = "System Error: Failed to parse execution response."
+    result = run_query(query)
+
+    if result.ok:
+        # We save DATA to state (for the AI to read)
+        sql_result = result.records()
+        is_error = False
+        # We log the MESSAGE (for you to read)
+        logger.info(f"✅ Success: {result.message} ({result.elapsed_ms} ms)")
+    else:
+        # On error, the result IS the message (so the AI knows what broke)
+        sql_result = result.message
         is_error = True
-        logger.error(f"❌ JSON Parse Error on: {result_str}")
-    except Exception as e:
-        sql_result = f"System Error: {str(e)}"
-        is_error = True
-        logger.error(f"❌ Execution Exception: {e}")
+        logger.warning(f"⚠️ SQL Execution Error: {sql_result}")
 
+    _update_template_cache(state, query, sql_result, is_error)
     return {"sql_result": sql_result, "is_sql_error": is_error}
+
+
+def _update_template_cache(state: AgentState, query: str, sql_result, is_error: bool):
+    """
+    Keeps generated SQL that returned a value as a template, and drops a
+    template whose SQL failed (the repair loop takes over from there).
+    An aggregate over no matching rows still returns one all-NULL row, so
+    rows alone don't show that the SQL found anything.
+    """
+    template_cache = get_template_cache()
+    if template_cache is None:
+        return
+    template_id = state.get("sql_template")
+    if template_id and is_error:
+        template_cache.evict(template_id)
+        logger.warning(f"🗑️ Evicted SQL template {template_id} after a failed run")
+    elif not template_id and not is_error and _has_value(sql_result):
+        stored = template_cache.store(
+            state["question"],
+            state.get("constraints", {}),
+            state.get("format_hint", "str"),
+            query,
+        )
+        if stored:
+            logger.info(f"💾 Saved SQL template {stored}")
+
+
+def _has_value(rows) -> bool:
+    """True if any column of any row is non-NULL."""
+    return any(value is not None for row in rows for value in row.values())
@@ -4,6 +4,7 @@ import os
 import dspy
 
 from agent.dspy_signatures import GenerateSQLSignature
+from agent.sql_templates import get_template_cache
 from agent.state import AgentState
 from tools.sqlite_tool import get_db_schema
 
@@ -53,10 +54,18 @@ def generate_sql_node(state: AgentState) -> dict:
     constraints = state.get("constraints", {})
     format_hint = state.get("format_hint", "str")
 
+    template_cache = get_template_cache()
+    if template_cache is not None:
+        hit = template_cache.lookup(question, constraints, format_hint)
+        if hit is not None:
+            template_id, query = hit
+            logger.info(f"⚡ SQL from template {template_id} (no LLM call): {query}")
+            return {"sql_query": query, "sql_template": template_id}
+
     logger.info(f"⚙️ Generating SQL for: {question[:50]}...")
 
-    # Fetch Schema
-    schema_str = get_db_schema()
+    # Fetch Schema (only the views this question needs)
+    schema_str = get_db_schema(question, constraints)
     constraints_str = str(constraints) if constraints else "None"
 
     try:
@@ -84,4 +93,4 @@ def generate_sql_node(state: AgentState) -> dict:
         logger.error(f"❌ SQL Generation failed: {e}")
         clean_query = "-- Error generating SQL"
 
-    return {"sql_query": clean_query}
+    return {"sql_query": clean_query, "sql_template": None}
@@ -5,6 +5,7 @@ import logging
 import dspy
 
 from agent.dspy_signatures import PlannerSignature
+from agent.rag.retrieval import resolve_constraints
 from agent.state import AgentState
 
 logger = logging.getLogger("PlannerNode")
@@ -15,15 +16,25 @@ planner_module = dspy.ChainOfThought(PlannerSignature)
 
 def plan_query(state: AgentState) -> dict:
     """
-    1. Read 'retrieved_docs' from state.
-    2. Planning: Uses LLM to extract structured constraints.
-    3. Update: Saves result to state['constraints'].
+    1. Lookup: Resolves named campaigns/KPIs/categories from the doc fact index.
+    2. Read 'retrieved_docs' from state (only if the lookup can't resolve everything).
+    3. Planning: Uses LLM to extract structured constraints.
+    4. Update: Saves result to state['constraints'].
     """
     question = state["question"]
     docs = state.get("retrieved_docs", [])
 
     logger.info(f"🗓️ Planning for: {question[:50]}...")
 
+    try:
+        constraints = resolve_constraints(question)
+    except Exception as e:
+        logger.error(f"❌ Fact lookup failed: {e}")
+        constraints = None
+    if constraints is not None:
+        logger.info(f"⚡ Resolved from fact index (no LLM call): {constraints}")
+        return {"constraints": constraints}
+
     # Format Context
     if docs:
         context_str = "\n\n".join(
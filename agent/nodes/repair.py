@@ -27,7 +27,10 @@ def repair_sql_node(state: AgentState) -> dict:
     logger.info(f"🔧 Repairing SQL (Attempt {steps})...")
     logger.info(f"   Error: {error_message}")
 
-    schema_str = get_db_schema()
+    # The bad query and the error name any view the first schema missed
+    schema_str = get_db_schema(
+        question, constraints, sql=f"{bad_query}\n{error_message}"
+    )
     constraints_str = str(constraints) if constraints else "None"
 
     try:
@@ -57,4 +60,4 @@ def repair_sql_node(state: AgentState) -> dict:
         logger.error(f"❌ Repair failed: {e}")
         clean_query = bad_query  # Keep original if repair crashes
 
-    return {"sql_query": clean_query, "repair_steps": steps}
+    return {"sql_query": clean_query, "sql_template": None, "repair_steps": steps}
@@ -9,9 +9,15 @@ logger = logging.getLogger("RAGNode")
 def retrieve_node(state: AgentState) -> dict:
     """
     Searches the local knowledge base for relevant document chunks.
+    Reuses 'prefetched_docs' when the batch runner already retrieved them.
     Updates 'retrieved_docs' in the state.
     """
     question = state["question"]
+    prefetched = state.get("prefetched_docs")
+    if prefetched is not None:
+        logger.info(f"📦 Using {len(prefetched)} pre-retrieved chunks.")
+        return {"retrieved_docs": prefetched}
+
     logger.info(f"🔎 Retrieving docs for: {question[:50]}...")
 
     try:
@@ -1,8 +1,10 @@
 import logging
+from typing import Optional
 
 import dspy
 
 from agent.dspy_signatures import RouterSignature
+from agent.fast_router import MODEL_PATH, FastRouter, is_confident
 from agent.state import AgentState
 
 # Setup logging
@@ -12,14 +14,38 @@ logger = logging.getLogger("RouterNode")
 # This wraps our Signature with ChainOfThought reasoning
 router_module = dspy.ChainOfThought(RouterSignature)
 
+# Local classifier tried before the LLM (train it with train_router.py)
+try:
+    fast_router = FastRouter.load(MODEL_PATH)
+except (OSError, ValueError, KeyError) as e:
+    logger.warning(f"⚠️ Fast router unavailable ({e}). Using the LLM router only.")
+    fast_router = None
+
+
+def confident_route(question: str) -> Optional[str]:
+    """The local classifier's route when it is confident, else None."""
+    if fast_router is None:
+        return None
+    route, confidence = fast_router.predict(question)
+    return route if is_confident(route, confidence) else None
+
 
 def route_query(state: AgentState) -> dict:
     """
     Decides the execution path (rag, sql, hybrid) for the user's question.
+    The local classifier answers when it is confident enough; otherwise the
+    LLM router decides.
     """
     question = state["question"]
     logger.info(f"🤔 Routing Question: {question[:50]}...")
 
+    if fast_router is not None:
+        route, confidence = fast_router.predict(question)
+        if is_confident(route, confidence):
+            logger.info(f"⚡ Fast Route Selected: {route} ({confidence:.2f})")
+            return {"route": route}
+        logger.info(f"🤷 Fast router unsure ({route}, {confidence:.2f}). Asking LLM.")
+
     try:
         pred = router_module(question=question)
         raw_classification = pred.classification
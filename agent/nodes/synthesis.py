@@ -5,6 +5,7 @@ import re
 import dspy
 
 from agent.dspy_signatures import SynthesizeAnswerSignature
+from agent.fast_synthesizer import cited_docs, cited_tables, format_answer
 from agent.state import AgentState
 
 logger = logging.getLogger("SynthesizerNode")
@@ -63,6 +64,30 @@ def synthesize_answer_node(state: AgentState) -> dict:
             "sql": sql_query,
         }
 
+    # FAST PATH: the SQL rows already have the requested shape
+    if route in ["sql", "hybrid"] and isinstance(sql_result, list):
+        final_answer = format_answer(sql_result, format_hint, question)
+        if final_answer is not None:
+            constraints = state.get("constraints") or {}
+            tables = cited_tables(sql_query)
+            doc_ids = (
+                cited_docs(docs, constraints) if isinstance(constraints, dict) else []
+            )
+            rows = f"{len(sql_result)} row{'s' if len(sql_result) != 1 else ''}"
+            explanation = f"Read directly from the SQL result ({rows}) over {', '.join(tables) or 'the database'}"
+            if doc_ids:
+                explanation += f", with definitions from {', '.join(doc_ids)}"
+            logger.info(
+                f"⚡ Answer taken from SQL result (no LLM call): {final_answer}"
+            )
+            return {
+                "final_answer": final_answer,
+                "explanation": explanation + ".",
+                "citations": tables + doc_ids,
+                "confidence": confidence,
+                "sql": sql_query,
+            }
+
     # PREPARE CONTEXT FOR SUCCESS PATH
     # We prioritize SQL results, but include Docs for context/definitions
     doc_context = "\n".join(
@@ -0,0 +1,158 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .config import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS
+
+HEADING_RE = re.compile(r"^#{1,6}\s")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+TOKEN_RE = re.compile(r"\w+")
+
+Piece = Tuple[str, int]
+
+
+class MarkdownChunker:
+    """
+    Streams Markdown lines into heading-aligned chunks.
+
+    Each heading starts a section that holds its body, so a header is never
+    separated from the lines it introduces. Sections above `max_tokens` are
+    split at line boundaries (the heading is repeated on every part, and the
+    last `overlap` tokens' worth of lines are carried over). Chunks below
+    `min_tokens`, such as a document title, are merged into their neighbour.
+    Tokens are counted like CorpusLoader.clean_tokenize.
+    """
+
+    def __init__(
+        self,
+        min_tokens: int = CHUNK_MIN_TOKENS,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        overlap: int = CHUNK_OVERLAP_TOKENS,
+    ):
+        if not 0 <= min_tokens <= max_tokens:
+            raise ValueError("Chunk sizes must satisfy 0 <= min_tokens <= max_tokens.")
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("Chunk overlap must be smaller than max_tokens.")
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return len(TOKEN_RE.findall(text))
+
+    def chunk(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yields chunk texts in document order. Only the current section and
+        at most two finished chunks are held in memory.
+        """
+        ready: Optional[Piece] = None
+        current: Optional[Piece] = None
+        for section in self._sections(lines):
+            for piece in self._split(section):
+                if current is not None and self._can_merge(current, piece):
+                    current = self._merge(current, piece)
+                    continue
+                if ready is not None:
+                    yield ready[0]
+                ready, current = current, piece
+
+        # A short tail joins the chunk before it
+        if current is not None and ready is not None:
+            if current[1] < self.min_tokens and self._fits(ready, current):
+                ready, current = self._merge(ready, current), None
+        for piece in (ready, current):
+            if piece is not None:
+                yield piece[0]
+
+    def _can_merge(self, current: Piece, piece: Piece) -> bool:
+        return current[1] < self.min_tokens and self._fits(current, piece)
+
+    def _fits(self, a: Piece, b: Piece) -> bool:
+        return a[1] + b[1] <= self.max_tokens
+
+    @staticmethod
+    def _merge(a: Piece, b: Piece) -> Piece:
+        return f"{a[0]}\n\n{b[0]}", a[1] + b[1]
+
+    @staticmethod
+    def _sections(lines: Iterable[str]) -> Iterator[List[str]]:
+        """Groups lines into sections that each start at a heading."""
+        section: List[str] = []
+        in_fence = False
+        for line in lines:
+            line = line.rstrip()
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and HEADING_RE.match(line) and section:
+                yield section
+                section = []
+            section.append(line)
+        if section:
+            yield section
+
+    def _split(self, section: List[str]) -> Iterator[Piece]:
+        """Cuts a section into pieces of at most max_tokens."""
+        text = "\n".join(section).strip()
+        n_tokens = self.count_tokens(text)
+        if not text:
+            return
+        if n_tokens <= self.max_tokens:
+            yield text, n_tokens
+            return
+
+        heading = section[0] if HEADING_RE.match(section[0]) else ""
+        heading_tokens = self.count_tokens(heading)
+        if heading_tokens >= self.max_tokens // 2:
+            heading, heading_tokens = "", 0
+        budget = self.max_tokens - heading_tokens
+        body = section[1:] if heading else section
+
+        units: List[Piece] = []
+        for line in body:
+            units.extend(self._split_line(line, budget))
+
+        lines: List[Piece] = []
+        for unit in units:
+            used = sum(t for _, t in lines)
+            if used and used + unit[1] > budget:
+                yield self._join(heading, lines)
+                lines = self._carry(lines, min(self.overlap, budget - unit[1]))
+            lines.append(unit)
+        if any(t for _, t in lines):
+            yield self._join(heading, lines)
+
+    def _split_line(self, line: str, budget: int) -> Iterator[Piece]:
+        """Breaks a single line longer than the budget at whitespace."""
+        n_tokens = self.count_tokens(line)
+        if n_tokens <= budget:
+            yield line, n_tokens
+            return
+        words: List[str] = []
+        used = 0
+        for word in line.split():
+            n_word = self.count_tokens(word)
+            if words and used + n_word > budget:
+                yield " ".join(words), used
+                words, used = [], 0
+            words.append(word)
+            used += n_word
+        if words:
+            yield " ".join(words), used
+
+    @staticmethod
+    def _carry(lines: List[Piece], limit: int) -> List[Piece]:
+        """Trailing lines whose tokens add up to at most `limit`."""
+        carried: List[Piece] = []
+        used = 0
+        for line in reversed(lines):
+            if used + line[1] > limit:
+                break
+            carried.insert(0, line)
+            used += line[1]
+        return carried
+
+    @staticmethod
+    def _join(heading: str, lines: List[Piece]) -> Piece:
+        body = "\n".join(text for text, _ in lines).strip()
+        text = f"{heading}\n{body}" if heading else body
+        return text, sum(t for _, t in lines) + MarkdownChunker.count_tokens(heading)
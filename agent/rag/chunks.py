@@ -0,0 +1,159 @@
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+
+class ChunkView(NamedTuple):
+    """Read-only view of one stored chunk."""
+
+    chunk_id: str
+    content: str
+    source: str
+
+
+def _pack(strings: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 encodes strings into one byte buffer plus (n + 1) offsets."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _take(
+    data: np.ndarray, offsets: np.ndarray, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gathers the strings at `rows` into a new buffer without decoding them."""
+    starts = offsets[:-1][rows]
+    lengths = offsets[1:][rows] - starts
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(
+        new_offsets[-1]
+    )
+    return data[positions], new_offsets
+
+
+def _concat(
+    a: Tuple[np.ndarray, np.ndarray], b: Tuple[np.ndarray, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    return np.concatenate([a[0], b[0]]), np.concatenate([a[1], b[1][1:] + a[1][-1]])
+
+
+class ChunkStore:
+    """
+    Columnar storage for chunk ids, contents and sources.
+
+    Ids and contents live in single UTF-8 byte buffers indexed by offsets;
+    sources are int32 codes into a small table of file names. Every array
+    can be a read-only memory map. Strings are only decoded for the rows
+    that are actually read, so a search materializes just its top-k hits.
+    """
+
+    ARRAYS = ("id_data", "id_offsets", "content_data", "content_offsets", "codes")
+
+    def __init__(
+        self,
+        id_data: np.ndarray,
+        id_offsets: np.ndarray,
+        content_data: np.ndarray,
+        content_offsets: np.ndarray,
+        codes: np.ndarray,
+        sources: List[str],
+    ):
+        self.id_data = id_data
+        self.id_offsets = id_offsets
+        self.content_data = content_data
+        self.content_offsets = content_offsets
+        self.codes = codes
+        self.sources = sources
+        # memoryviews give plain-int indexing and zero-copy slicing per lookup
+        self._id_bytes = memoryview(id_data)
+        self._id_offsets = memoryview(id_offsets)
+        self._content_bytes = memoryview(content_data)
+        self._content_offsets = memoryview(content_offsets)
+        self._codes = memoryview(codes)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Any]) -> "ChunkStore":
+        """
+        Packs objects exposing chunk_id, content and source (DocumentChunk
+        models validated by the loader, or ChunkViews).
+        """
+        chunks = list(chunks)
+        sources: Dict[str, int] = {}
+        codes = np.asarray(
+            [sources.setdefault(c.source, len(sources)) for c in chunks],
+            dtype=np.int32,
+        )
+        id_data, id_offsets = _pack(c.chunk_id for c in chunks)
+        content_data, content_offsets = _pack(c.content for c in chunks)
+        return cls(
+            id_data, id_offsets, content_data, content_offsets, codes, list(sources)
+        )
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def __getitem__(self, i: int) -> ChunkView:
+        return ChunkView(self.chunk_id(i), self.content(i), self.source(i))
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        return (self[i] for i in range(len(self)))
+
+    def chunk_id(self, i: int) -> str:
+        offsets = self._id_offsets
+        return str(self._id_bytes[offsets[i] : offsets[i + 1]], "utf-8")
+
+    def content(self, i: int) -> str:
+        offsets = self._content_offsets
+        return str(self._content_bytes[offsets[i] : offsets[i + 1]], "utf-8")
+
+    def source(self, i: int) -> str:
+        return self.sources[self._codes[i]]
+
+    def result(self, i: int, score: float) -> Dict[str, Any]:
+        """A search result dict, shaped like DocumentChunk.model_dump(by_alias=True)."""
+        return {
+            "id": self.chunk_id(i),
+            "content": self.content(i),
+            "source": self.source(i),
+            "score": float(score),
+        }
+
+    def from_sources(self, names: Iterable[str]) -> np.ndarray:
+        """Boolean mask of the chunks that came from any of `names`."""
+        names = set(names)
+        wanted = [code for code, name in enumerate(self.sources) if name in names]
+        return np.isin(self.codes, wanted)
+
+    def patch(self, removed: np.ndarray, added: "ChunkStore") -> "ChunkStore":
+        """
+        Drops the rows flagged in `removed` and appends `added`, copying the
+        surviving bytes without decoding them (mirrors BM25Index.patch).
+        """
+        rows = np.flatnonzero(~np.asarray(removed, dtype=bool))
+        kept_codes = self.codes[rows]
+
+        # Rebuild the source table from the sources still in use
+        table: Dict[str, int] = {}
+        remap = np.full(len(self.sources), -1, dtype=np.int32)
+        for code in np.unique(kept_codes):
+            remap[code] = table.setdefault(self.sources[code], len(table))
+        added_remap = np.asarray(
+            [table.setdefault(name, len(table)) for name in added.sources],
+            dtype=np.int32,
+        )
+        codes = np.concatenate([remap[kept_codes], added_remap[added.codes]]).astype(
+            np.int32
+        )
+
+        ids = _concat(
+            _take(self.id_data, self.id_offsets, rows),
+            (added.id_data, added.id_offsets),
+        )
+        contents = _concat(
+            _take(self.content_data, self.content_offsets, rows),
+            (added.content_data, added.content_offsets),
+        )
+        return ChunkStore(*ids, *contents, codes, list(table))
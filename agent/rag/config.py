@@ -13,6 +13,28 @@ Current_File = Path(__file__).resolve()
 ROOT_DIR = Current_File.parent.parent.parent
 DOCS_DIR = ROOT_DIR / "docs"
 
+# Persisted BM25 index (rebuilt automatically when the docs change)
+INDEX_DIR = ROOT_DIR / ".cache" / "rag_index"
+
+# Heading-aware chunking (sizes in word tokens, as counted by the BM25 tokenizer)
+CHUNK_MIN_TOKENS = 8  # Smaller sections (e.g. a bare title) merge with a neighbour
+CHUNK_MAX_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 0  # Tokens of trailing lines repeated when a section is split
+
+# "sparse" walks only the query terms' posting lists; "dense" scores every chunk
+BM25_SCORER = "sparse"
+
+# Hybrid retrieval: BM25 fused with local LSA vectors (TF-IDF + TruncatedSVD).
+# Off by default: on a handful of chunks LSA only adds noise to the ranking.
+HYBRID_RETRIEVAL = False
+LSA_COMPONENTS = 128  # Capped by corpus size
+LSA_MIN_CHUNKS = 200  # Smaller corpora stay BM25-only even in hybrid mode
+RRF_K = 60  # Reciprocal-rank fusion damping constant
+RRF_DEPTH = 50  # Candidates taken from each ranking before fusion
+
+# Retrieval results kept per (query tokens, k, corpus version); 0 disables
+RESULT_CACHE_SIZE = 1024
+
 
 def validate_paths():
     if not DOCS_DIR.exists():
@@ -1,40 +1,416 @@
-from typing import Any, Dict, List
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
+from .chunks import ChunkStore
+from .config import (
+    BM25_SCORER,
+    CHUNK_MAX_TOKENS,
+    CHUNK_MIN_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    HYBRID_RETRIEVAL,
+    LSA_COMPONENTS,
+    LSA_MIN_CHUNKS,
+    RRF_DEPTH,
+    RRF_K,
+    logger,
+)
+from .facts import FactIndex
+from .index import BM25Index
 from .loader import CorpusLoader
 from .schema import DocumentChunk
+from .store import IndexStore, scan_corpus
+from .vectors import VectorIndex
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the k highest scores, best first.
+    Ties keep corpus order, exactly like a stable descending sort would.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    # argpartition finds the k-th best score in O(n); everything strictly
+    # above it wins, and the remaining slots go to the earliest ties.
+    partition = np.argpartition(-scores, k - 1)[:k]
+    threshold = scores[partition].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - above.size]
+    winners = np.concatenate([above, ties])
+
+    return winners[np.argsort(-scores[winners], kind="stable")]
+
+
+def top_k_sparse(
+    indices: np.ndarray, values: np.ndarray, n_docs: int, k: int
+) -> List[tuple]:
+    """
+    top_k_indices for a sparse score row, without densifying it.
+    Documents missing from `indices` score 0. Returns [(doc_id, score), ...].
+    """
+    k = min(k, n_docs)
+    if k <= 0:
+        return []
+
+    order = np.lexsort((indices, -values))
+    positive = order[values[order] > 0][:k]
+    ranked = list(zip(indices[positive].tolist(), values[positive].tolist()))
+    if len(ranked) == k:
+        return ranked
+
+    # Pad with zero-score documents in corpus order, then negative scores
+    nonzero = indices[values != 0]
+    need = k - len(ranked)
+    zeros = np.setdiff1d(np.arange(min(n_docs, need + nonzero.size)), nonzero)
+    ranked += [(int(d), 0.0) for d in zeros[:need]]
+    negative = order[values[order] < 0][: k - len(ranked)]
+    ranked += list(zip(indices[negative].tolist(), values[negative].tolist()))
+    return ranked
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[int]], k: int, rrf_k: int = RRF_K
+) -> List[Tuple[int, float]]:
+    """
+    Fuses ranked lists of chunk indices: score(d) = sum of 1 / (rrf_k + rank).
+    Ties favour the earlier ranking (the stable sort keeps first-seen order).
+    Returns [(doc_id, fused score), ...].
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, start=1):
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])[:k]
 
 
 class SearchEngine:
-    def __init__(self, chunks: List[DocumentChunk]):
-        self.chunks = chunks
-        self.bm25 = self._build_index()
+    # BM25Okapi defaults; part of the persisted index fingerprint
+    K1 = 1.5
+    B = 0.75
+    EPSILON = 0.25
+
+    SCORERS = ("sparse", "dense")
+
+    def __init__(
+        self,
+        chunks: Union[ChunkStore, Iterable[DocumentChunk]],
+        index: Optional[BM25Index] = None,
+        scorer: str = BM25_SCORER,
+        vectors: Optional[VectorIndex] = None,
+        facts: Optional[FactIndex] = None,
+    ):
+        if scorer not in self.SCORERS:
+            raise ValueError(f"Unknown scorer '{scorer}'. Use one of {self.SCORERS}.")
+        self.scorer = scorer
+        if not isinstance(chunks, ChunkStore):
+            chunks = ChunkStore.from_chunks(chunks)
+        # chunks and indexes are swapped together so readers never see a mix.
+        # With `vectors`, BM25 is fused with LSA similarity (hybrid retrieval).
+        self._corpus = (
+            chunks,
+            index if index is not None else self._build_index(chunks),
+            vectors,
+        )
+        # Campaign dates, KPI formulas and return windows for the planner
+        self.facts = facts if facts is not None else FactIndex.build(chunks)
+
+        # Whether LSA vectors were asked for; corpora under LSA_MIN_CHUNKS
+        # still have none. Set by open(), part of the persisted params.
+        self.hybrid = vectors is not None
+
+        # Set by open(); used by refresh() to diff and persist
+        self.docs_dir: Optional[Path] = None
+        self.files: Optional[Dict[str, Dict[str, Any]]] = None
+        self.store: Optional[IndexStore] = None
+        self.version = 0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def chunks(self) -> ChunkStore:
+        return self._corpus[0]
+
+    @property
+    def index(self) -> BM25Index:
+        return self._corpus[1]
+
+    @property
+    def vectors(self) -> Optional[VectorIndex]:
+        return self._corpus[2]
+
+    @classmethod
+    def index_params(cls, hybrid: bool = HYBRID_RETRIEVAL) -> Dict[str, Any]:
+        return {
+            "k1": cls.K1,
+            "b": cls.B,
+            "epsilon": cls.EPSILON,
+            "lsa_components": LSA_COMPONENTS if hybrid else 0,
+            # Chunk boundaries (and so chunk ids) depend on these
+            "chunking": [CHUNK_MIN_TOKENS, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS],
+        }
+
+    @classmethod
+    def open(
+        cls,
+        docs_dir: Path,
+        index_dir: Path,
+        scorer: str = BM25_SCORER,
+        hybrid: bool = HYBRID_RETRIEVAL,
+    ) -> "SearchEngine":
+        """
+        Memory-maps the persisted index if the docs are unchanged since it was
+        built. Otherwise re-chunks the docs, rebuilds and persists the index.
+        """
+        store = IndexStore(index_dir)
+        params = cls.index_params(hybrid)
+
+        loaded = store.load(docs_dir, params)
+        if loaded is not None:
+            engine = cls(
+                loaded.chunks,
+                index=loaded.index,
+                scorer=scorer,
+                vectors=loaded.vectors,
+                facts=loaded.facts,
+            )
+            files = loaded.files
+        else:
+            # Fingerprint before reading so an edit during the build is detected next time
+            files = scan_corpus(docs_dir) if docs_dir.exists() else {}
+            engine = cls(CorpusLoader.load_chunks(docs_dir), scorer=scorer)
+            if hybrid:
+                chunks, index, _ = engine._corpus
+                engine._corpus = (chunks, index, cls._build_vectors(index))
+
+        engine.hybrid = hybrid
+        engine.docs_dir, engine.files, engine.store = docs_dir, files, store
+        if loaded is None:
+            engine._persist(store, docs_dir, files)
+        return engine
 
-    def _build_index(self) -> BM25Okapi:
+    def refresh(
+        self, docs_dir: Optional[Path] = None, persist: bool = True
+    ) -> Dict[str, List[str]]:
+        """
+        Picks up added, changed and deleted files without a full rebuild.
+        Only those files are re-chunked; every other chunk keeps its postings
+        and the BM25 statistics are patched around them. With persist=False
+        the on-disk build is left alone (the next cold start rebuilds).
+        Returns the file names per kind of change.
+        """
+        docs_dir = Path(docs_dir or self.docs_dir)
+        with self._refresh_lock:
+            known = self.files or {}
+            files = scan_corpus(docs_dir, previous=known) if docs_dir.exists() else {}
+            changes = {
+                "added": sorted(set(files) - set(known)),
+                "changed": sorted(
+                    name
+                    for name in set(files) & set(known)
+                    if files[name]["sha256"] != known[name]["sha256"]
+                ),
+                "removed": sorted(set(known) - set(files)),
+            }
+            if self.files is not None and not any(changes.values()):
+                # Remember new mtimes so the next check stays stat-only
+                self.files = files
+                return changes
+
+            chunks, index, vectors = self._corpus
+            if self.files is None:
+                # Engine was built from raw chunks: nothing to diff against
+                removed_docs = np.ones(len(chunks), dtype=bool)
+            else:
+                removed_docs = chunks.from_sources(
+                    changes["changed"] + changes["removed"]
+                )
+            new_chunks = ChunkStore.from_chunks(
+                chunk
+                for name in changes["added"] + changes["changed"]
+                for chunk in CorpusLoader.load_file(docs_dir / name)
+            )
+            added_corpus = [CorpusLoader.clean_tokenize(c.content) for c in new_chunks]
+            index, kept_terms = index.patch(removed_docs, added_corpus)
+            if vectors is None and self.hybrid:
+                # The corpus may have grown past LSA_MIN_CHUNKS
+                vectors = self._build_vectors(index)
+            elif vectors is not None:
+                vectors = vectors.patch(
+                    removed_docs,
+                    [self._term_ids(index, t) for t in added_corpus],
+                    kept_terms,
+                )
+            chunks = chunks.patch(removed_docs, new_chunks)
+
+            self._corpus = (chunks, index, vectors)
+            self.facts = FactIndex.build(chunks)
+            self.docs_dir, self.files = docs_dir, files
+            self.version += 1
+            if persist and self.store is not None:
+                self._persist(self.store, docs_dir, files)
+
+        logger.info(
+            f"Index refreshed: {len(changes['added'])} added, "
+            f"{len(changes['changed'])} changed, {len(changes['removed'])} removed."
+        )
+        return changes
+
+    def _persist(self, store: IndexStore, docs_dir: Path, files: Dict[str, Any]):
+        chunks, index, vectors = self._corpus
+        if not chunks:
+            return
+        try:
+            store.save(
+                docs_dir,
+                self.index_params(self.hybrid),
+                chunks,
+                index,
+                vectors=vectors,
+                facts=self.facts,
+                files=files,
+            )
+        except OSError as e:
+            logger.warning(f"Could not persist index to {store.index_dir}: {e}")
+
+    def _build_index(self, chunks: ChunkStore) -> BM25Index:
         """
         Builds the BM25 index from the loaded chunks.
         """
         tokenized_corpus = [
-            CorpusLoader.clean_tokenize(chunk.content) for chunk in self.chunks
+            CorpusLoader.clean_tokenize(chunks.content(i)) for i in range(len(chunks))
         ]
-        return BM25Okapi(tokenized_corpus)
+        return BM25Index.build(
+            tokenized_corpus, k1=self.K1, b=self.B, epsilon=self.EPSILON
+        )
+
+    @staticmethod
+    def _build_vectors(index: BM25Index) -> Optional[VectorIndex]:
+        return VectorIndex.build(
+            index, n_components=LSA_COMPONENTS, min_docs=LSA_MIN_CHUNKS
+        )
+
+    def get_scores(
+        self, query_tokens: List[str], index: Optional[BM25Index] = None
+    ) -> np.ndarray:
+        """BM25 score of every chunk, using the configured scorer."""
+        index = index if index is not None else self.index
+        if self.scorer == "sparse":
+            return index.get_scores_sparse(query_tokens)
+        return index.get_scores(query_tokens)
+
+    @staticmethod
+    def _term_ids(index: BM25Index, tokens: List[str]) -> List[int]:
+        return [index.vocab[t] for t in tokens if t in index.vocab]
 
     def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """
         Returns top-k chunks sorted by relevance score.
         Returns Dicts to ensure compatibility with existing evaluation scripts.
+        The score is always the BM25 score; in hybrid mode results are
+        ordered by reciprocal-rank fusion instead, so it need not decrease.
         """
+        chunks, index, vectors = self._corpus
         query_tokens = CorpusLoader.clean_tokenize(query)
-        scores = self.bm25.get_scores(query_tokens)
-
-        scored_results = []
-        for chunk, score in zip(self.chunks, scores):
-            # Create a copy to avoid mutating the original index
-            result_dict = chunk.model_dump(by_alias=True)
-            result_dict["score"] = float(score)  # Ensure native float
-            scored_results.append(result_dict)
-
-        # Sort by score descending
-        scored_results.sort(key=lambda x: x["score"], reverse=True)
-        return scored_results[:k]
+        scores = self.get_scores(query_tokens, index)
+
+        top = self._matches_first(top_k_indices(scores, k), scores, index, query_tokens)
+        if vectors is None:
+            # Only the winners are copied out of the index
+            hits = [(idx, scores[idx]) for idx in top]
+        else:
+            lexical = [i for i in top_k_indices(scores, RRF_DEPTH) if scores[i] > 0]
+            fused = self._fuse(
+                lexical,
+                vectors.get_scores(self._term_ids(index, query_tokens)),
+                fallback=top,
+                k=k,
+            )
+            hits = [(idx, scores[idx]) for idx in fused]
+
+        return [chunks.result(idx, score) for idx, score in hits]
+
+    def retrieve_many(
+        self, queries: List[str], k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batched search: scores every query with a single sparse
+        (queries x terms) @ (terms x chunks) product, plus one dense
+        (queries x dims) @ (dims x chunks) product in hybrid mode.
+        Returns one top-k list per query, in input order.
+        """
+        chunks, index, vectors = self._corpus
+        tokenized = [CorpusLoader.clean_tokenize(q) for q in queries]
+        scores = index.get_scores_many(tokenized)
+        semantic = None
+        if vectors is not None:
+            semantic = vectors.get_scores_many(
+                [self._term_ids(index, tokens) for tokens in tokenized]
+            )
+
+        results = []
+        for row in range(scores.shape[0]):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            row_ids, row_scores = scores.indices[start:end], scores.data[start:end]
+            hits = top_k_sparse(row_ids, row_scores, len(chunks), k)
+            if hits and hits[-1][1] == 0:
+                dense = np.zeros(len(chunks))
+                dense[row_ids] = row_scores
+                top = np.asarray([idx for idx, _ in hits])
+                top = self._matches_first(top, dense, index, tokenized[row])
+                hits = [(int(idx), dense[idx]) for idx in top]
+            if semantic is not None:
+                lexical = top_k_sparse(row_ids, row_scores, len(chunks), RRF_DEPTH)
+                fused = self._fuse(
+                    [idx for idx, score in lexical if score > 0],
+                    semantic[row],
+                    fallback=[idx for idx, _ in hits],
+                    k=k,
+                )
+                bm25 = dict(zip(row_ids.tolist(), row_scores.tolist()))
+                hits = [(idx, bm25.get(idx, 0.0)) for idx in fused]
+            results.append([chunks.result(idx, score) for idx, score in hits])
+        return results
+
+    @staticmethod
+    def _matches_first(
+        top: np.ndarray, scores: np.ndarray, index: BM25Index, query_tokens: List[str]
+    ) -> np.ndarray:
+        """
+        Reorders the zero-score tail of a top-k list so chunks containing a
+        query term come before those that don't (a term in exactly half the
+        chunks has an Okapi IDF of 0, so matching it scores nothing).
+        """
+        zero = scores[top] == 0
+        if not zero.any():
+            return top
+        candidates = np.flatnonzero(scores == 0)
+        matched = np.isin(candidates, index.matching_docs(query_tokens))
+        pads = np.concatenate([candidates[matched], candidates[~matched]])
+        return np.concatenate([top[~zero], pads[: int(zero.sum())]])
+
+    @staticmethod
+    def _fuse(
+        lexical: List[int], semantic_scores: np.ndarray, fallback, k: int
+    ) -> List[int]:
+        """
+        RRF over the positive BM25 and LSA rankings. If fewer than k chunks
+        match either way, the BM25 order fills the remaining slots.
+        """
+        semantic = [
+            i
+            for i in top_k_indices(semantic_scores, RRF_DEPTH)
+            if semantic_scores[i] > 0
+        ]
+        hits = [idx for idx, _ in reciprocal_rank_fusion([lexical, semantic], k)]
+        seen = set(hits)
+        for idx in fallback:
+            if len(hits) >= k:
+                break
+            if idx not in seen:
+                hits.append(int(idx))
+        return hits
@@ -0,0 +1,210 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*$")
+DATES_RE = re.compile(
+    r"^-\s*Dates:\s*(\d{4}-\d{2}-\d{2})\s*(?:to|-|–)\s*(\d{4}-\d{2}-\d{2})", re.I
+)
+FORMULA_RE = re.compile(r"^-\s*([A-Za-z][\w ]*?)\s*=\s*(.+?)\s*$")
+CATEGORIES_RE = re.compile(r"Categories include (.+?)\.?\s*$", re.I)
+POLICY_RE = re.compile(r"^-\s*(.+?):\s*(.+?)\.?\s*$")
+ABBREVIATION_RE = re.compile(r"^(.+?)\s*\((\w+)\)$")
+QUOTED_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+# Periods shorter than (or relative to) a year: a bare year must not become
+# a full-year range when one of these narrows it
+PERIOD_RE = re.compile(
+    r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+    r"|q[1-4]|quarters?|h[12]|half|semester|spring|summer|autumn|fall|winter"
+    r"|seasons?|holidays?|christmas|months?|monthly|weeks?|weekly|weekends?"
+    r"|days?|daily|first|last|previous|prior|next|past|recent|ytd|to date"
+    r"|so far|since|until|before|after|between)\b"
+    r"|\d{4}-\d{2}",
+    re.I,
+)
+# "Return a float ..." format hints must not count as a returns question
+RETURNS_RE = re.compile(r"\breturns\b|\breturn (?:window|policy|period)", re.I)
+
+# Words that mean the question leans on a doc entity we must be able to name
+CAMPAIGN_HINTS = ("calendar", "campaign", "promotion", "season")
+KPI_HINTS = ("kpi", "definition", "defined as")
+
+
+class FactIndex:
+    """
+    Structured facts parsed from the docs when the corpus is loaded:
+
+    - campaigns: marketing calendar heading -> {"start_date", "end_date"}
+    - kpis: KPI name -> {"abbreviation", "formula"}
+    - categories: product categories listed in the catalog
+    - return_windows: category -> matching product policy line
+
+    resolve() turns a question into planner constraints without an LLM
+    call, or returns None when the question mentions something it can't
+    pin down.
+    """
+
+    def __init__(
+        self,
+        campaigns: Dict[str, Dict[str, str]],
+        kpis: Dict[str, Dict[str, str]],
+        categories: List[str],
+        return_windows: Dict[str, str],
+    ):
+        self.campaigns = campaigns
+        self.kpis = kpis
+        self.categories = categories
+        self.return_windows = return_windows
+
+    @classmethod
+    def build(cls, chunks: Iterable[Any]) -> "FactIndex":
+        """Parses chunks (anything with `.content`) in corpus order."""
+        campaigns: Dict[str, Dict[str, str]] = {}
+        kpis: Dict[str, Dict[str, str]] = {}
+        categories: List[str] = []
+        policy_lines: List[str] = []
+
+        for chunk in chunks:
+            heading = ""
+            in_returns = False
+            for line in chunk.content.splitlines():
+                line = line.strip()
+                match = HEADING_RE.match(line)
+                if match:
+                    heading = match.group(1)
+                    in_returns = "return" in heading.lower()
+                    continue
+
+                dates = DATES_RE.match(line)
+                if dates and heading:
+                    campaigns[heading] = {
+                        "start_date": dates.group(1),
+                        "end_date": dates.group(2),
+                    }
+                    continue
+
+                formula = FORMULA_RE.match(line)
+                if formula and heading and heading not in kpis:
+                    named = ABBREVIATION_RE.match(heading)
+                    name = named.group(1) if named else heading
+                    kpis[name] = {
+                        "abbreviation": named.group(2) if named else formula.group(1),
+                        "formula": line.lstrip("- ").strip(),
+                    }
+                    continue
+
+                listed = CATEGORIES_RE.search(line)
+                if listed:
+                    categories.extend(
+                        c.strip() for c in listed.group(1).split(",") if c.strip()
+                    )
+                    continue
+
+                if in_returns and POLICY_RE.match(line):
+                    policy_lines.append(line.lstrip("- ").rstrip("."))
+
+        return cls(
+            campaigns, kpis, categories, cls._match_policies(categories, policy_lines)
+        )
+
+    @staticmethod
+    def _match_policies(categories: List[str], lines: List[str]) -> Dict[str, str]:
+        """
+        Maps each category to the first policy line naming it, by full name
+        or first word ("Dairy" for "Dairy Products").
+        """
+        windows = {}
+        for category in categories:
+            names = {category, category.split()[0].split("/")[0]}
+            for line in lines:
+                label = line.split(":", 1)[0]
+                if any(_find(name, label) for name in names):
+                    windows[category] = line
+                    break
+        return windows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "campaigns": self.campaigns,
+            "kpis": self.kpis,
+            "categories": self.categories,
+            "return_windows": self.return_windows,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FactIndex":
+        return cls(
+            data["campaigns"], data["kpis"], data["categories"], data["return_windows"]
+        )
+
+    def resolve(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Constraints for the SQL generator, e.g.
+        {"campaign": ..., "start_date": ..., "end_date": ..., "kpi": ...}.
+        Matched names are cut out of the question before the next lookup, so
+        'Summer Beverages 1997' does not also count as the Beverages category.
+        Returns None if nothing resolves, if a quoted phrase or a
+        calendar/KPI reference is left over, or if a year comes with a
+        shorter or relative period (only a bare year means the full year).
+        """
+        text = question
+        constraints: Dict[str, Any] = {}
+
+        campaigns = [name for name in self.campaigns if _find(name, text)]
+        if len(campaigns) > 1:
+            return None
+        if campaigns:
+            name = campaigns[0]
+            constraints["campaign"] = name
+            constraints.update(self.campaigns[name])
+            text = _cut(name, text)
+
+        for name, kpi in self.kpis.items():
+            if _find(name, text) or _find(kpi["abbreviation"], text):
+                constraints["kpi"] = name
+                constraints["kpi_formula"] = kpi["formula"]
+                text = _cut(kpi["abbreviation"], _cut(name, text))
+                break
+
+        categories = [c for c in self.categories if _find(c, text)]
+        for category in categories:
+            text = _cut(category, text)
+        if categories:
+            constraints["categories"] = categories
+            if RETURNS_RE.search(question):
+                constraints["return_windows"] = {
+                    c: self.return_windows[c]
+                    for c in categories
+                    if c in self.return_windows
+                }
+
+        years = set(YEAR_RE.findall(text))
+        if "campaign" not in constraints and len(years) == 1:
+            if PERIOD_RE.search(text):
+                # "June 1997", "Q4 1997": the LLM planner narrows the range
+                return None
+            year = years.pop()
+            constraints["start_date"] = f"{year}-01-01"
+            constraints["end_date"] = f"{year}-12-31"
+
+        lowered = text.lower()
+        unresolved = (
+            any(a or b for a, b in QUOTED_RE.findall(text))
+            or (
+                "campaign" not in constraints
+                and any(h in lowered for h in CAMPAIGN_HINTS)
+            )
+            or ("kpi" not in constraints and any(h in lowered for h in KPI_HINTS))
+        )
+        if unresolved or not constraints:
+            return None
+        return constraints
+
+
+def _find(name: str, text: str) -> bool:
+    return re.search(rf"(?<!\w){re.escape(name)}(?!\w)", text, re.I) is not None
+
+
+def _cut(name: str, text: str) -> str:
+    return re.sub(rf"(?<!\w){re.escape(name)}(?!\w)", "", text, flags=re.I)
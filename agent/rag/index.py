@@ -0,0 +1,308 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+class BM25Index:
+    """
+    Array-backed Okapi BM25 statistics.
+
+    Postings are stored term-major in CSR layout: the documents containing
+    term `t` are `doc_ids[indptr[t]:indptr[t + 1]]`, with matching counts in
+    `term_freqs`. Every array can be a read-only memory map, so a persisted
+    index opens without re-tokenizing the corpus.
+
+    Scoring follows rank_bm25.BM25Okapi (same k1, b, epsilon and IDF floor).
+    `impacts` holds each posting's precomputed BM25 contribution, which lets
+    get_scores_sparse touch only the documents that contain a query term.
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        idf: np.ndarray,
+        impacts: Optional[np.ndarray] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.idf = idf
+        self._impacts = impacts
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.n_docs = int(doc_lengths.shape[0])
+        self.avgdl = float(doc_lengths.sum()) / self.n_docs if self.n_docs else 0.0
+        self._length_norm: Optional[np.ndarray] = None
+        self._term_matrix: Optional[sparse.csr_matrix] = None
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_corpus: List[List[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> "BM25Index":
+        """
+        Builds the index from already tokenized documents.
+        """
+        vocab: Dict[str, int] = {}
+        rows, cols, vals = cls._count_terms(tokenized_corpus, vocab)
+        doc_lengths = np.asarray([len(t) for t in tokenized_corpus], dtype=np.int32)
+        return cls._from_postings(vocab, rows, cols, vals, doc_lengths, k1, b, epsilon)
+
+    def patch(
+        self, removed_docs: np.ndarray, added_corpus: List[List[str]]
+    ) -> Tuple["BM25Index", np.ndarray]:
+        """
+        Drops the documents flagged in `removed_docs` (a boolean mask) and
+        appends `added_corpus`, reusing the postings of every other document.
+        Survivors keep their relative order and are renumbered; new documents
+        follow them. Terms left in no document are dropped from the
+        vocabulary. df, avgdl, IDF and impacts are recomputed from the
+        spliced arrays, so the result scores exactly like a full build.
+
+        Returns the new index and, over the old term ids, a mask of the
+        terms it kept (they keep their relative order, new terms follow).
+        """
+        keep_docs = ~np.asarray(removed_docs, dtype=bool)
+        renumber = np.cumsum(keep_docs) - 1
+        n_kept = int(keep_docs.sum())
+        n_old = len(self.vocab)
+
+        old_terms = np.repeat(
+            np.arange(n_old, dtype=np.int64), np.diff(self.indptr).astype(np.int64)
+        )
+        keep_postings = keep_docs[self.doc_ids]
+        kept_terms = old_terms[keep_postings]
+
+        vocab = dict(self.vocab)
+        add_rows, add_cols, add_vals = self._count_terms(
+            added_corpus, vocab, first_doc=n_kept
+        )
+        n_terms = len(vocab)
+        kept_counts = np.bincount(kept_terms, minlength=n_terms)
+        add_counts = np.bincount(add_rows, minlength=n_terms)
+        live = (kept_counts + add_counts) > 0
+        if not live.all():
+            term_id = np.cumsum(live) - 1
+            vocab = {term: int(term_id[i]) for term, i in vocab.items() if live[i]}
+
+        indptr = np.zeros(int(live.sum()) + 1, dtype=np.int64)
+        np.cumsum((kept_counts + add_counts)[live], out=indptr[1:])
+        # Start of each old term id's new posting list (dead terms are empty)
+        base = np.zeros(n_terms, dtype=np.int64)
+        base[live] = indptr[:-1]
+
+        # Kept postings are already term-major with ascending doc ids, and
+        # added documents come after all of them: each list is the kept
+        # postings then the added ones, so only the added need sorting.
+        kept_start = np.cumsum(kept_counts) - kept_counts
+        kept_pos = base[kept_terms] + (
+            np.arange(kept_terms.size) - kept_start[kept_terms]
+        )
+        order = np.argsort(add_rows, kind="stable")
+        add_terms = add_rows[order]
+        add_start = np.cumsum(add_counts) - add_counts
+        add_pos = (
+            base[add_terms]
+            + kept_counts[add_terms]
+            + (np.arange(add_terms.size) - add_start[add_terms])
+        )
+
+        doc_ids = np.empty(int(indptr[-1]), dtype=np.int32)
+        term_freqs = np.empty(int(indptr[-1]), dtype=np.int32)
+        doc_ids[kept_pos] = renumber[self.doc_ids[keep_postings]]
+        doc_ids[add_pos] = add_cols[order]
+        term_freqs[kept_pos] = self.term_freqs[keep_postings]
+        term_freqs[add_pos] = add_vals[order]
+
+        doc_lengths = np.concatenate(
+            [
+                self.doc_lengths[keep_docs],
+                np.asarray([len(t) for t in added_corpus], dtype=np.int32),
+            ]
+        )
+        idf = self.compute_idf(np.diff(indptr), int(doc_lengths.shape[0]), self.epsilon)
+        index = BM25Index(
+            vocab,
+            indptr,
+            doc_ids,
+            term_freqs,
+            doc_lengths,
+            idf,
+            k1=self.k1,
+            b=self.b,
+            epsilon=self.epsilon,
+        )
+        return index, live[:n_old]
+
+    @staticmethod
+    def _count_terms(
+        tokenized_corpus: List[List[str]], vocab: Dict[str, int], first_doc: int = 0
+    ):
+        """
+        COO postings (term ids, doc ids, counts) in document order.
+        Unseen terms are added to `vocab`.
+        """
+        rows, cols, vals = [], [], []
+        for offset, tokens in enumerate(tokenized_corpus):
+            for term, tf in Counter(tokens).items():
+                rows.append(vocab.setdefault(term, len(vocab)))
+                cols.append(first_doc + offset)
+                vals.append(tf)
+        return (
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(cols, dtype=np.int32),
+            np.asarray(vals, dtype=np.int32),
+        )
+
+    @classmethod
+    def _from_postings(cls, vocab, rows, cols, vals, doc_lengths, k1, b, epsilon):
+        # Postings arrive in ascending doc order, so a stable sort by term
+        # yields term-major CSR with doc ids ascending inside each list.
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(vocab)), out=indptr[1:])
+
+        idf = cls.compute_idf(np.diff(indptr), int(doc_lengths.shape[0]), epsilon)
+        return cls(
+            vocab,
+            indptr,
+            cols[order],
+            vals[order],
+            doc_lengths,
+            idf,
+            k1=k1,
+            b=b,
+            epsilon=epsilon,
+        )
+
+    @staticmethod
+    def compute_idf(doc_freqs: np.ndarray, n_docs: int, epsilon: float) -> np.ndarray:
+        """
+        Okapi IDF. Negative values (terms in more than half the documents)
+        are floored to epsilon * mean IDF, as BM25Okapi does.
+        """
+        if doc_freqs.size == 0:
+            return np.zeros(0, dtype=np.float64)
+        idf = np.log(n_docs - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+        idf[idf < 0] = epsilon * idf.mean()
+        return idf
+
+    @property
+    def length_norm(self) -> np.ndarray:
+        """Per-document `k1 * (1 - b + b * dl / avgdl)`, computed once."""
+        if self._length_norm is None:
+            self._length_norm = self.k1 * (
+                1 - self.b + self.b * self.doc_lengths / self.avgdl
+            )
+        return self._length_norm
+
+    @property
+    def impacts(self) -> np.ndarray:
+        """Per-posting `idf * tf * (k1 + 1) / (tf + length_norm)`."""
+        if self._impacts is None:
+            term_ids = np.repeat(
+                np.arange(len(self.vocab)), np.diff(self.indptr).astype(np.int64)
+            )
+            tf = self.term_freqs.astype(np.float64)
+            self._impacts = self.idf[term_ids] * (
+                tf * (self.k1 + 1) / (tf + self.length_norm[self.doc_ids])
+            )
+        return self._impacts
+
+    @property
+    def term_matrix(self) -> sparse.csr_matrix:
+        """The impacts as a (terms x documents) CSR matrix."""
+        if self._term_matrix is None:
+            self._term_matrix = sparse.csr_matrix(
+                (self.impacts, self.doc_ids, self.indptr),
+                shape=(len(self.vocab), self.n_docs),
+            )
+        return self._term_matrix
+
+    def postings(self, term_id: int):
+        """Returns (doc_ids, term_freqs) for a term."""
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.term_freqs[start:end]
+
+    def matching_docs(self, query_tokens: List[str]) -> np.ndarray:
+        """Sorted ids of the documents containing any of the query terms."""
+        lists = [
+            self.postings(self.vocab[token])[0]
+            for token in set(query_tokens)
+            if token in self.vocab
+        ]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(lists))
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """
+        Scores every document for the query, like BM25Okapi.get_scores.
+        """
+        scores = np.zeros(self.n_docs)
+        for token in query_tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            doc_ids, freqs = self.postings(term_id)
+            tf = np.zeros(self.n_docs)
+            tf[doc_ids] = freqs
+            scores += self.idf[term_id] * (tf * (self.k1 + 1) / (tf + self.length_norm))
+        return scores
+
+    def get_scores_sparse(self, query_tokens: List[str]) -> np.ndarray:
+        """
+        Same scores as get_scores, accumulated only over the posting lists
+        of the query terms. Documents without any query term stay at 0.
+        """
+        scores = np.zeros(self.n_docs)
+        impacts = self.impacts
+        for token in query_tokens:
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # doc_ids are unique within a posting list, so += is safe
+            scores[self.doc_ids[start:end]] += impacts[start:end]
+        return scores
+
+    def query_matrix(self, tokenized_queries: List[List[str]]) -> sparse.csr_matrix:
+        """
+        (queries x terms) matrix of query term counts.
+        Out-of-vocabulary tokens are dropped.
+        """
+        rows, cols = [], []
+        for row, tokens in enumerate(tokenized_queries):
+            for token in tokens:
+                term_id = self.vocab.get(token)
+                if term_id is not None:
+                    rows.append(row)
+                    cols.append(term_id)
+        # Duplicate (row, term) entries are summed, like repeated query terms
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(tokenized_queries), len(self.vocab)),
+        )
+
+    def get_scores_many(self, tokenized_queries: List[List[str]]) -> sparse.csr_matrix:
+        """
+        Scores all queries with one sparse product.
+        Returns a (queries x documents) CSR matrix; absent entries score 0.
+        """
+        return self.query_matrix(tokenized_queries) @ self.term_matrix
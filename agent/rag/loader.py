@@ -1,7 +1,8 @@
 import re
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from .chunker import MarkdownChunker
 from .config import logger
 from .schema import DocumentChunk
 
@@ -17,34 +18,42 @@ class CorpusLoader:
     @staticmethod
     def load_chunks(docs_dir: Path) -> List[DocumentChunk]:
         """
-        Iterates over Markdown files in the directory and chunks them by paragraph.
+        Iterates over Markdown files in the directory and chunks them by heading.
         """
         chunks = []
-        md_files = list(docs_dir.glob("*.md"))
+        md_files = sorted(docs_dir.glob("*.md"))
 
         if not md_files:
             logger.warning("No Markdown files found in docs directory.")
             return []
 
         for filepath in md_files:
-            try:
-                content = filepath.read_text(encoding="utf-8")
-                # Split by double newline (paragraphs)
-                raw_paragraphs = content.split("\n\n")
+            chunks.extend(CorpusLoader.load_file(filepath))
 
-                for i, para in enumerate(raw_paragraphs):
-                    clean_para = para.strip()
-                    if not clean_para:
-                        continue
+        logger.info(f"Loaded {len(chunks)} chunks from {len(md_files)} files.")
+        return chunks
 
+    @staticmethod
+    def load_file(
+        filepath: Path, chunker: Optional[MarkdownChunker] = None
+    ) -> List[DocumentChunk]:
+        """
+        Streams a single Markdown file into heading-aligned chunks.
+        Ids are `<file>::chunk<n>` in document order, so they only depend on
+        the file's own content.
+        Used directly by incremental refreshes that only re-read changed files.
+        """
+        chunker = chunker or MarkdownChunker()
+        chunks = []
+        try:
+            with open(filepath, encoding="utf-8") as f:
+                for i, text in enumerate(chunker.chunk(f)):
                     chunk_id = f"{filepath.name}::chunk{i}"
                     chunks.append(
-                        DocumentChunk(
-                            id=chunk_id, content=clean_para, source=filepath.name
-                        )
+                        DocumentChunk(id=chunk_id, content=text, source=filepath.name)
                     )
-            except Exception as e:
-                logger.error(f"Failed to read {filepath.name}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to read {filepath.name}: {e}")
+            return []
 
-        logger.info(f"Loaded {len(chunks)} chunks from {len(md_files)} files.")
         return chunks
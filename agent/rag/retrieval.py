@@ -1,30 +1,138 @@
 """
 Public Facade for RAG functionality.
-Initializes the retrieval engine and exposes standard methods.
+Exposes standard retrieval methods over a lazily initialized search engine.
+
+Importing this module is cheap: the index (and numpy/scipy) is only loaded
+on the first retrieval, so SQL-only questions never pay for it.
 """
 
-from typing import Any, Dict, List
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .cache import LRUCache
+from .config import DOCS_DIR, INDEX_DIR, RESULT_CACHE_SIZE, validate_paths
+
+if TYPE_CHECKING:
+    from .engine import SearchEngine
+
+_engine: Optional["SearchEngine"] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> "SearchEngine":
+    """
+    Returns the process-wide engine, building it on first use.
+    Thread-safe: concurrent first callers wait for a single build.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from .engine import SearchEngine
 
-from .config import DOCS_DIR, validate_paths
-from .engine import SearchEngine
-from .loader import CorpusLoader
+                validate_paths()
+                # The index is memory-mapped from INDEX_DIR and only rebuilt when the docs change.
+                _engine = SearchEngine.open(DOCS_DIR, INDEX_DIR)
+    return _engine
 
-# Validation on import
-validate_paths()
 
-# We load the data once when this module is imported.
-_chunks = CorpusLoader.load_chunks(DOCS_DIR)
-_engine = SearchEngine(_chunks)
+def warm_up(background: bool = True) -> Optional[threading.Thread]:
+    """
+    Loads the engine ahead of the first query.
+    With background=True the load runs on a daemon thread (returned) so
+    callers can overlap it with other start-up work.
+    """
+    if not background:
+        get_engine()
+        return None
+    thread = threading.Thread(target=get_engine, name="rag-warm-up", daemon=True)
+    thread.start()
+    return thread
 
 
 class LocalRetriever:
+    """
+    Retrieval with a bounded LRU cache of results.
+
+    Entries are keyed by (query tokens, k, corpus version), so rephrasings
+    that tokenize identically share an entry and a refresh that changes the
+    corpus invalidates everything. Cached results are read-only mappings;
+    callers always receive fresh dicts.
+    """
+
+    def __init__(self, cache_size: int = RESULT_CACHE_SIZE):
+        self.cache = LRUCache(cache_size)
+
+    @staticmethod
+    def _key(query: str, k: int, version: int) -> Tuple[Any, ...]:
+        from .loader import CorpusLoader
+
+        return (tuple(CorpusLoader.clean_tokenize(query)), k, version)
+
+    @staticmethod
+    def _freeze(results: List[Dict[str, Any]]) -> Tuple[MappingProxyType, ...]:
+        return tuple(MappingProxyType(dict(r)) for r in results)
+
+    @staticmethod
+    def _thaw(entry: Tuple[MappingProxyType, ...]) -> List[Dict[str, Any]]:
+        return [dict(r) for r in entry]
+
     def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        return _engine.search(query, k=k)
+        engine = get_engine()
+        key = self._key(query, k, engine.version)
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self._freeze(engine.search(query, k=k))
+            self.cache.put(key, entry)
+        return self._thaw(entry)
+
+    def retrieve_many(
+        self, queries: List[str], k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Top-k chunks for each query. Cache misses are scored together in one
+        batch.
+        """
+        engine = get_engine()
+        keys = [self._key(q, k, engine.version) for q in queries]
+        entries = [self.cache.get(key) for key in keys]
+
+        misses = [i for i, entry in enumerate(entries) if entry is None]
+        if misses:
+            batch = engine.retrieve_many([queries[i] for i in misses], k=k)
+            for i, results in zip(misses, batch):
+                entries[i] = self._freeze(results)
+                self.cache.put(keys[i], entries[i])
+        return [self._thaw(entry) for entry in entries]
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Re-indexes only the files under DOCS_DIR that changed since the last
+        build, so a long-running process picks up doc edits without restarting.
+        """
+        changes = get_engine().refresh(DOCS_DIR)
+        if any(changes.values()):
+            # Old entries can no longer match the new version; free them now
+            self.cache.clear()
+        return changes
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of the result cache."""
+        return self.cache.stats()
 
 
 retriever = LocalRetriever()
 
 
+def resolve_constraints(question: str) -> Optional[Dict[str, Any]]:
+    """
+    Planner constraints looked up in the doc fact index (campaign dates,
+    KPI formulas, return windows). None means the LLM planner is needed.
+    """
+    return get_engine().facts.resolve(question)
+
+
 def retrieve_docs(query: str, k: int = 5) -> str:
     """
     Format retrieval results as a string for the LLM context.
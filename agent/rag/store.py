@@ -0,0 +1,244 @@
+"""
+On-disk persistence for the BM25 index.
+
+Layout of INDEX_DIR:
+    CURRENT              -> name of the active build directory
+    <digest>/manifest.json  build parameters + content hash of every doc file
+    <digest>/vocab.json     term list (position == term id)
+    <digest>/sources.json   source file names (chunk_codes.npy indexes into it)
+    <digest>/chunk_*.npy    chunk ids and text as UTF-8 buffers + offsets
+    <digest>/*.npy          postings, impacts, document lengths and IDF arrays
+    <digest>/facts.json     campaign dates, KPI formulas and return windows
+    <digest>/vectors_*.npy  LSA projection and chunk vectors (hybrid retrieval)
+
+A build directory is written completely before CURRENT is swapped to it,
+so concurrent processes never observe a half-written index.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from .chunks import ChunkStore
+from .config import logger
+from .facts import FactIndex
+from .index import BM25Index
+from .vectors import VectorIndex
+
+FORMAT_VERSION = 5
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_corpus(
+    docs_dir: Path, previous: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fingerprints every Markdown file in docs_dir.
+    Files whose size and mtime match `previous` reuse the recorded hash,
+    so an unchanged corpus is verified with one stat() per file.
+    """
+    previous = previous or {}
+    files = {}
+    for path in sorted(docs_dir.glob("*.md")):
+        stat = path.stat()
+        known = previous.get(path.name)
+        if (
+            known
+            and known["size"] == stat.st_size
+            and known["mtime_ns"] == stat.st_mtime_ns
+        ):
+            sha = known["sha256"]
+        else:
+            sha = hash_file(path)
+        files[path.name] = {
+            "sha256": sha,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+    return files
+
+
+def _same_content(a: Dict[str, Dict[str, Any]], b: Dict[str, Dict[str, Any]]) -> bool:
+    """True if both scans cover the same files with the same hashes."""
+    return {k: v["sha256"] for k, v in a.items()} == {
+        k: v["sha256"] for k, v in b.items()
+    }
+
+
+class LoadedBuild(NamedTuple):
+    chunks: ChunkStore
+    index: BM25Index
+    vectors: Optional[VectorIndex]
+    facts: Optional[FactIndex]
+    files: Dict[str, Dict[str, Any]]
+
+
+class IndexStore:
+    """
+    Reads and writes BM25Index builds under a single directory.
+    """
+
+    ARRAYS = ("indptr", "doc_ids", "term_freqs", "doc_lengths", "idf", "impacts")
+    VECTOR_ARRAYS = ("idf", "components", "doc_vectors")
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+
+    def _current_dir(self) -> Optional[Path]:
+        pointer = self.index_dir / "CURRENT"
+        if not pointer.exists():
+            return None
+        build_dir = self.index_dir / pointer.read_text(encoding="utf-8").strip()
+        return build_dir if build_dir.is_dir() else None
+
+    def load(self, docs_dir: Path, params: Dict[str, Any]) -> Optional[LoadedBuild]:
+        """
+        Returns the stored build if it matches the current docs and
+        parameters, otherwise None. Arrays are memory-mapped read-only.
+        """
+        build_dir = self._current_dir()
+        if build_dir is None:
+            return None
+
+        try:
+            manifest = json.loads((build_dir / "manifest.json").read_text("utf-8"))
+            if (
+                manifest.get("format_version") != FORMAT_VERSION
+                or manifest.get("params") != params
+            ):
+                logger.info("Index parameters changed. Rebuilding.")
+                return None
+
+            files = scan_corpus(docs_dir, previous=manifest["files"])
+            if not _same_content(files, manifest["files"]):
+                logger.info("Docs changed since the last index build. Rebuilding.")
+                return None
+
+            vocab_list = json.loads((build_dir / "vocab.json").read_text("utf-8"))
+            sources = json.loads((build_dir / "sources.json").read_text("utf-8"))
+            chunk_arrays = {
+                name: np.load(build_dir / f"chunk_{name}.npy", mmap_mode="r")
+                for name in ChunkStore.ARRAYS
+            }
+            arrays = {
+                name: np.load(build_dir / f"{name}.npy", mmap_mode="r")
+                for name in self.ARRAYS
+            }
+            facts = None
+            if (build_dir / "facts.json").exists():
+                facts = FactIndex.from_dict(
+                    json.loads((build_dir / "facts.json").read_text("utf-8"))
+                )
+            vector_arrays = None
+            if manifest.get("has_vectors"):
+                vector_arrays = {
+                    name: np.load(build_dir / f"vectors_{name}.npy", mmap_mode="r")
+                    for name in self.VECTOR_ARRAYS
+                }
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable index at {build_dir}: {e}")
+            return None
+
+        index = BM25Index(
+            {term: i for i, term in enumerate(vocab_list)},
+            k1=params["k1"],
+            b=params["b"],
+            epsilon=params["epsilon"],
+            **arrays,
+        )
+        vectors = VectorIndex(**vector_arrays) if vector_arrays else None
+        chunks = ChunkStore(sources=sources, **chunk_arrays)
+        logger.info(f"Loaded persisted index ({len(chunks)} chunks) from {build_dir}")
+        return LoadedBuild(chunks, index, vectors, facts, files)
+
+    def save(
+        self,
+        docs_dir: Path,
+        params: Dict[str, Any],
+        chunks: ChunkStore,
+        index: BM25Index,
+        vectors: Optional[VectorIndex] = None,
+        facts: Optional[FactIndex] = None,
+        files: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Path:
+        """
+        Writes a new build and points CURRENT at it.
+        `files` should be the scan taken *before* the chunks were read.
+        """
+        files = files if files is not None else scan_corpus(docs_dir)
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "params": params,
+            "files": files,
+            "has_vectors": vectors is not None,
+        }
+        content = {k: v["sha256"] for k, v in files.items()}
+        digest = hashlib.sha256(
+            json.dumps(
+                {"format_version": FORMAT_VERSION, "params": params, "files": content},
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".build-", dir=self.index_dir))
+        staging.chmod(0o755)
+        try:
+            vocab_list = sorted(index.vocab, key=index.vocab.__getitem__)
+            (staging / "vocab.json").write_text(json.dumps(vocab_list), "utf-8")
+            (staging / "sources.json").write_text(json.dumps(chunks.sources), "utf-8")
+            for name in ChunkStore.ARRAYS:
+                array = np.ascontiguousarray(getattr(chunks, name))
+                np.save(staging / f"chunk_{name}.npy", array)
+            for name in self.ARRAYS:
+                array = np.ascontiguousarray(getattr(index, name))
+                np.save(staging / f"{name}.npy", array)
+            if facts is not None:
+                (staging / "facts.json").write_text(
+                    json.dumps(facts.to_dict()), "utf-8"
+                )
+            if vectors is not None:
+                for name in self.VECTOR_ARRAYS:
+                    array = np.ascontiguousarray(getattr(vectors, name))
+                    np.save(staging / f"vectors_{name}.npy", array)
+            # Manifest last: a build directory without one is never loaded
+            (staging / "manifest.json").write_text(json.dumps(manifest), "utf-8")
+
+            build_dir = self.index_dir / digest
+            if build_dir.exists():
+                shutil.rmtree(staging)
+            else:
+                os.replace(staging, build_dir)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer_tmp = self.index_dir / f".CURRENT.{os.getpid()}"
+        pointer_tmp.write_text(digest, encoding="utf-8")
+        os.replace(pointer_tmp, self.index_dir / "CURRENT")
+        self._prune(keep=digest)
+
+        logger.info(f"Persisted index ({len(chunks)} chunks) to {build_dir}")
+        return build_dir
+
+    def _prune(self, keep: str):
+        """Best-effort removal of superseded builds."""
+        for entry in self.index_dir.iterdir():
+            if entry.name == keep or entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
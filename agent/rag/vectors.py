@@ -0,0 +1,121 @@
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .index import BM25Index
+
+
+class VectorIndex:
+    """
+    Latent semantic (LSA) vectors for every chunk.
+
+    Built with scikit-learn (TF-IDF + TruncatedSVD) over the BM25 postings,
+    so both indexes share one vocabulary and term ids. Chunk vectors are a
+    contiguous, L2-normalized float32 matrix: scoring a query is a single
+    matrix-vector product (cosine similarity). Queries are projected with
+    NumPy only, so scikit-learn is not imported when loading from disk.
+    """
+
+    def __init__(
+        self, idf: np.ndarray, components: np.ndarray, doc_vectors: np.ndarray
+    ):
+        self.idf = idf  # (terms,) TF-IDF weights learned at build time
+        self.components = components  # (dims, terms) SVD projection
+        self.doc_vectors = doc_vectors  # (chunks, dims)
+        self.n_terms = int(components.shape[1])
+
+    @classmethod
+    def build(
+        cls, index: BM25Index, n_components: int, min_docs: int = 2, seed: int = 42
+    ) -> Optional["VectorIndex"]:
+        """
+        Fits TF-IDF + TruncatedSVD on the index's term counts.
+        Returns None for corpora under `min_docs` chunks, which are too
+        small for the factorization to generalize.
+        """
+        dims = min(n_components, index.n_docs - 1, len(index.vocab) - 1)
+        if index.n_docs < min_docs or dims < 1:
+            return None
+
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        counts = sparse.csr_matrix(
+            (index.term_freqs, index.doc_ids, index.indptr),
+            shape=(len(index.vocab), index.n_docs),
+        ).T.tocsr()
+        tfidf = TfidfTransformer(sublinear_tf=True)
+        weighted = tfidf.fit_transform(counts)
+        svd = TruncatedSVD(n_components=dims, random_state=seed).fit(weighted)
+        components = np.ascontiguousarray(svd.components_, dtype=np.float32)
+
+        # Projected like embed(), so chunks folded in by patch() match
+        return cls(
+            idf=tfidf.idf_.astype(np.float64),
+            components=components,
+            doc_vectors=cls._normalize(weighted @ components.T),
+        )
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed(self, term_id_lists: List[List[int]]) -> np.ndarray:
+        """
+        Projects bags of term ids into the LSA space, mirroring the build-time
+        TF-IDF (sublinear tf, l2 norm). Ids unknown to the model are ignored.
+        """
+        rows, cols = [], []
+        for row, term_ids in enumerate(term_id_lists):
+            for term_id in term_ids:
+                if term_id < self.n_terms:
+                    rows.append(row)
+                    cols.append(term_id)
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(term_id_lists), self.n_terms),
+        )
+        counts.sum_duplicates()
+        counts.data = (1.0 + np.log(counts.data)) * self.idf[counts.indices]
+        row_norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1))).ravel()
+        row_norms[row_norms == 0] = 1.0
+        weighted = sparse.diags(1.0 / row_norms) @ counts
+
+        return self._normalize(weighted @ self.components.T)
+
+    def get_scores(self, term_ids: List[int]) -> np.ndarray:
+        """Cosine similarity of every chunk to the query."""
+        return self.doc_vectors @ self.embed([term_ids])[0]
+
+    def get_scores_many(self, term_id_lists: List[List[int]]) -> np.ndarray:
+        """(queries x chunks) cosine similarities."""
+        return self.embed(term_id_lists) @ self.doc_vectors.T
+
+    def patch(
+        self,
+        removed_docs: np.ndarray,
+        added_term_ids: List[List[int]],
+        kept_terms: Optional[np.ndarray] = None,
+    ) -> "VectorIndex":
+        """
+        Drops removed chunks and folds new ones into the existing LSA space.
+        `kept_terms` is BM25Index.patch's mask of surviving term ids: the
+        projection drops the same terms so ids keep lining up. The
+        projection itself is only refitted by a full rebuild.
+        """
+        idf, components = self.idf, self.components
+        if kept_terms is not None and not kept_terms[: self.n_terms].all():
+            kept = kept_terms[: self.n_terms]
+            idf = idf[kept]
+            components = np.ascontiguousarray(components[:, kept])
+        keep = ~np.asarray(removed_docs, dtype=bool)
+        patched = VectorIndex(idf, components, self.doc_vectors[keep])
+        if added_term_ids:
+            patched.doc_vectors = np.concatenate(
+                [patched.doc_vectors, patched.embed(added_term_ids)]
+            )
+        return patched
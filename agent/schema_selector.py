@@ -0,0 +1,125 @@
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.db_client import TableInfo
+
+# Domain words -> the view that answers them (Northwind, simplified views)
+SYNONYMS = {
+    "orders": set(
+        "order orders date dates year month quarter q1 q2 q3 q4 shipped ship "
+        "freight placed during period aov".split()
+    ),
+    "order_items": set(
+        "revenue sales sold quantity units discount discounted aov margin gm "
+        "spent bought value".split()
+    ),
+    "products": set("product products stock inventory discontinued".split()),
+    "categories": {"category", "categories"},
+    "customers": set("customer customers client clients company".split()),
+    "suppliers": set("supplier suppliers supply supplies vendor".split()),
+}
+
+WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+
+
+def _words(text: str) -> Set[str]:
+    return {w.lower() for w in WORD_RE.findall(text)}
+
+
+def select_tables(
+    tables: List[TableInfo],
+    question: str,
+    constraints: Optional[Dict[str, Any]] = None,
+    sql: str = "",
+) -> List[str]:
+    """
+    Names of the views needed for a question, in schema order.
+
+    Views are picked from domain words in the question, planner
+    constraints (dates -> orders, categories -> categories, KPI formula
+    columns) and view names already used in `sql` (for repairs). The
+    shortest FK join paths between the picked views are then added.
+    Falls back to every view if nothing matches or the picks can't be
+    joined.
+    """
+    names = [t.name for t in tables]
+    if not isinstance(constraints, dict):
+        # LLM planner output that didn't parse to a dict: use it as text
+        sql = f"{sql} {constraints or ''}"
+        constraints = {}
+
+    # Columns that live in exactly one view identify it on their own
+    owners: Dict[str, List[str]] = {}
+    for table in tables:
+        for column in table.columns:
+            owners.setdefault(column.name.lower(), []).append(table.name)
+    unique_columns = {c: v[0] for c, v in owners.items() if len(v) == 1}
+
+    text = " ".join([question, sql, " ".join(str(v) for v in constraints.values())])
+    words = _words(text)
+
+    picked = {n for n in names if n in words or n.rstrip("s") in words}
+    for name in names:
+        if SYNONYMS.get(name, set()) & words:
+            picked.add(name)
+    picked.update(unique_columns[w] for w in words if w in unique_columns)
+
+    if YEAR_RE.search(question) or {"start_date", "end_date"} & set(constraints):
+        picked.add("orders")
+    if constraints.get("categories"):
+        picked.add("categories")
+    picked &= set(names)
+
+    if not picked:
+        return names
+    connected = _connect(tables, picked)
+    if connected is None:
+        return names
+    return [n for n in names if n in connected]
+
+
+def _connect(tables: List[TableInfo], picked: Set[str]) -> Optional[Set[str]]:
+    """
+    Grows `picked` with the views on shortest FK paths until it is one
+    connected join tree. None if some picked view is unreachable.
+    """
+    graph: Dict[str, Set[str]] = {t.name: set() for t in tables}
+    for table in tables:
+        for target in table.foreign_keys.values():
+            other = target.split(".", 1)[0]
+            if other in graph and other != table.name:
+                graph[table.name].add(other)
+                graph[other].add(table.name)
+
+    ordered = [t.name for t in tables if t.name in picked]
+    tree = {ordered[0]}
+    for goal in ordered[1:]:
+        if goal in tree:
+            continue
+        path = _shortest_path(graph, tree, goal)
+        if path is None:
+            return None
+        tree.update(path)
+    return tree
+
+
+def _shortest_path(
+    graph: Dict[str, Set[str]], sources: Iterable[str], goal: str
+) -> Optional[List[str]]:
+    parents: Dict[str, Optional[str]] = {s: None for s in sources}
+    queue = deque(parents)
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            return path
+        for neighbour in sorted(graph[node]):
+            if neighbour not in parents:
+                parents[neighbour] = node
+                queue.append(neighbour)
+    return None
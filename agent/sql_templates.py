@@ -0,0 +1,367 @@
+"""
+Cache of SQL that ran successfully, keyed by question template.
+
+A question is canonicalised by cutting out its literals into slots:
+campaign names and years (which the planner turns into start/end dates),
+category names, countries and other numbers. Literals the stored SQL
+contains are replaced by placeholders and rebound for the next question
+of the same shape; the rest must match exactly for the template to apply.
+
+Usage:
+    python -m agent.sql_templates list
+    python -m agent.sql_templates evict <template_id>
+    python -m agent.sql_templates clear
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("SQLTemplates")
+
+TEMPLATE_CACHE_PATH = (
+    Path(__file__).resolve().parent.parent / ".cache" / "sql_templates.sqlite"
+)
+TEMPLATE_CACHE_MAX_ENTRIES = 1000
+
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+YEAR_RE = re.compile(r"(?<![\w.-])(?:19|20)\d{2}(?![\w.-])")
+NUMBER_RE = re.compile(r"(?<![\w.-])\d+(?:\.\d+)?(?![\w.-])")
+PLACEHOLDER_RE = re.compile(r"\{([a-z]+_\d+|start_date|end_date)\}")
+
+
+class Slots(NamedTuple):
+    template: str  # canonical question, literals replaced by <kind>
+    values: Dict[str, str]  # slot name -> literal, e.g. {"category_1": "Beverages"}
+
+
+def extract_slots(
+    question: str, constraints: Dict[str, Any], vocabulary: Dict[str, List[str]]
+) -> Optional[Slots]:
+    """
+    Splits a question into its template and slot values.
+    None when the constraints can't be trusted for rebinding.
+    """
+    text = question
+    values: Dict[str, str] = {}
+
+    dates = [constraints.get("start_date"), constraints.get("end_date")]
+    if any(dates):
+        if not all(isinstance(d, str) and DATE_RE.match(d) for d in dates):
+            return None
+        values["start_date"], values["end_date"] = dates
+        # The dates carry the campaign/year, so those only shape the template
+        if constraints.get("campaign"):
+            text = _replace(str(constraints["campaign"]), "<campaign>", text)
+        text = YEAR_RE.sub("<year>", text)
+
+    for kind, names in vocabulary.items():
+        count = 0
+        for name in sorted(names, key=len, reverse=True):
+            if _pattern(name).search(text):
+                count += 1
+                values[f"{kind}_{count}"] = name
+                text = _replace(name, f"<{kind}>", text)
+
+    count = 0
+    for match in NUMBER_RE.finditer(text):
+        count += 1
+        values[f"num_{count}"] = match.group()
+    text = NUMBER_RE.sub("<num>", text)
+
+    return Slots(" ".join(text.lower().split()), values)
+
+
+def _constraints_key(constraints: Dict[str, Any], values: Dict[str, str]) -> str:
+    """
+    The planner constraints the SQL may depend on beyond the dates
+    (categories, KPI formula, return windows, ...), as canonical JSON.
+    Values that are slots of the question become their placeholder, so
+    'Beverages' -> 'Condiments' still rebinds; any other difference is a
+    different template.
+    """
+    slot_names = {v.lower(): name for name, v in values.items()}
+
+    def canonical(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {str(canonical(k)): canonical(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [canonical(v) for v in value]
+        if isinstance(value, str) and value.lower() in slot_names:
+            return f"{{{slot_names[value.lower()]}}}"
+        return value
+
+    # The dates are slots, and the campaign only names them
+    rest = {
+        k: canonical(v)
+        for k, v in constraints.items()
+        if k not in ("start_date", "end_date", "campaign")
+    }
+    return json.dumps(rest, sort_keys=True, default=str)
+
+
+def _pattern(literal: str) -> re.Pattern:
+    return re.compile(rf"(?<!\w){re.escape(literal)}(?!\w)", re.I)
+
+
+def _replace(literal: str, placeholder: str, text: str) -> str:
+    return _pattern(literal).sub(placeholder, text)
+
+
+def _sql_pattern(name: str, value: str) -> re.Pattern:
+    if name.startswith("num_"):
+        return re.compile(rf"(?<![\w.'-]){re.escape(value)}(?![\w.'-])")
+    # Dates may carry a time part ('1997-06-30 23:59:59')
+    tail = r"(?=['\s])" if name.endswith("_date") else "(?=')"
+    return re.compile(rf"(?<='){re.escape(value)}{tail}")
+
+
+def _quote(name: str, value: str) -> str:
+    return value if name.startswith("num_") else value.replace("'", "''")
+
+
+def make_template(sql: str, values: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Replaces slot literals in `sql` with {slot} placeholders. Returns the
+    templated SQL and the slots that stay literal: those the SQL doesn't
+    contain, numbers that occur more than once, and values shared by two
+    slots (no way to tell which is which).
+    """
+    shared = {v for v in values.values() if list(values.values()).count(v) > 1}
+    literal = {}
+    for name, value in values.items():
+        pattern = _sql_pattern(name, value)
+        found = len(pattern.findall(sql))
+        if value in shared or not found or (found > 1 and name.startswith("num_")):
+            literal[name] = value
+            continue
+        sql = pattern.sub(f"{{{name}}}", sql)
+    return sql, literal
+
+
+class SQLTemplateCache:
+    """
+    SQLite store of templated SQL with per-template hit counts. Least
+    recently used templates are evicted beyond max_entries.
+
+    `vocabulary` maps slot kinds to the literals to look for; by default
+    the category names and countries are read from the Northwind database
+    on first use.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = TEMPLATE_CACHE_MAX_ENTRIES,
+        vocabulary: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._vocabulary = vocabulary
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS templates (
+                id TEXT PRIMARY KEY,
+                template TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                literals TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    @property
+    def vocabulary(self) -> Dict[str, List[str]]:
+        if self._vocabulary is None:
+            self._vocabulary = load_vocabulary()
+        return self._vocabulary
+
+    def _slots(
+        self, question: str, constraints: Any, format_hint: str
+    ) -> Optional[Tuple[str, Slots]]:
+        if not isinstance(constraints, dict):
+            return None
+        slots = extract_slots(question, constraints, self.vocabulary)
+        if slots is None:
+            return None
+        key = (
+            f"{slots.template}\n{format_hint}\n{sorted(slots.values)}\n"
+            f"{_constraints_key(constraints, slots.values)}"
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], slots
+
+    def lookup(
+        self, question: str, constraints: Any, format_hint: str = ""
+    ) -> Optional[Tuple[str, str]]:
+        """(template_id, SQL rebound to this question) or None."""
+        keyed = self._slots(question, constraints, format_hint)
+        if keyed is None:
+            return None
+        template_id, slots = keyed
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, literals FROM templates WHERE id = ?", (template_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            sql, literals = row[0], json.loads(row[1])
+            if any(slots.values[name] != value for name, value in literals.items()):
+                return None
+            self._conn.execute(
+                "UPDATE templates SET hits = hits + 1, last_used = ? WHERE id = ?",
+                (time.time(), template_id),
+            )
+            self._conn.commit()
+
+        bound = PLACEHOLDER_RE.sub(
+            lambda m: _quote(m.group(1), slots.values[m.group(1)]), sql
+        )
+        return template_id, bound
+
+    def store(
+        self, question: str, constraints: Any, format_hint: str, sql: str
+    ) -> Optional[str]:
+        """
+        Saves SQL that executed successfully for this question. Returns the
+        template id, or None if the question/SQL can't be templated.
+        """
+        keyed = self._slots(question, constraints, format_hint)
+        # SQL with braces of its own would be mangled by rebinding
+        if keyed is None or "{" in sql or "}" in sql:
+            return None
+        template_id, slots = keyed
+        templated, literals = make_template(sql, slots.values)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO templates VALUES (?, ?, ?, ?, 0, ?, ?)",
+                (
+                    template_id,
+                    slots.template,
+                    templated,
+                    json.dumps(literals),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM templates WHERE id IN (
+                    SELECT id FROM templates ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+        return template_id
+
+    def evict(self, template_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM templates WHERE id = ?", (template_id,)
+            ).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM templates")
+            self._conn.commit()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Every template with its hit count, most used first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, template, sql, literals, hits FROM templates "
+                "ORDER BY hits DESC, last_used DESC"
+            ).fetchall()
+        return [
+            {
+                "id": r[0],
+                "template": r[1],
+                "sql": r[2],
+                "literals": json.loads(r[3]),
+                "hits": r[4],
+            }
+            for r in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+
+
+def load_vocabulary() -> Dict[str, List[str]]:
+    """Category names and countries in the Northwind database."""
+    from utils.db_client import NorthwindDB
+
+    queries = {
+        "category": "SELECT DISTINCT CategoryName FROM categories",
+        "country": (
+            "SELECT Country FROM customers UNION SELECT Country FROM suppliers "
+            "UNION SELECT ShipCountry FROM orders"
+        ),
+    }
+    vocabulary: Dict[str, List[str]] = {kind: [] for kind in queries}
+    conn = NorthwindDB.get_connection()
+    if not conn:
+        return vocabulary
+    try:
+        for kind, query in queries.items():
+            vocabulary[kind] = [r[0] for r in conn.execute(query) if r[0]]
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Could not read template vocabulary: {e}")
+    return vocabulary
+
+
+# Shared instance used by the graph nodes; None disables the cache
+_template_cache: Optional[SQLTemplateCache] = None
+
+
+def get_template_cache() -> Optional[SQLTemplateCache]:
+    return _template_cache
+
+
+def set_template_cache(cache: Optional[SQLTemplateCache]):
+    global _template_cache
+    _template_cache = cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the SQL template cache.")
+    parser.add_argument("command", choices=["list", "evict", "clear"])
+    parser.add_argument("template_id", nargs="?")
+    args = parser.parse_args()
+
+    cache = SQLTemplateCache(TEMPLATE_CACHE_PATH, vocabulary={})
+    if args.command == "list":
+        for entry in cache.entries():
+            print(f"{entry['id']}  hits={entry['hits']:<5} {entry['template']}")
+            print(f"{'':>18}{entry['sql']}")
+    elif args.command == "evict":
+        if not args.template_id:
+            parser.error("evict needs a template id (see `list`)")
+        removed = cache.evict(args.template_id)
+        print("🗑️ Evicted" if removed else "No such template", args.template_id)
+    else:
+        cache.clear()
+        print(f"🧹 Cleared {TEMPLATE_CACHE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
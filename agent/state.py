@@ -21,9 +21,14 @@ class AgentState(TypedDict):
 
     # --- Retrieval State (RAG) ---
     retrieved_docs: List[Dict[str, Any]]
+    # Filled by batch runs that retrieve up front; None when not prefetched
+    # (the retriever node then searches on demand)
+    prefetched_docs: Optional[List[Dict[str, Any]]]
 
     # --- SQL State ---
     sql_query: str
+    # Id of the cached template the query came from (None if generated)
+    sql_template: Optional[str]
     # Result can be a list of rows (dicts) or an error message string
     sql_result: Union[List[Dict[str, Any]], str]
     is_sql_error: bool  # Flag to trigger repair loop
@@ -0,0 +1,56 @@
+"""
+Import-time benchmark for the RAG facade.
+
+Each measurement runs in a fresh interpreter, so module caches do not hide
+the cost. Compares importing the retriever node (what agent.graph_hybrid
+does) with importing it and then loading the engine on first retrieval.
+
+Usage:
+    python -m benchmarks.bench_import --runs 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import retriever node": "import agent.nodes.retriever",
+    "import + first retrieval": (
+        "import agent.nodes.retriever; "
+        "from agent.rag.retrieval import retriever; retriever.retrieve('returns')"
+    ),
+    "interpreter only": "pass",
+}
+
+
+def best_of(code: str, runs: int) -> float:
+    """Minimum wall time in ms of `python -c code` over runs."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT_DIR,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        print(f"{name:>26}: {best_of(code, args.runs):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
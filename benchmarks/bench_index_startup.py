@@ -0,0 +1,64 @@
+"""
+Cold-start benchmark for the persisted BM25 index.
+
+For each corpus size, writes synthetic Markdown docs, then times a full build
+(first start) against opening the memory-mapped index (every later start).
+
+Usage:
+    python -m benchmarks.bench_index_startup --sizes 100 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.rag.engine import SearchEngine
+from benchmarks.bench_retrieval import make_corpus
+
+CHUNKS_PER_FILE = 100
+
+
+def write_docs(docs_dir: Path, n_chunks: int):
+    """Writes n_chunks paragraphs spread over Markdown files."""
+    chunks = make_corpus(n_chunks)
+    for start in range(0, n_chunks, CHUNKS_PER_FILE):
+        body = "\n\n".join(c.content for c in chunks[start : start + CHUNKS_PER_FILE])
+        (docs_dir / f"doc_{start // CHUNKS_PER_FILE:05d}.md").write_text(
+            body, encoding="utf-8"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} | {'build ms':>10} | {'open ms':>10}")
+    print("-" * 34)
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            docs_dir, index_dir = Path(tmp) / "docs", Path(tmp) / "index"
+            docs_dir.mkdir()
+            write_docs(docs_dir, n)
+
+            start = time.perf_counter()
+            SearchEngine.open(docs_dir, index_dir)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            SearchEngine.open(docs_dir, index_dir)
+            open_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{n:>8} | {build_ms:>10.1f} | {open_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
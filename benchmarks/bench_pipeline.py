@@ -0,0 +1,107 @@
+"""
+Runs the whole agent against the stub LLM server to measure orchestration
+overhead (graph, RAG, SQL, checkpointing) and batch throughput.
+
+The stub answers every LLM call after --latency-ms (0 = orchestration
+only). SQL runs against the fixture database unless --db is given.
+
+Usage:
+    python -m benchmarks.bench_pipeline --latency-ms 0 --workers 1
+    python -m benchmarks.bench_pipeline --latency-ms 200 --workers 4 --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default="sample_questions_hybrid_eval.jsonl")
+    parser.add_argument("--db", default=None, help="Northwind file (default: fixture)")
+    parser.add_argument("--mode", choices=["replay", "synthesize"], default="replay")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # Must be set before agent.llm is imported
+    os.environ["LLM_MODEL"] = "openai/stub"
+    os.environ["LLM_API_BASE"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ["LLM_API_KEY"] = "stub"
+    # No network: don't let litellm try to download its price list
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from agent import instrumentation
+    from agent.graph_hybrid import RetailAnalyticsWorkflow
+    from agent.llm import init_dspy
+    from agent.rag.retrieval import retriever
+    from agent.schemas import InputRow
+    from benchmarks.fixtures import create_northwind
+    from benchmarks.stub_llm_server import serve
+    from run_agent_hybrid import print_trace_summary, run_question
+    from utils import db_client
+
+    logging.disable(logging.WARNING)
+    with open(args.questions, "r", encoding="utf-8") as f:
+        rows = [InputRow(**json.loads(line)) for line in f if line.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_client.DB_PATH = args.db or str(
+            create_northwind(Path(tmp) / "northwind.sqlite")
+        )
+        server = serve(args.port, args.mode, args.latency_ms, background=True)
+        lm = init_dspy(use_cache=False, max_in_flight=args.workers)
+        lm(messages=[{"role": "user", "content": "warm-up"}])  # imports litellm
+        recorder = instrumentation.enable()
+        cwd = os.getcwd()
+        os.chdir(tmp)  # checkpoints.db goes to the temp dir
+        try:
+            app = RetailAnalyticsWorkflow().get_graph()
+        finally:
+            os.chdir(cwd)
+
+        batch = [row for _ in range(args.repeat) for row in rows]
+        docs = retriever.retrieve_many([row.question for row in batch])
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {}
+            for i, (row, row_docs) in enumerate(zip(batch, docs)):
+                row = row.model_copy(update={"id": f"{row.id}#{i}"})
+                futures[row.id] = pool.submit(run_question, app, row, row_docs, False)
+            outputs, errors = [], {}
+            for question_id, future in futures.items():
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    errors[question_id] = e
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+    if errors:
+        # A run that lost questions has no throughput to report
+        for question_id, e in errors.items():
+            print(f"❌ {question_id}: {type(e).__name__}: {e}")
+        sys.exit(f"{len(errors)}/{len(batch)} questions failed")
+
+    print_trace_summary(recorder.summary(), "memory")
+    unanswered = sum(o.final_answer in (None, "", "N/A") for o in outputs)
+    print(
+        f"\n{len(batch)} questions ({unanswered} unanswered) in {elapsed:.2f}s "
+        f"({len(batch) / elapsed:.1f} q/s, {args.workers} worker(s), "
+        f"{args.latency_ms:.0f} ms per LLM call)"
+    )
+
+
+if __name__ == "__main__":
+    main()
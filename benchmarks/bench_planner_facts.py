@@ -0,0 +1,42 @@
+"""
+Counts the planner LLM calls the doc fact index removes.
+
+Every question in the eval file is run through the fact lookup the planner
+tries first; the ones it resolves never reach the ChainOfThought planner.
+Questions whose id starts with "hybrid_" are the ones routed to the planner.
+
+Usage:
+    python -m benchmarks.bench_planner_facts --questions sample_questions_hybrid_eval.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.rag.retrieval import resolve_constraints  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default="sample_questions_hybrid_eval.jsonl")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    planned = [r for r in rows if r["id"].startswith("hybrid_")]
+    resolved = 0
+    for row in planned:
+        constraints = resolve_constraints(row["question"])
+        resolved += constraints is not None
+        status = "fact index" if constraints is not None else "LLM"
+        print(f"{row['id']:>40}: {status:<10} {constraints or ''}")
+
+    print(f"\nPlanner LLM calls removed: {resolved}/{len(planned)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Retrieval latency benchmark.
+
+Builds synthetic corpora from 10^2 to 10^5 chunks and times
+SearchEngine.search against the previous "dump every chunk and sort" path.
+
+Usage:
+    python -m benchmarks.bench_retrieval --sizes 100 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.rag.engine import SearchEngine
+from agent.rag.loader import CorpusLoader
+from agent.rag.schema import DocumentChunk
+
+QUERIES = [
+    "return window for unopened beverages",
+    "summer beverages 1997 dates",
+    "average order value definition",
+    "gross margin cost of goods",
+    "winter classics dairy confections",
+]
+
+
+def make_corpus(n_chunks: int, seed: int = 42) -> List[DocumentChunk]:
+    """Generates n_chunks Zipf-distributed pseudo-documents."""
+    rng = np.random.default_rng(seed)
+    base_vocab = sorted({t for q in QUERIES for t in CorpusLoader.clean_tokenize(q)})
+    vocab = base_vocab + [f"term{i}" for i in range(5000)]
+    ranks = np.arange(1, len(vocab) + 1)
+    probs = (1.0 / ranks) / (1.0 / ranks).sum()
+    # Shuffle so query terms are not always the most frequent ones
+    probs = rng.permutation(probs)
+
+    chunks = []
+    for i in range(n_chunks):
+        length = int(rng.integers(15, 60))
+        words = rng.choice(len(vocab), size=length, p=probs)
+        chunks.append(
+            DocumentChunk(
+                id=f"synthetic_{i // 10}.md::chunk{i % 10}",
+                content=" ".join(vocab[w] for w in words),
+                source=f"synthetic_{i // 10}.md",
+            )
+        )
+    return chunks
+
+
+def legacy_search(engine: SearchEngine, query: str, k: int) -> List[Dict[str, Any]]:
+    """The pre-top-k implementation, kept here as the comparison baseline."""
+    scores = engine.index.get_scores(CorpusLoader.clean_tokenize(query))
+    scored_results = []
+    for chunk, score in zip(engine.chunks, scores):
+        result_dict = DocumentChunk(
+            id=chunk.chunk_id, content=chunk.content, source=chunk.source
+        ).model_dump(by_alias=True)
+        result_dict["score"] = float(score)
+        scored_results.append(result_dict)
+    scored_results.sort(key=lambda x: x["score"], reverse=True)
+    return scored_results[:k]
+
+
+def time_per_query(fn, repeats: int) -> float:
+    """Returns mean milliseconds per query over all QUERIES."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(QUERIES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} | {'legacy ms':>10} | {'top-k ms':>10} | {'speedup':>7}")
+    print("-" * 45)
+    for n in args.sizes:
+        engine = SearchEngine(make_corpus(n))
+
+        # Sanity check: both paths must agree before we compare speed
+        for q in QUERIES:
+            assert [r["id"] for r in engine.search(q, args.k)] == [
+                r["id"] for r in legacy_search(engine, q, args.k)
+            ]
+
+        legacy_ms = time_per_query(
+            lambda q: legacy_search(engine, q, args.k), args.repeats
+        )
+        topk_ms = time_per_query(lambda q: engine.search(q, args.k), args.repeats)
+        print(
+            f"{n:>8} | {legacy_ms:>10.2f} | {topk_ms:>10.2f} | {legacy_ms / topk_ms:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
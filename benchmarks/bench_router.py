@@ -0,0 +1,101 @@
+"""
+Offline comparison of the local route classifier with the LLM router.
+
+The LLM router's decisions (and their wall time) are read from a run log
+such as logs/baseline_router.txt, so no model has to be running. Reports
+agreement, how many questions the classifier answers on its own at the
+configured threshold, and the classifier's latency.
+
+Usage:
+    python -m benchmarks.bench_router --log logs/baseline_router.txt
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.fast_router import (  # noqa: E402
+    CONFIDENCE_THRESHOLD,
+    SQL_CONFIDENCE_THRESHOLD,
+    FastRouter,
+    is_confident,
+)
+
+LOG_RE = re.compile(
+    r"^(\S+ \S+) - RouterNode - INFO - (?:🤔 Routing Question: (.*)\.\.\.|👉 Route Selected: (\w+))"
+)
+
+
+def parse_llm_log(path):
+    """Maps the logged 50-char question prefix -> (route, seconds spent)."""
+    decisions, pending = {}, None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = LOG_RE.match(line)
+            if not match:
+                continue
+            stamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f")
+            if match.group(2):
+                pending = (match.group(2), stamp)
+            elif pending:
+                prefix, started = pending
+                decisions[prefix] = (
+                    match.group(3),
+                    (stamp - started).total_seconds(),
+                )
+                pending = None
+    return decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", default="logs/baseline_router.txt")
+    parser.add_argument("--questions", default="sample_questions_hybrid_eval.jsonl")
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    router = FastRouter.load()
+    llm = parse_llm_log(args.log)
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+
+    agree = local = compared = 0
+    llm_seconds = []
+    for question in questions:
+        route, confidence = router.predict(question)
+        local += is_confident(route, confidence)
+        logged = llm.get(question[:50])
+        if logged is None:
+            print(f"  (not in log) {question[:50]}")
+            continue
+        compared += 1
+        agree += route == logged[0]
+        llm_seconds.append(logged[1])
+        print(f"  {logged[0]:>6} | {route:>6} ({confidence:.2f}) | {question[:50]}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for question in questions:
+            router.predict(question)
+    per_question_us = (time.perf_counter() - start) / (args.repeats * len(questions))
+    per_question_us *= 1e6
+
+    print(f"\nAgreement with LLM router: {agree}/{compared}")
+    print(
+        f"Answered locally at threshold {CONFIDENCE_THRESHOLD} "
+        f"(sql {SQL_CONFIDENCE_THRESHOLD}): {local}/{len(questions)}"
+    )
+    print(f"Classifier latency: {per_question_us:.1f} us/question")
+    if llm_seconds:
+        mean_ms = sum(llm_seconds) / len(llm_seconds) * 1000
+        print(f"Logged LLM router latency: {mean_ms:.1f} ms/question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares the schema text sent to SQL generation with and without pruning.
+
+Runs against the fixture database from benchmarks/fixtures.py, which has
+the same table layout as data/northwind.sqlite, so the numbers hold for
+the real file. Tokens are counted with a word/punctuation split, a close
+proxy for the prompt tokens the local model prefills.
+
+Usage:
+    python -m benchmarks.bench_schema_pruning --questions sample_questions_hybrid_eval.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.rag.retrieval import resolve_constraints  # noqa: E402
+from benchmarks.fixtures import create_northwind  # noqa: E402
+from tools.sqlite_tool import get_db_schema  # noqa: E402
+from utils import db_client  # noqa: E402
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_RE.findall(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default="sample_questions_hybrid_eval.jsonl")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    # Pure doc questions never see the schema
+    rows = [r for r in rows if not r["id"].startswith("rag_")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_client.DB_PATH = str(create_northwind(Path(tmp) / "northwind.sqlite"))
+        full_tokens = count_tokens(get_db_schema())  # also creates the views
+
+        total_full = total_pruned = 0
+        elapsed = 0.0
+        for row in rows:
+            constraints = resolve_constraints(row["question"]) or {}
+            start = time.perf_counter()
+            pruned = get_db_schema(row["question"], constraints)
+            elapsed += time.perf_counter() - start
+            tables = re.findall(r"^Table: (\w+)", pruned, re.M)
+            tokens = count_tokens(pruned)
+            total_full += full_tokens
+            total_pruned += tokens
+            print(f"{row['id']:>40}: {full_tokens:>4} -> {tokens:>4}  {tables}")
+        elapsed = elapsed * 1000 / len(rows)
+
+    saved = 1 - total_pruned / total_full
+    print(
+        f"\nSchema tokens: {total_full} -> {total_pruned} ({saved:.0%} fewer) "
+        f"over {len(rows)} questions"
+    )
+    print(f"Pruning cost: {elapsed:.2f} ms per question (schema read + selection)")
+
+
+if __name__ == "__main__":
+    main()
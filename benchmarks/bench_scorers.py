@@ -0,0 +1,67 @@
+"""
+BM25 scorer throughput benchmark.
+
+Compares queries/second of rank_bm25.BM25Okapi, the dense array scorer and
+the sparse posting-list scorer on synthetic corpora.
+
+Usage:
+    python -m benchmarks.bench_scorers --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from rank_bm25 import BM25Okapi
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.rag.engine import SearchEngine
+from agent.rag.loader import CorpusLoader
+from benchmarks.bench_retrieval import QUERIES, make_corpus
+
+
+def queries_per_second(score_fn, tokenized_queries, min_seconds: float) -> float:
+    """Repeats the query set until min_seconds have elapsed."""
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for tokens in tokenized_queries:
+            score_fn(tokens)
+        done += len(tokenized_queries)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tokenized_queries = [CorpusLoader.clean_tokenize(q) for q in QUERIES]
+
+    print(f"{'chunks':>8} | {'okapi q/s':>10} | {'dense q/s':>10} | {'sparse q/s':>10}")
+    print("-" * 48)
+    for n in args.sizes:
+        chunks = make_corpus(n)
+        okapi = BM25Okapi([CorpusLoader.clean_tokenize(c.content) for c in chunks])
+        engine = SearchEngine(chunks)
+        engine.index.impacts  # Precompute outside the timed loop
+
+        rates = [
+            queries_per_second(fn, tokenized_queries, args.seconds)
+            for fn in (
+                okapi.get_scores,
+                engine.index.get_scores,
+                engine.index.get_scores_sparse,
+            )
+        ]
+        print(f"{n:>8} | " + " | ".join(f"{r:>10.0f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Queries per second through execute_sql: a new connection per query (the
+old behaviour, on a copy with the views written into the file) vs the
+pooled immutable connections.
+
+Runs on the fixture database unless --db points at a real Northwind file.
+
+Usage:
+    python -m benchmarks.bench_sql_qps --seconds 2 --threads 1 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import create_northwind  # noqa: E402
+from tools.sqlite_tool import execute_sql  # noqa: E402
+from utils import db_client  # noqa: E402
+
+QUERIES = [
+    "SELECT COUNT(*) AS count FROM orders",
+    "SELECT c.CategoryName, SUM(oi.Quantity) AS quantity FROM order_items oi "
+    "JOIN products p ON oi.ProductID = p.ProductID "
+    "JOIN categories c ON p.CategoryID = c.CategoryID "
+    "GROUP BY c.CategoryName ORDER BY quantity DESC LIMIT 1",
+    "SELECT p.ProductName, SUM(oi.UnitPrice * oi.Quantity * (1 - oi.Discount)) "
+    "AS revenue FROM order_items oi JOIN products p ON oi.ProductID = p.ProductID "
+    "GROUP BY p.ProductName ORDER BY revenue DESC LIMIT 3",
+]
+
+
+# Copy of the database with persistent views, as the old setup left it
+LEGACY_DB_PATH = ""
+
+
+def make_legacy_copy(path: str, tmp: str) -> str:
+    copy = os.path.join(tmp, "northwind_legacy.sqlite")
+    shutil.copyfile(path, copy)
+    conn = sqlite3.connect(copy)
+    for view in db_client.COMPAT_VIEWS:
+        conn.execute(view.replace("TEMP ", "").replace("main.", ""))
+    conn.commit()
+    conn.close()
+    return copy
+
+
+def execute_sql_unpooled(query: str) -> str:
+    """execute_sql as it was: connect, run, serialise, close."""
+    conn = sqlite3.connect(LEGACY_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = [dict(row) for row in conn.execute(query).fetchall()]
+        return json.dumps({"status": "success", "data": rows}, default=str)
+    finally:
+        conn.close()
+
+
+def measure(execute, threads: int, seconds: float) -> float:
+    def worker():
+        done, deadline = 0, time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            execute(QUERIES[done % len(QUERIES)])
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(f.result() for f in [pool.submit(worker) for _ in range(threads)])
+    return total / seconds
+
+
+def main():
+    global LEGACY_DB_PATH
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=None, help="Northwind file (default: fixture)")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_client.DB_PATH = args.db or str(
+            create_northwind(Path(tmp) / "northwind.sqlite")
+        )
+        LEGACY_DB_PATH = make_legacy_copy(db_client.DB_PATH, tmp)
+        for threads in args.threads:
+            before = measure(execute_sql_unpooled, threads, args.seconds)
+            after = measure(execute_sql, threads, args.seconds)
+            print(
+                f"{threads} thread(s): {before:>8.0f} q/s unpooled -> "
+                f"{after:>8.0f} q/s pooled ({after / before:.1f}x)"
+            )
+        db_client.NorthwindDB.close_all()
+
+
+if __name__ == "__main__":
+    main()
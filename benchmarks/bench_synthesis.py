@@ -0,0 +1,73 @@
+"""
+Counts the synthesizer LLM calls the deterministic fast path removes.
+
+Each eval question is run with the SQL the agent generated for it in a
+recorded run (the "sql" field of --outputs), against the fixture database
+(or --db). Questions without SQL, or whose SQL fails, go to the LLM
+synthesizer.
+
+Usage:
+    python -m benchmarks.bench_synthesis --questions sample_questions_hybrid_eval.jsonl \
+        --outputs outputs_hybrid.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.fast_synthesizer import format_answer  # noqa: E402
+from benchmarks.fixtures import create_northwind  # noqa: E402
+from tools.sqlite_tool import run_query  # noqa: E402
+from utils import db_client  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default="sample_questions_hybrid_eval.jsonl")
+    parser.add_argument(
+        "--outputs",
+        default="outputs_hybrid.jsonl",
+        help="Output of run_agent_hybrid.py whose generated SQL is replayed.",
+    )
+    parser.add_argument("--db", default=None, help="Northwind file (default: fixture)")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    with open(args.outputs, "r", encoding="utf-8") as f:
+        outputs = [json.loads(line) for line in f if line.strip()]
+    generated = {output["id"]: output.get("sql") for output in outputs}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_client.DB_PATH = args.db or str(
+            create_northwind(Path(tmp) / "northwind.sqlite")
+        )
+        fast = 0
+        for row in rows:
+            sql = generated.get(row["id"])
+            answer, status = None, "LLM"
+            if sql:
+                result = run_query(sql)
+                if result.ok:
+                    answer = format_answer(
+                        result.records(), row["format_hint"], row["question"]
+                    )
+                else:
+                    status = "SQL error"
+            fast += answer is not None
+            if answer is not None:
+                status = "fast path"
+            print(
+                f"{row['id']:>40}: {status:<10} {answer if answer is not None else ''}"
+            )
+
+    print(f"\nSynthesizer LLM calls removed: {fast}/{len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
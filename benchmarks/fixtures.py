@@ -0,0 +1,203 @@
+"""
+A small Northwind database with the real table layout (columns, keys and
+foreign keys of the six tables the agent uses, plus the two they point to).
+Used by tests and benchmarks when data/northwind.sqlite is not available.
+"""
+
+import sqlite3
+from pathlib import Path
+
+NORTHWIND_DDL = """
+CREATE TABLE Categories (
+    CategoryID INTEGER PRIMARY KEY,
+    CategoryName TEXT,
+    Description TEXT,
+    Picture BLOB
+);
+CREATE TABLE Customers (
+    CustomerID TEXT PRIMARY KEY,
+    CompanyName TEXT,
+    ContactName TEXT,
+    ContactTitle TEXT,
+    Address TEXT,
+    City TEXT,
+    Region TEXT,
+    PostalCode TEXT,
+    Country TEXT,
+    Phone TEXT,
+    Fax TEXT
+);
+CREATE TABLE Employees (
+    EmployeeID INTEGER PRIMARY KEY,
+    LastName TEXT,
+    FirstName TEXT
+);
+CREATE TABLE Shippers (
+    ShipperID INTEGER PRIMARY KEY,
+    CompanyName TEXT,
+    Phone TEXT
+);
+CREATE TABLE Suppliers (
+    SupplierID INTEGER PRIMARY KEY,
+    CompanyName TEXT,
+    ContactName TEXT,
+    ContactTitle TEXT,
+    Address TEXT,
+    City TEXT,
+    Region TEXT,
+    PostalCode TEXT,
+    Country TEXT,
+    Phone TEXT,
+    Fax TEXT,
+    HomePage TEXT
+);
+CREATE TABLE Products (
+    ProductID INTEGER PRIMARY KEY,
+    ProductName TEXT,
+    SupplierID INTEGER,
+    CategoryID INTEGER,
+    QuantityPerUnit TEXT,
+    UnitPrice NUMERIC,
+    UnitsInStock INTEGER,
+    UnitsOnOrder INTEGER,
+    ReorderLevel INTEGER,
+    Discontinued TEXT,
+    FOREIGN KEY (CategoryID) REFERENCES Categories (CategoryID),
+    FOREIGN KEY (SupplierID) REFERENCES Suppliers (SupplierID)
+);
+CREATE TABLE Orders (
+    OrderID INTEGER PRIMARY KEY,
+    CustomerID TEXT,
+    EmployeeID INTEGER,
+    OrderDate DATETIME,
+    RequiredDate DATETIME,
+    ShippedDate DATETIME,
+    ShipVia INTEGER,
+    Freight NUMERIC,
+    ShipName TEXT,
+    ShipAddress TEXT,
+    ShipCity TEXT,
+    ShipRegion TEXT,
+    ShipPostalCode TEXT,
+    ShipCountry TEXT,
+    FOREIGN KEY (EmployeeID) REFERENCES Employees (EmployeeID),
+    FOREIGN KEY (CustomerID) REFERENCES Customers (CustomerID),
+    FOREIGN KEY (ShipVia) REFERENCES Shippers (ShipperID)
+);
+CREATE TABLE "Order Details" (
+    OrderID INTEGER,
+    ProductID INTEGER,
+    UnitPrice NUMERIC,
+    Quantity INTEGER,
+    Discount REAL,
+    PRIMARY KEY (OrderID, ProductID),
+    FOREIGN KEY (OrderID) REFERENCES Orders (OrderID),
+    FOREIGN KEY (ProductID) REFERENCES Products (ProductID)
+);
+"""
+
+CATEGORIES = [
+    (1, "Beverages"),
+    (2, "Condiments"),
+    (3, "Confections"),
+    (4, "Dairy Products"),
+    (8, "Seafood"),
+]
+PRODUCTS = [
+    (1, "Chai", 1, 1, 18.0),
+    (2, "Chang", 1, 1, 19.0),
+    (3, "Aniseed Syrup", 1, 2, 10.0),
+    (16, "Pavlova", 2, 3, 17.45),
+    (11, "Queso Cabrales", 2, 4, 21.0),
+    (10, "Ikura", 2, 8, 31.0),
+]
+CUSTOMERS = [
+    ("ALFKI", "Alfreds Futterkiste", "Germany"),
+    ("BONAP", "Bon app'", "France"),
+    ("QUICK", "QUICK-Stop", "Germany"),
+]
+# (OrderID, CustomerID, OrderDate, [(ProductID, UnitPrice, Quantity, Discount)])
+ORDERS = [
+    (10248, "ALFKI", "1997-06-04", [(1, 18.0, 10, 0.0), (3, 10.0, 5, 0.0)]),
+    (10249, "BONAP", "1997-06-20", [(2, 19.0, 20, 0.1), (10, 31.0, 2, 0.0)]),
+    (10250, "QUICK", "1997-12-05", [(16, 17.45, 6, 0.0), (11, 21.0, 4, 0.05)]),
+    (10251, "ALFKI", "1997-12-24", [(11, 21.0, 10, 0.0)]),
+    (10252, "BONAP", "1996-07-10", [(1, 14.4, 8, 0.0)]),
+]
+
+
+def create_northwind(path: Path) -> Path:
+    """Writes the fixture database to `path` and returns it."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(NORTHWIND_DDL)
+        conn.executemany(
+            "INSERT INTO Categories (CategoryID, CategoryName) VALUES (?, ?)",
+            CATEGORIES,
+        )
+        conn.executemany(
+            "INSERT INTO Suppliers (SupplierID, CompanyName, Country) VALUES (?, ?, ?)",
+            [(1, "Exotic Liquids", "UK"), (2, "Tokyo Traders", "Japan")],
+        )
+        conn.executemany(
+            "INSERT INTO Products (ProductID, ProductName, SupplierID, CategoryID, "
+            "UnitPrice, UnitsInStock, Discontinued) VALUES (?, ?, ?, ?, ?, 10, '0')",
+            PRODUCTS,
+        )
+        conn.executemany(
+            "INSERT INTO Customers (CustomerID, CompanyName, Country) VALUES (?, ?, ?)",
+            CUSTOMERS,
+        )
+        for order_id, customer_id, order_date, lines in ORDERS:
+            conn.execute(
+                "INSERT INTO Orders (OrderID, CustomerID, OrderDate, Freight, "
+                "ShipCountry) VALUES (?, ?, ?, 10.0, 'Germany')",
+                (order_id, customer_id, order_date),
+            )
+            conn.executemany(
+                'INSERT INTO "Order Details" VALUES (?, ?, ?, ?, ?)',
+                [(order_id, *line) for line in lines],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return Path(path)
+
+
+def add_bulk_orders(
+    path: Path, orders: int = 16_000, lines_per_order: int = 38
+) -> Path:
+    """
+    Grows the fixture to Northwind size: 77 products and `orders` extra
+    orders of `lines_per_order` lines each (16k x 38 ~ the 609k order lines
+    of the full database). Generated in SQL, so it takes about a second.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(f"""
+            WITH RECURSIVE n(i) AS (SELECT 100 UNION ALL SELECT i + 1 FROM n WHERE i < 170)
+            INSERT INTO Products (ProductID, ProductName, SupplierID, CategoryID,
+                                  UnitPrice, UnitsInStock, Discontinued)
+            SELECT i, 'Product ' || i, 1 + i % 2,
+                   CASE i % 5 WHEN 4 THEN 8 ELSE 1 + i % 5 END, 5 + i % 40, 10, '0'
+            FROM n;
+
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < {orders} - 1)
+            INSERT INTO Orders (OrderID, CustomerID, OrderDate, Freight, ShipCountry)
+            SELECT 20000 + i, 'ALFKI', date('1996-07-01', '+' || (i % 670) || ' days'),
+                   i % 90, 'Germany'
+            FROM n;
+
+            CREATE TEMP TABLE product_ids AS
+            SELECT ProductID, row_number() OVER (ORDER BY ProductID) - 1 AS k FROM Products;
+            WITH RECURSIVE line(j) AS (SELECT 0 UNION ALL SELECT j + 1 FROM line WHERE j < {lines_per_order} - 1)
+            INSERT INTO "Order Details"
+            SELECT o.OrderID, p.ProductID, 10 + p.k % 30, 1 + (o.OrderID + line.j) % 20, 0.0
+            FROM Orders o, line
+            JOIN product_ids p ON p.k = (o.OrderID + line.j) % (SELECT COUNT(*) FROM product_ids)
+            WHERE o.OrderID >= 20000;
+            """)
+        conn.commit()
+    finally:
+        conn.close()
+    return Path(path)
@@ -0,0 +1,324 @@
+"""
+Deterministic stand-in for the Ollama model, for offline benchmarks.
+
+Serves the OpenAI chat completions API. Requests are recognised by the
+DSPy signature's output fields (read from the system prompt), then
+answered with:
+  - replay: the output recorded for the same question in logs/baseline_*.txt
+    (route, planner constraints, SQL, repairs, synthesizer answer), falling
+    back to synthesize when the question wasn't recorded;
+  - synthesize: well-formed outputs for every field (fast-router route,
+    doc-fact constraints, a valid query, a typed answer for the format hint).
+Each response waits --latency-ms plus --ms-per-token per completion token,
+so model time can be set to zero (pure orchestration overhead) or to a
+realistic figure.
+
+Usage:
+    python -m benchmarks.stub_llm_server --port 8765 --latency-ms 0
+    LLM_MODEL=openai/stub LLM_API_BASE=http://127.0.0.1:8765/v1 LLM_API_KEY=stub \\
+        python run_agent_hybrid.py --no-cache --trace trace.jsonl
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOGS_DIR = Path(__file__).resolve().parent.parent / "logs"
+
+LOG_LINE_RE = re.compile(r"^\d{4}-\d{2}-\d{2} [\d:,]+ - \w+ - \w+ - (?:\S+ )?(.*)$")
+FIELD_HEADER_RE = re.compile(r"\[\[ ## (\w+) ## \]\]")
+OUTPUT_FIELDS_RE = re.compile(
+    r"Your output fields are:(.*?)(?:All interactions|$)", re.S
+)
+FIELD_NAME_RE = re.compile(r"^\s*\d+\.\s*`(\w+)`", re.M)
+
+# Log prefix -> (signature output field, accumulate as list)
+LOGGED_FIELDS = {
+    "Route Selected: ": ("classification", False),
+    "Raw Constraints Output: ": ("constraints", False),
+    "Generated SQL: ": ("sql_query", False),
+    "Raw Fixed SQL: ": ("fixed_sql", True),
+    "Raw Synthesizer Answer: ": ("final_answer", False),
+    "Raw Explanation: ": ("explanation", False),
+    "Raw Citations: ": ("citations", False),
+}
+MULTILINE_FIELDS = {"sql_query", "fixed_sql"}
+
+
+def load_replay(paths: List[Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Question -> recorded outputs, parsed from agent run logs. Later runs
+    override earlier ones; repairs keep every attempt in order.
+    """
+    replay: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        question = None
+        open_field = None  # multi-line SQL still being read
+        for raw in path.read_text(encoding="utf-8").splitlines():
+            if raw.startswith("Query: "):
+                question = raw[len("Query: ") :].strip()
+                replay[question] = {}
+                open_field = None
+                continue
+            match = LOG_LINE_RE.match(raw)
+            if not match:
+                if open_field and raw.strip() and not raw.startswith(" ↳"):
+                    _append(replay[question], open_field, raw.rstrip())
+                else:
+                    open_field = None
+                continue
+
+            open_field = None
+            if question is None:
+                continue
+            message = match.group(1)
+            for prefix, (field, is_list) in LOGGED_FIELDS.items():
+                if message.startswith(prefix):
+                    value = message[len(prefix) :].strip()
+                    if is_list:
+                        replay[question].setdefault(field, []).append(value)
+                    else:
+                        replay[question][field] = value
+                    if field in MULTILINE_FIELDS:
+                        open_field = field
+                    break
+    return replay
+
+
+def _append(outputs: Dict[str, Any], field: str, line: str):
+    if isinstance(outputs[field], list):
+        outputs[field][-1] += "\n" + line
+    else:
+        outputs[field] += "\n" + line
+
+
+def parse_request(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Output field names and input field values of a DSPy chat request."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    declared = OUTPUT_FIELDS_RE.search(system)
+    outputs = FIELD_NAME_RE.findall(declared.group(1)) if declared else []
+
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    parts = FIELD_HEADER_RE.split(user)
+    inputs = {
+        name: value.strip()
+        for name, value in zip(parts[1::2], parts[2::2])
+        if name != "completed"
+    }
+    return {"outputs": outputs, "inputs": inputs}
+
+
+class StubResponder:
+    def __init__(self, mode: str, replay: Dict[str, Dict[str, Any]]):
+        self.mode = mode
+        self.replay = replay
+        self._router = None
+
+    def respond(self, outputs: List[str], inputs: Dict[str, str]) -> Dict[str, str]:
+        recorded = (
+            self.replay.get(inputs.get("question", ""))
+            if self.mode == "replay"
+            else None
+        )
+        values = {}
+        for field in outputs:
+            value = self._replayed(field, recorded, inputs) if recorded else None
+            values[field] = (
+                value if value is not None else self._synthesized(field, inputs)
+            )
+        return values
+
+    def _replayed(
+        self, field: str, recorded: Dict[str, Any], inputs: Dict[str, str]
+    ) -> Optional[str]:
+        if field == "reasoning":
+            return "Replayed from a recorded run."
+        if field != "fixed_sql":
+            return recorded.get(field)
+        # The attempt after the one that failed
+        attempts = [recorded.get("sql_query")] + recorded.get("fixed_sql", [])
+        bad = inputs.get("bad_query", "").strip()
+        for previous, fixed in zip(attempts, attempts[1:]):
+            if previous and previous.strip() == bad:
+                return fixed
+        return attempts[-1] if len(attempts) > 1 else None
+
+    def _synthesized(self, field: str, inputs: Dict[str, str]) -> str:
+        question = inputs.get("question", "")
+        if field == "reasoning":
+            return "Deterministic stub output."
+        if field == "classification":
+            return self._route(question)
+        if field == "constraints":
+            from agent.rag.retrieval import resolve_constraints
+
+            return json.dumps(resolve_constraints(question) or {})
+        if field == "sql_query":
+            return "SELECT COUNT(*) AS count FROM orders"
+        if field == "fixed_sql":
+            return "SELECT COUNT(*) AS count FROM orders"
+        if field == "final_answer":
+            return _typed_answer(
+                inputs.get("format_hint", "str"), inputs.get("sql_result", "")
+            )
+        if field == "explanation":
+            return "Answer produced by the stub model."
+        if field == "citations":
+            return "orders"
+        return "stub"
+
+    def _route(self, question: str) -> str:
+        if self._router is None:
+            from agent.fast_router import FastRouter
+
+            self._router = FastRouter.load()
+        return self._router.predict(question)[0]
+
+
+def _typed_answer(format_hint: str, sql_result: str) -> str:
+    """A value of the hinted type, taken from the first SQL value if any."""
+    first = None
+    try:
+        rows = ast.literal_eval(sql_result)
+        if rows and isinstance(rows, list) and isinstance(rows[0], dict):
+            first = next(iter(rows[0].values()), None)
+    except (ValueError, SyntaxError):
+        pass
+    hint = format_hint.strip().lower()
+    if hint == "int":
+        return str(int(first)) if isinstance(first, (int, float)) else "0"
+    if hint == "float":
+        return str(float(first)) if isinstance(first, (int, float)) else "0.0"
+    if hint.startswith("list"):
+        return "[]"
+    if hint.startswith("{"):
+        keys = re.findall(r"(\w+)\s*:\s*(\w+)", format_hint)
+        defaults = {"int": 0, "float": 0.0}
+        return repr({k: defaults.get(t, "") for k, t in keys})
+    return str(first) if first is not None else "unknown"
+
+
+def render(values: Dict[str, str]) -> str:
+    """ChatAdapter response format."""
+    sections = [f"[[ ## {field} ## ]]\n{value}" for field, value in values.items()]
+    return "\n\n".join(sections + ["[[ ## completed ## ]]"])
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, as the OpenAI client reuses pooled connections
+    protocol_version = "HTTP/1.1"
+    responder: StubResponder
+    latency_ms: float = 0.0
+    ms_per_token: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send({"error": "not found"}, status=404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        messages = body.get("messages", [])
+        request = parse_request(messages)
+        text = render(self.responder.respond(request["outputs"], request["inputs"]))
+
+        prompt_tokens = sum(approx_tokens(str(m.get("content", ""))) for m in messages)
+        completion_tokens = approx_tokens(text)
+        delay = self.latency_ms + self.ms_per_token * completion_tokens
+        if delay:
+            time.sleep(delay / 1000)
+
+        self._send(
+            {
+                "id": f"stub-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    def _send(self, payload: Dict[str, Any], status: int = 200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(
+    port: int = 8765,
+    mode: str = "replay",
+    latency_ms: float = 0.0,
+    ms_per_token: float = 0.0,
+    logs: Optional[List[Path]] = None,
+    background: bool = False,
+) -> ThreadingHTTPServer:
+    """Starts the server; with background=True it runs in a daemon thread."""
+    replay = load_replay(logs or sorted(LOGS_DIR.glob("baseline_*.txt")))
+    handler = type(
+        "Handler",
+        (StubHandler,),
+        {
+            "responder": StubResponder(mode, replay),
+            "latency_ms": latency_ms,
+            "ms_per_token": ms_per_token,
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(
+            f"🧪 Stub LLM ({mode}, {len(replay)} recorded questions) on "
+            f"http://127.0.0.1:{server.server_port}/v1"
+        )
+        server.serve_forever()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=["replay", "synthesize"], default="replay")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    args = parser.parse_args()
+    serve(args.port, args.mode, args.latency_ms, args.ms_per_token)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import json
+import argparse
 import logging
 import math
 import random
@@ -9,7 +9,7 @@ from dspy.teleprompt import BootstrapFewShot
 from agent.dspy_signatures import GenerateSQLSignature
 from agent.llm import init_dspy
 from agent.train_examples import train_examples
-from tools.sqlite_tool import execute_sql
+from tools.sqlite_tool import run_query
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Optimizer")
@@ -32,21 +32,19 @@ def sql_metric(example, pred, trace=None):
     # Execution & Accuracy Check
     try:
 
-        pred_resp_str = execute_sql(predicted_sql)
-        pred_resp = json.loads(pred_resp_str)
+        pred_resp = run_query(predicted_sql)
 
-        if pred_resp.get("status") == "error":
+        if not pred_resp.ok:
             return 0.0
 
-        gold_resp_str = execute_sql(gold_sql)
-        gold_resp = json.loads(gold_resp_str)
+        gold_resp = run_query(gold_sql)
 
-        if gold_resp.get("status") == "error":
+        if not gold_resp.ok:
             logger.warning(f"⚠️ Gold SQL failed for: {example.question}")
             return 0.0
 
-        pred_data = pred_resp.get("data", [])
-        gold_data = gold_resp.get("data", [])
+        pred_data = pred_resp.records()
+        gold_data = gold_resp.records()
 
         if pred_data == gold_data:
             return 1.0
@@ -78,8 +76,17 @@ def sql_metric(example, pred, trace=None):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Optimize the SQL generator.")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the LLM response cache."
+    )
+    parser.add_argument(
+        "--clear-cache", action="store_true", help="Empty the LLM response cache."
+    )
+    args = parser.parse_args()
+
     print("🚀 Initializing DSPy and Model...")
-    lm = init_dspy()
+    lm = init_dspy(use_cache=not args.no_cache, clear_cache=args.clear_cache)
 
     # 1. Define the Module
     class SQLModule(dspy.Module):
@@ -1,12 +1,28 @@
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import click
 from rich import print as rprint
 
+from agent import instrumentation
 from agent.graph_hybrid import RetailAnalyticsWorkflow
 from agent.llm import init_dspy
+from agent.nodes.router import confident_route
+from agent.rag.retrieval import retriever, warm_up
 from agent.schemas import InputRow, OutputRow
+from agent.sql_templates import (
+    TEMPLATE_CACHE_PATH,
+    SQLTemplateCache,
+    set_template_cache,
+)
+from tools.sqlite_tool import (
+    PLAN_GATE_MODES,
+    set_plan_gate,
+    set_sql_concurrency,
+    set_sql_limits,
+)
 
 # Setup logging
 logging.basicConfig(level=logging.ERROR)
@@ -14,6 +30,114 @@ logger = logging.getLogger("CLI")
 logger.setLevel(logging.INFO)
 
 
+def load_batch(batch) -> List[InputRow]:
+    # Validate Input using Pydantic
+    input_rows = []
+    with open(batch, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            input_rows.append(InputRow(**json.loads(line)))
+    return input_rows
+
+
+def may_need_docs(questions: List[str]) -> List[bool]:
+    """False for questions the local router confidently sends to SQL."""
+    return [confident_route(q) != "sql" for q in questions]
+
+
+def prefetch_docs(questions: List[str], needed: List[bool]) -> List[Optional[list]]:
+    """
+    Docs for the questions that may reach the retriever, in one vectorized
+    batch; None for the others (the retriever node fetches on demand if
+    one gets there after all). Loads nothing when none are needed.
+    """
+    wanted = [i for i, need in enumerate(needed) if need]
+    docs: List[Optional[list]] = [None] * len(questions)
+    if wanted:
+        fetched = retriever.retrieve_many([questions[i] for i in wanted])
+        for i, question_docs in zip(wanted, fetched):
+            docs[i] = question_docs
+    return docs
+
+
+def run_question(app, input_row, docs, verbose=True):
+    """
+    Runs one question through the graph and returns the validated OutputRow.
+    With verbose=False (concurrent runs) per-node progress is not printed,
+    since lines from different questions would interleave.
+    """
+    if verbose:
+        rprint(f"[bold cyan]Question ID: {input_row.id}[/bold cyan]")
+        print(f"Query: {input_row.question}")
+
+    # Init State
+    initial_state = {
+        "id": input_row.id,
+        "question": input_row.question,
+        "format_hint": input_row.format_hint,
+        "repair_steps": 0,
+        "citations": [],
+        "prefetched_docs": docs,
+    }
+    config = {"configurable": {"thread_id": input_row.id}}  # Run Graph
+    if verbose:
+        print("⏳ Running Graph...")
+    final_state = initial_state.copy()
+
+    # Stream to print intermediate steps
+    for step in app.stream(initial_state, config=config):
+        for node_name, update in step.items():
+            if verbose:
+                rprint(f"[dim] ↳ Finished Node: [bold]{node_name}[/bold][/dim]")
+            final_state.update(update)
+
+    # 3. Assemble and Validate Final Output
+    # CRITICAL FIX: Map 'sql_query' from state to 'sql' in output
+    output_data = {
+        "id": final_state.get("id"),
+        "final_answer": final_state.get("final_answer"),
+        "sql": final_state.get(
+            "sql_query", ""
+        ),  # <--- CHANGED from 'sql' to 'sql_query'
+        "confidence": final_state.get("confidence", 0.0),
+        "explanation": final_state.get(
+            "explanation", "Could not synthesize explanation."
+        ),
+        "citations": final_state.get("citations", []),
+    }
+
+    # Validate against the Output Contract Pydantic model
+    final_output_row = OutputRow(**output_data)
+
+    if verbose:
+        rprint(f"✅ Final Result Type: {type(final_output_row.final_answer).__name__}")
+    else:
+        rprint(f"[bold cyan]✅ Finished: {input_row.id}[/bold cyan]")
+    rprint(
+        f"👉 [bold]Answer Preview:[/bold] {final_output_row.final_answer} [dim](Confidence: {final_output_row.confidence:.2f})[/dim]"
+    )
+    if verbose:
+        print("-" * 50)
+    return final_output_row
+
+
+def print_trace_summary(summary, trace):
+    """Per-node latency table (plain print: rich would wrap the wide rows)."""
+    rprint(f"\n[bold]⏱️ Per-node latency in ms (traces: {trace})[/bold]")
+    print(
+        f"{'node':<12}{'runs':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'llm':>5}"
+        f"{'in tok':>8}{'out tok':>8}{'chars':>8}{'sql':>7}"
+    )
+    for node, s in summary.items():
+        print(
+            f"{node:<12}{s['runs']:>5}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}"
+            f"{s['p99_ms']:>9.1f}{s['llm_calls']:>5}{s['mean_prompt_tokens']:>8.0f}"
+            f"{s['mean_completion_tokens']:>8.0f}{s['mean_prompt_chars']:>8.0f}"
+            f"{s['mean_sql_ms']:>7.2f}"
+        )
+
+
 @click.command()
 @click.option(
     "--batch",
@@ -27,92 +151,145 @@ logger.setLevel(logging.INFO)
     type=click.Path(),
     help="Path to the output JSONL file to be generated.",
 )
-def main(batch, out):
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Bypass the on-disk LLM response and SQL template caches (always call the model).",
+)
+@click.option(
+    "--clear-cache",
+    is_flag=True,
+    help="Empty the on-disk LLM response and SQL template caches before running.",
+)
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of questions processed concurrently.",
+)
+@click.option(
+    "--llm-concurrency",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Max LLM requests in flight (default: one per worker).",
+)
+@click.option(
+    "--sql-concurrency",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Max SQL queries running at once.",
+)
+@click.option(
+    "--sql-timeout-ms",
+    default=5000,
+    type=click.FloatRange(min=0),
+    help="Stop a SQL query after this many ms and ask for a repair (0: no limit).",
+)
+@click.option(
+    "--sql-max-rows",
+    default=5000,
+    type=click.IntRange(min=0),
+    help="Max rows a SQL query may return before it is sent for repair (0: no limit).",
+)
+@click.option(
+    "--sql-plan-gate",
+    default="warn",
+    type=click.Choice(PLAN_GATE_MODES),
+    help="Check each query's EXPLAIN QUERY PLAN first: log expensive plans (warn), send them for repair instead of running them (reject), or skip the check (off).",
+)
+@click.option(
+    "--trace",
+    default=None,
+    type=click.Path(),
+    help="Write per-node timings/tokens per question to this JSONL file and print a latency summary.",
+)
+def main(
+    batch,
+    out,
+    no_cache,
+    clear_cache,
+    workers,
+    llm_concurrency,
+    sql_concurrency,
+    sql_timeout_ms,
+    sql_max_rows,
+    sql_plan_gate,
+    trace,
+):
     """
     Retail Analytics Copilot CLI Runner.
     Processes questions from a batch file and outputs results according to the Output Contract.
     """
     rprint("[bold green]=== Retail Analytics Copilot CLI ===[/bold green]")
 
-    # 1. Initialize DSPy and Graph
-    init_dspy()
+    try:
+        input_rows = load_batch(batch)
+    except Exception as e:
+        rprint(f"\n[bold red]❌ Could not read {batch}: {e}[/bold red]")
+        return
+    questions = [row.question for row in input_rows]
+    needed = may_need_docs(questions)
+
+    # 1. Initialize DSPy and Graph (the RAG index loads in the background
+    # meanwhile, unless every question is confidently SQL-only)
+    if any(needed):
+        warm_up(background=True)
+    init_dspy(
+        use_cache=not no_cache,
+        clear_cache=clear_cache,
+        max_in_flight=llm_concurrency or workers,
+    )
+    set_sql_concurrency(sql_concurrency)
+    set_sql_limits(sql_timeout_ms or None, sql_max_rows or None)
+    set_plan_gate(sql_plan_gate)
+    if not no_cache or clear_cache:
+        template_cache = SQLTemplateCache(TEMPLATE_CACHE_PATH)
+        if clear_cache:
+            template_cache.clear()
+        if not no_cache:
+            set_template_cache(template_cache)
+            rprint(f"[dim]💾 SQL template cache: {TEMPLATE_CACHE_PATH}[/dim]")
+    recorder = instrumentation.enable() if trace else None
     workflow = RetailAnalyticsWorkflow()
     app = workflow.get_graph()
     rprint("[bold blue]✅ Graph Compiled (Full Hybrid Agent)[/bold blue]")
 
-    final_outputs = []
-
     # 2. Process Questions
     rprint(f"[yellow]📂 Reading from: {batch}[/yellow]")
     rprint(f"[yellow]✍️ Writing to: {out}[/yellow]\n")
 
     try:
-        with open(batch, "r") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-
-                # Validate Input using Pydantic
-                data = json.loads(line)
-                input_row = InputRow(**data)
-
-                rprint(f"[bold cyan]Question ID: {input_row.id}[/bold cyan]")
-                print(f"Query: {input_row.question}")
-
-                # Init State
-                initial_state = {
-                    "id": input_row.id,
-                    "question": input_row.question,
-                    "format_hint": input_row.format_hint,
-                    "repair_steps": 0,
-                    "citations": [],
-                }
-                config = {"configurable": {"thread_id": input_row.id}}  # Run Graph
-                print("⏳ Running Graph...")
-                final_state = initial_state.copy()
-
-                # Stream to print intermediate steps
-                for step in app.stream(initial_state, config=config):
-                    for node_name, update in step.items():
-                        rprint(f"[dim] ↳ Finished Node: [bold]{node_name}[/bold][/dim]")
-                        final_state.update(update)
-
-                # 3. Assemble and Validate Final Output
-                # CRITICAL FIX: Map 'sql_query' from state to 'sql' in output
-                output_data = {
-                    "id": final_state.get("id"),
-                    "final_answer": final_state.get("final_answer"),
-                    "sql": final_state.get(
-                        "sql_query", ""
-                    ),  # <--- CHANGED from 'sql' to 'sql_query'
-                    "confidence": final_state.get("confidence", 0.0),
-                    "explanation": final_state.get(
-                        "explanation", "Could not synthesize explanation."
-                    ),
-                    "citations": final_state.get("citations", []),
-                }
-
-                # Validate against the Output Contract Pydantic model
-                final_output_row = OutputRow(**output_data)
-
-                final_outputs.append(final_output_row.model_dump_json())
-
-                rprint(
-                    f"✅ Final Result Type: {type(final_output_row.final_answer).__name__}"
-                )
-                rprint(
-                    f"👉 [bold]Answer Preview:[/bold] {final_output_row.final_answer} [dim](Confidence: {final_output_row.confidence:.2f})[/dim]"
-                )
-                print("-" * 50)
+        # Retrieve context for the RAG/hybrid questions in one vectorized batch
+        prefetched = prefetch_docs(questions, needed)
+        fetched = sum(docs is not None for docs in prefetched)
+        rprint(f"[dim]📦 Pre-retrieved docs for {fetched} questions[/dim]\n")
+
+        if workers == 1:
+            output_rows = [
+                run_question(app, input_row, docs)
+                for input_row, docs in zip(input_rows, prefetched)
+            ]
+        else:
+            rprint(f"[yellow]🧵 Running {workers} questions at a time[/yellow]\n")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(run_question, app, input_row, docs, False)
+                    for input_row, docs in zip(input_rows, prefetched)
+                ]
+                # Collected in submission order, so the output follows the input
+                output_rows = [future.result() for future in futures]
 
         # 4. Write to JSONL
         with open(out, "w") as outfile:
-            for line in final_outputs:
-                outfile.write(line + "\n")
+            for row in output_rows:
+                outfile.write(row.model_dump_json() + "\n")
 
         rprint(
             f"\n[bold green]✅ Evaluation Complete. Results written to {out}[/bold green]"
         )
+        if recorder is not None:
+            recorder.write_jsonl(trace)
+            print_trace_summary(recorder.summary(), trace)
 
     except Exception as e:
         rprint(
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import create_northwind
+from utils import db_client
+
+
+@pytest.fixture
+def northwind_db(tmp_path, monkeypatch):
+    """Points NorthwindDB at a fresh fixture database for one test."""
+    path = create_northwind(tmp_path / "northwind.sqlite")
+    monkeypatch.setattr(db_client, "DB_PATH", str(path))
+    yield path
+    db_client.NorthwindDB.close_all()
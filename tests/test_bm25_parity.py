@@ -0,0 +1,68 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from agent.rag.engine import SearchEngine, top_k_indices
+from agent.rag.loader import CorpusLoader
+from agent.rag.schema import DocumentChunk
+
+QUERIES = [
+    "return window for unopened beverages",
+    "summer beverages 1997 dates dates",
+    "w1 w2 w3 w40",
+    "word_not_in_corpus",
+    "",
+]
+
+
+def _random_chunks(n_chunks=500, seed=7):
+    rng = np.random.default_rng(seed)
+    vocab = ["beverages", "return", "window", "summer", "1997", "dates"]
+    vocab += [f"w{i}" for i in range(300)]
+    chunks = []
+    for i in range(n_chunks):
+        words = rng.choice(vocab, size=int(rng.integers(1, 40)))
+        chunks.append(
+            DocumentChunk(
+                id=f"doc.md::chunk{i}", content=" ".join(words), source="doc.md"
+            )
+        )
+    return chunks
+
+
+def test_sparse_and_dense_scorers_match_bm25okapi():
+    chunks = _random_chunks()
+    okapi = BM25Okapi([CorpusLoader.clean_tokenize(c.content) for c in chunks])
+    sparse = SearchEngine(chunks, scorer="sparse")
+    dense = SearchEngine(chunks, index=sparse.index, scorer="dense")
+
+    for query in QUERIES:
+        tokens = CorpusLoader.clean_tokenize(query)
+        expected = okapi.get_scores(tokens)
+        for engine in (sparse, dense):
+            scores = engine.get_scores(tokens)
+            assert np.allclose(scores, expected)
+            assert list(top_k_indices(scores, 10)) == list(top_k_indices(expected, 10))
+
+
+def test_top_k_matches_stable_sort_with_ties():
+    scores = np.array([1.0, 3.0, 3.0, 0.0, 3.0, 2.0, 0.0])
+    stable = list(np.argsort(-scores, kind="stable"))
+    for k in range(len(scores) + 2):
+        assert list(top_k_indices(scores, k)) == stable[:k]
+
+
+def test_retrieve_many_matches_single_search():
+    engine = SearchEngine(_random_chunks())
+    batched = engine.retrieve_many(QUERIES, k=8)
+
+    assert len(batched) == len(QUERIES)
+    for query, results in zip(QUERIES, batched):
+        single = engine.search(query, k=8)
+        assert [r["id"] for r in results] == [r["id"] for r in single]
+        assert np.allclose([r["score"] for r in results], [r["score"] for r in single])
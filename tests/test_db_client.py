@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db_client
+from utils.db_client import NorthwindDB
+
+
+def test_schema_is_cached_until_schema_version_changes(northwind_db, monkeypatch):
+    reads = []
+    read_tables = NorthwindDB._read_tables.__func__
+    monkeypatch.setattr(
+        NorthwindDB,
+        "_read_tables",
+        classmethod(lambda cls, conn: reads.append(1) or read_tables(cls, conn)),
+    )
+
+    first = NorthwindDB.get_schema()
+    assert NorthwindDB.get_schema() == first
+    assert [t.name for t in NorthwindDB.describe_tables()][0] == "categories"
+    assert len(reads) == 1
+
+    conn = sqlite3.connect(northwind_db)
+    conn.execute("ALTER TABLE Products ADD COLUMN Barcode TEXT")
+    conn.commit()
+    conn.close()
+
+    assert "Barcode (TEXT)" in NorthwindDB.get_schema()
+    assert len(reads) == 2
+    products = next(t for t in NorthwindDB.describe_tables() if t.name == "products")
+    assert products.foreign_keys["CategoryID"] == "categories.CategoryID"
+    assert [c.name for c in products.columns if c.pk] == ["ProductID"]
+
+
+def test_connections_are_pooled_per_thread_and_read_only(northwind_db, monkeypatch):
+    conn = NorthwindDB.get_connection()
+    assert NorthwindDB.get_connection() is conn
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(NorthwindDB.get_connection).result() is not conn
+    assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM Orders")
+
+    NorthwindDB.close_all()
+    assert NorthwindDB.get_connection() is not conn
+
+    # A missing file is an error, not a new empty database
+    missing = northwind_db.parent / "missing.sqlite"
+    monkeypatch.setattr(db_client, "DB_PATH", str(missing))
+    assert NorthwindDB.get_connection() is None
+    assert not missing.exists()
+
+
+def test_views_are_per_connection_and_the_file_is_untouched(northwind_db):
+    before = os.stat(northwind_db)
+    conn = NorthwindDB.get_connection()
+    count = conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0]
+    assert count == conn.execute('SELECT COUNT(*) FROM "Order Details"').fetchone()[0]
+    assert [t.name for t in NorthwindDB.describe_tables()][0] == "categories"
+
+    # No views were written to the database itself
+    raw = sqlite3.connect(northwind_db)
+    assert (
+        raw.execute("SELECT name FROM sqlite_master WHERE type = 'view'").fetchall()
+        == []
+    )
+    raw.close()
+    after = os.stat(northwind_db)
+    assert (after.st_mtime_ns, after.st_size) == (before.st_mtime_ns, before.st_size)
+
+
+def test_file_change_leaves_other_threads_connections_open(northwind_db):
+    with ThreadPoolExecutor(max_workers=1) as worker:
+        old = worker.submit(NorthwindDB.get_connection).result()
+        NorthwindDB.describe_tables()
+
+        conn = sqlite3.connect(northwind_db)
+        conn.execute("ALTER TABLE Products ADD COLUMN Barcode TEXT")
+        conn.commit()
+        conn.close()
+        assert "Barcode" in NorthwindDB.get_schema()
+
+        # Still usable for a query in flight; replaced on the next request
+        assert old.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 5
+        new = worker.submit(NorthwindDB.get_connection).result()
+        assert new is not old
+        with pytest.raises(sqlite3.ProgrammingError):
+            old.execute("SELECT 1")
@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from agent.fast_router import (
+    CONFIDENCE_THRESHOLD,
+    SQL_CONFIDENCE_THRESHOLD,
+    FastRouter,
+    is_confident,
+)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_exported_router_matches_sklearn(tmp_path):
+    with open(os.path.join(ROOT_DIR, "data", "router_questions.jsonl")) as f:
+        rows = [json.loads(line) for line in f]
+    questions = [r["question"] for r in rows]
+    routes = [r["route"] for r in rows]
+
+    FastRouter.train(questions, routes).save(tmp_path / "router.json")
+    router = FastRouter.load(tmp_path / "router.json")
+
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    model = LogisticRegression(C=10.0, max_iter=1000)
+    model.fit(vectorizer.fit_transform(questions), routes)
+
+    probe = ["Revenue during 'Winter Classics 1997'?", "Return policy for tea?"]
+    expected = model.predict_proba(vectorizer.transform(probe))
+    for question, row in zip(probe, expected):
+        probs = router.predict_proba(question)
+        assert np.allclose([probs[c] for c in model.classes_], row)
+
+
+def test_batch_prefetch_skips_questions_routed_to_sql(monkeypatch):
+    import run_agent_hybrid
+
+    calls = []
+    monkeypatch.setattr(
+        run_agent_hybrid.retriever,
+        "retrieve_many",
+        lambda questions: calls.append(questions) or [[q] for q in questions],
+    )
+    docs = run_agent_hybrid.prefetch_docs(["a", "b", "c"], [True, False, True])
+    assert docs == [["a"], None, ["c"]] and calls == [["a", "c"]]
+
+    # An SQL-only batch never touches the RAG index
+    assert run_agent_hybrid.prefetch_docs(["a", "b"], [False, False]) == [None, None]
+    assert len(calls) == 1
+
+
+def test_local_sql_route_needs_a_stricter_bar():
+    # A wrong "sql" route skips the docs, so it must clear the higher threshold
+    assert SQL_CONFIDENCE_THRESHOLD > CONFIDENCE_THRESHOLD
+    between = (CONFIDENCE_THRESHOLD + SQL_CONFIDENCE_THRESHOLD) / 2
+    assert is_confident("rag", between) and is_confident("hybrid", between)
+    assert not is_confident("sql", between)
+    assert is_confident("sql", SQL_CONFIDENCE_THRESHOLD)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.fast_synthesizer import cited_tables, format_answer
+
+
+def test_rows_matching_the_hint_are_answered_without_llm():
+    assert format_answer([{"n": 42.0}], "int") == 42
+    assert (
+        format_answer(
+            [{"aov": 1234.5678}], "float", "Return a float rounded to 2 decimals."
+        )
+        == 1234.57
+    )
+    assert format_answer(
+        [{"CategoryName": "Beverages", "TotalQuantity": 30}],
+        "{category:str, quantity:int}",
+    ) == {"category": "Beverages", "quantity": 30}
+    # Unnamed keys take the leftover columns in order
+    assert format_answer(
+        [{"CompanyName": "QUICK-Stop", "margin": 10.5}], "{customer:str, margin: float}"
+    ) == {"customer": "QUICK-Stop", "margin": 10.5}
+    assert format_answer(
+        [
+            {"ProductName": "Chai", "Revenue": 1.0},
+            {"ProductName": "Chang", "Revenue": 2},
+        ],
+        "list[{product:str, revenue:float}]",
+    ) == [{"product": "Chai", "revenue": 1.0}, {"product": "Chang", "revenue": 2.0}]
+
+
+def test_shapes_that_need_the_llm_fall_back():
+    assert format_answer([{"n": 1}, {"n": 2}], "int") is None  # several rows
+    assert format_answer([{"a": 1, "b": 2}], "float") is None  # several columns
+    assert format_answer([{"n": None}], "float") is None  # NULL aggregate
+    assert format_answer([{"name": "Chai", "qty": 3}], "{qty:int, units:int}") is None
+    assert format_answer([], "int") is None
+    assert format_answer([{"n": 3.7}], "int") is None  # not integral
+    assert format_answer([{"n": 1}], "dict") is None
+
+
+def test_citations_use_original_table_names():
+    sql = 'SELECT * FROM orders o JOIN "Order Details" d USING (OrderID)'
+    assert cited_tables(sql) == ["Orders", "Order Details"]
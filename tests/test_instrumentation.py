@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import instrumentation
+from agent.instrumentation import instrument_node, percentile, record_llm_prompt
+from agent.llm_cache import CachedLM
+from tools.sqlite_tool import execute_sql
+
+
+def fake_sql_gen(state):
+    lm = CachedLM("openai/test-model")
+    record_llm_prompt(None, [{"role": "user", "content": "abcd"}])
+    lm.update_history({"usage": {"prompt_tokens": 3, "completion_tokens": 2}})
+    execute_sql("SELECT COUNT(*) FROM orders")
+    return {}
+
+
+def test_traced_nodes_record_llm_and_sql_per_question(northwind_db, tmp_path):
+    assert instrument_node("sql_gen", fake_sql_gen) is fake_sql_gen  # disabled
+
+    recorder = instrumentation.enable()
+    try:
+        traced = instrument_node("sql_gen", fake_sql_gen)
+        traced({"id": "q1"})
+        traced({"id": "q2"})
+    finally:
+        instrumentation.disable()
+
+    recorder.write_jsonl(tmp_path / "trace.jsonl")
+    lines = [json.loads(l) for l in open(tmp_path / "trace.jsonl")]
+    assert [l["id"] for l in lines] == ["q1", "q2"]
+    node = lines[0]["nodes"][0]
+    assert node["node"] == "sql_gen" and node["llm_calls"] == 1
+    assert (node["prompt_tokens"], node["completion_tokens"]) == (3, 2)
+    assert node["prompt_chars"] == 4
+    assert 0 < node["sql_ms"] <= node["wall_ms"]
+
+    summary = recorder.summary()
+    assert list(summary) == ["sql_gen"] and summary["sql_gen"]["runs"] == 2
+
+
+def test_percentile_interpolates_like_numpy():
+    values = [1.0, 2.0, 3.0, 4.0, 10.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 95) == 8.8
+    assert percentile([5.0], 99) == 5.0
@@ -0,0 +1,69 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dspy
+
+from agent.llm_cache import CachedLM, ResponseCache
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite", max_entries=2)
+    cache.put("a", "m", ["A"])
+    cache.put("b", "m", ["B"])
+    assert cache.get("a") == ["A"]  # "b" is now the oldest
+    cache.put("c", "m", ["C"])
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == ["A"] and cache.get("c") == ["C"]
+
+
+def test_cached_lm_replays_identical_requests(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call(self, prompt=None, messages=None, **kwargs):
+        calls.append(messages)
+        return [f"answer {len(calls)}"]
+
+    monkeypatch.setattr(dspy.LM, "__call__", fake_call)
+    lm = CachedLM(
+        "ollama/test-model",
+        response_cache=ResponseCache(tmp_path / "llm.sqlite"),
+        temperature=0.0,
+    )
+    messages = [{"role": "user", "content": "Route: total sales in 1997?"}]
+
+    assert lm(messages=messages) == ["answer 1"]
+    assert lm(messages=messages) == ["answer 1"]
+    assert lm(messages=messages, temperature=0.7) == ["answer 2"]
+    assert (lm.cache_hits, lm.cache_misses) == (1, 2)
+
+
+def test_cached_lm_caps_requests_in_flight(monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def slow_call(self, prompt=None, messages=None, **kwargs):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.02)
+        with lock:
+            state["in_flight"] -= 1
+        return ["ok"]
+
+    monkeypatch.setattr(dspy.LM, "__call__", slow_call)
+    lm = CachedLM("ollama/test-model", max_in_flight=2)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(
+            pool.map(lambda i: lm(messages=[{"role": "user", "content": i}]), range(8))
+        )
+
+    assert state["peak"] == 2
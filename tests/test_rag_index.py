@@ -0,0 +1,325 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from agent.rag import engine as engine_module
+from agent.rag.config import LSA_MIN_CHUNKS
+from agent.rag.engine import SearchEngine
+from agent.rag.loader import CorpusLoader
+from agent.rag.store import IndexStore
+from agent.rag.vectors import VectorIndex
+
+POLICY = "# Returns & Policy\n- Beverages unopened: 14 days; opened: no returns.\n"
+CALENDAR = "## Summer Beverages 1997\n- Dates: 1997-06-01 to 1997-06-30\n"
+
+
+def _write_docs(docs_dir):
+    docs_dir.mkdir()
+    (docs_dir / "product_policy.md").write_text(POLICY, encoding="utf-8")
+    (docs_dir / "marketing_calendar.md").write_text(CALENDAR, encoding="utf-8")
+
+
+def test_persisted_index_is_memory_mapped_and_reused(tmp_path):
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+
+    built = SearchEngine.open(docs_dir, index_dir)
+    reopened = SearchEngine.open(docs_dir, index_dir)
+
+    assert isinstance(reopened.index.doc_ids, np.memmap)
+    assert isinstance(reopened.chunks.content_data, np.memmap)
+    assert reopened.search("beverages returns", k=2) == built.search(
+        "beverages returns", k=2
+    )
+
+
+def test_index_rebuilds_when_doc_content_changes(tmp_path):
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+    SearchEngine.open(docs_dir, index_dir)
+
+    (docs_dir / "product_policy.md").write_text(
+        POLICY + "\n\n- Seafood: 3 days.\n", encoding="utf-8"
+    )
+    params = SearchEngine.index_params()
+    assert IndexStore(index_dir).load(docs_dir, params) is None
+
+    engine = SearchEngine.open(docs_dir, index_dir)
+    # Two chunks, one with "seafood": its IDF is 0, but it still ranks first
+    assert "Seafood" in engine.search("seafood", k=1)[0]["content"]
+    assert engine.retrieve_many(["seafood"], k=1)[0] == engine.search("seafood", k=1)
+    assert IndexStore(index_dir).load(docs_dir, params) is not None
+
+
+def _same_projection(engine, vectors, vocab):
+    """
+    A full rebuild of the engine's chunks, with LSA vectors projected
+    through `vectors` (fitted on the `vocab` corpus) instead of a refit.
+    """
+    rebuilt = SearchEngine(list(engine.chunks))
+    terms = sorted(rebuilt.index.vocab, key=rebuilt.index.vocab.get)
+    old_ids = np.array([vocab.get(t, vectors.n_terms) for t in terms])
+    known = old_ids < vectors.n_terms
+    # Terms the projection never saw weigh nothing, as in a fold-in
+    idf = np.zeros(len(terms))
+    idf[known] = vectors.idf[old_ids[known]]
+    components = np.zeros((vectors.components.shape[0], len(terms)), np.float32)
+    components[:, known] = vectors.components[:, old_ids[known]]
+
+    projected = VectorIndex(idf, components, np.zeros((0, components.shape[0])))
+    projected.doc_vectors = projected.embed(
+        [
+            rebuilt._term_ids(rebuilt.index, CorpusLoader.clean_tokenize(c.content))
+            for c in rebuilt.chunks
+        ]
+    )
+    return SearchEngine(list(rebuilt.chunks), index=rebuilt.index, vectors=projected)
+
+
+@pytest.mark.parametrize("hybrid", [False, True])
+def test_refresh_patches_index_like_a_full_rebuild(tmp_path, monkeypatch, hybrid):
+    monkeypatch.setattr(engine_module, "LSA_MIN_CHUNKS", 1)
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+    (docs_dir / "catalog.md").write_text("# Catalog\n- Beverages, Seafood\n", "utf-8")
+    engine = SearchEngine.open(docs_dir, index_dir, hybrid=hybrid)
+    vectors, vocab = engine.vectors, dict(engine.index.vocab)
+    assert (vectors is not None) == hybrid
+
+    (docs_dir / "product_policy.md").write_text(
+        POLICY + "\n\n- Seafood: 3 days.\n", encoding="utf-8"
+    )
+    (docs_dir / "catalog.md").unlink()
+    (docs_dir / "kpi_definitions.md").write_text(
+        "## AOV\n- AOV = revenue / orders\n", "utf-8"
+    )
+
+    changes = engine.refresh()
+    assert changes == {
+        "added": ["kpi_definitions.md"],
+        "changed": ["product_policy.md"],
+        "removed": ["catalog.md"],
+    }
+    assert engine.refresh() == {"added": [], "changed": [], "removed": []}
+
+    # Patched vectors keep the old projection; a refit would move them
+    rebuilt = (
+        _same_projection(engine, vectors, vocab)
+        if hybrid
+        else SearchEngine(list(engine.chunks))
+    )
+    # Terms only catalog.md had are gone, as in a fresh build
+    assert "catalog" not in engine.index.vocab
+    assert sorted(engine.index.vocab) == sorted(rebuilt.index.vocab)
+    for query in ["seafood days", "beverages returns", "aov revenue", "catalog"]:
+        patched, full = engine.search(query, k=4), rebuilt.search(query, k=4)
+        assert [r["id"] for r in patched] == [r["id"] for r in full]
+        assert np.allclose([r["score"] for r in patched], [r["score"] for r in full])
+
+    # The refreshed build was persisted and is reused on the next start
+    params = SearchEngine.index_params(hybrid)
+    assert IndexStore(index_dir).load(docs_dir, params) is not None
+
+
+CATEGORIES = ["Beverages", "Condiments", "Dairy Products", "Produce", "Seafood"]
+REFUND_FAQ = [
+    "Refunds are issued once the return arrives inside the return window.",
+    "A refund needs the original receipt and must be requested within the return window.",
+    "Refund requests after the return window closes are declined.",
+    "Store credit instead of a refund is offered for returns past the return window.",
+    "Refunds go back to the original payment method after the returned items are inspected.",
+]
+OTHER_FAQ = [
+    "Orders ship within {n} business days from the warehouse by standard freight.",
+    "Loyalty members earn {n} points per dollar spent on every order.",
+    "Invoices are emailed {n} days after shipment and are payable by card or transfer.",
+    "Suppliers deliver to the warehouse every {n} days; stock levels are updated nightly.",
+    "Customer accounts lock after {n} failed sign-in attempts for security.",
+]
+
+
+def _write_support_docs(docs_dir, questions=200):
+    """
+    Return rules, promotions and a customer FAQ, large enough for LSA.
+    Only the FAQ says "refund", always next to "return window".
+    """
+    docs_dir.mkdir()
+    policy = [
+        f"## {c} returns\n- Unopened {c.lower()}: return window {3 + i} days; "
+        "opened items are not returnable.\n"
+        for i, c in enumerate(CATEGORIES)
+    ]
+    promotions = [
+        f"## {c} week\n- {c} featured on the homepage with a discount for the "
+        "whole promotion period.\n"
+        for c in CATEGORIES
+    ] + [
+        f"## {season} {c} 1997\n- Extra {c.lower()} discounts during the "
+        f"{season.lower()} promotion period.\n"
+        for c in CATEGORIES
+        for season in ("Summer", "Winter")
+    ]
+    faq = [
+        f"## Question {i}\n- "
+        + (
+            REFUND_FAQ[i % len(REFUND_FAQ)]
+            if i % 3 == 0
+            else OTHER_FAQ[i % len(OTHER_FAQ)].format(n=2 + i % 9)
+        )
+        + "\n"
+        for i in range(questions)
+    ]
+    for name, title, sections in [
+        ("policy.md", "Returns Policy", policy),
+        ("promotions.md", "Promotions", promotions),
+        ("faq.md", "Customer FAQ", faq),
+    ]:
+        (docs_dir / name).write_text(f"# {title}\n\n" + "\n".join(sections), "utf-8")
+
+
+def test_hybrid_search_finds_paraphrases_and_persists_vectors(tmp_path):
+    docs_dir = tmp_path / "docs"
+    _write_support_docs(docs_dir)
+    bm25 = SearchEngine.open(docs_dir, tmp_path / "bm25", hybrid=False)
+    SearchEngine.open(docs_dir, tmp_path / "hybrid", hybrid=True)
+    engine = SearchEngine.open(docs_dir, tmp_path / "hybrid", hybrid=True)
+    assert len(engine.chunks) >= LSA_MIN_CHUNKS
+    assert isinstance(engine.vectors.doc_vectors, np.memmap)
+
+    # The return rules never say "refund" and "period" pulls in promotions;
+    # LSA links "refund" to "return window" through the FAQ
+    for i, category in enumerate(CATEGORIES):
+        query = f"How long do I have to get a refund on {category.lower()}?"
+        rule = f"policy.md::chunk{i}"
+        assert rule not in [r["id"] for r in bm25.search(query, k=3)]
+        hits = engine.search(query, k=3)
+        assert rule in [r["id"] for r in hits], query
+
+    # Scores stay BM25 scores; only the order comes from the fusion
+    bm25_scores = {r["id"]: r["score"] for r in bm25.search(query, k=len(bm25.chunks))}
+    assert all(np.isclose(r["score"], bm25_scores[r["id"]]) for r in hits)
+    assert engine.retrieve_many([query], k=3)[0] == hits
+
+
+def test_hybrid_skips_lsa_on_small_corpora(tmp_path):
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+    built = SearchEngine.open(docs_dir, index_dir, hybrid=True)
+
+    assert built.vectors is None
+    # Stored as a hybrid build without vectors, so it isn't rebuilt each start
+    params = SearchEngine.index_params(hybrid=True)
+    assert IndexStore(index_dir).load(docs_dir, params) is not None
+    assert built.search("beverages returns") == SearchEngine.open(
+        docs_dir, index_dir, hybrid=False
+    ).search("beverages returns")
+
+
+def test_retriever_cache_is_immutable_and_versioned(tmp_path, monkeypatch):
+    from agent.rag import retrieval
+
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+    engine = SearchEngine.open(docs_dir, index_dir)
+    monkeypatch.setattr(retrieval, "_engine", engine)
+    cached = retrieval.LocalRetriever(cache_size=2)
+
+    first = cached.retrieve("Beverages returns?", k=1)
+    first[0]["content"] = "corrupted"
+    assert cached.retrieve("beverages, RETURNS", k=1) == engine.search(
+        "beverages returns", k=1
+    )
+    assert cached.cache_stats()["hits"] == 1
+
+    (docs_dir / "product_policy.md").write_text(POLICY + "\n\n- Seafood: 3 days.\n")
+    engine.refresh(docs_dir)
+    cached.retrieve_many(["beverages returns", "seafood", "dates"], k=1)
+    stats = cached.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+
+
+def test_chunker_keeps_headings_with_their_body():
+    from agent.rag.chunker import MarkdownChunker
+
+    lines = ["# Calendar", "", "## Summer Beverages 1997"]
+    lines += [f"- Note {i}: beverages promo" for i in range(6)]
+    lines += ["## Winter", "- Dates: 1997-12-01 to 1997-12-31"]
+    chunks = list(MarkdownChunker(min_tokens=6, max_tokens=12, overlap=4).chunk(lines))
+
+    assert chunks[0].startswith("# Calendar\n\n## Summer Beverages 1997\n- Note 0")
+    assert all(c.startswith("#") for c in chunks)
+    assert all(MarkdownChunker.count_tokens(c) <= 12 for c in chunks)
+    # Overlap repeats the last line of the previous part
+    assert chunks[1].split("\n")[1] == chunks[0].split("\n")[-1]
+    assert chunks[-1].startswith("## Winter")
+
+
+def test_chunk_store_patch_keeps_unicode_and_drops_unused_sources():
+    from agent.rag.chunks import ChunkStore, ChunkView
+
+    store = ChunkStore.from_chunks(
+        [
+            ChunkView("a.md::chunk0", "Café crème", "a.md"),
+            ChunkView("b.md::chunk0", "Smørrebrød", "b.md"),
+            ChunkView("a.md::chunk1", "Ünïcode", "a.md"),
+        ]
+    )
+    added = ChunkStore.from_chunks([ChunkView("c.md::chunk0", "日本語", "c.md")])
+    patched = store.patch(store.from_sources(["a.md"]), added)
+
+    assert list(patched) == [
+        ChunkView("b.md::chunk0", "Smørrebrød", "b.md"),
+        ChunkView("c.md::chunk0", "日本語", "c.md"),
+    ]
+    assert patched.sources == ["b.md", "c.md"]
+    assert patched.result(1, 2) == {
+        "id": "c.md::chunk0",
+        "content": "日本語",
+        "source": "c.md",
+        "score": 2.0,
+    }
+
+
+def test_fact_index_resolves_doc_entities_without_llm(tmp_path):
+    docs_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    _write_docs(docs_dir)
+    (docs_dir / "kpi_definitions.md").write_text(
+        "## Average Order Value (AOV)\n- AOV = revenue / orders\n", "utf-8"
+    )
+    (docs_dir / "catalog.md").write_text(
+        "# Catalog\n- Categories include Beverages, Seafood.\n", "utf-8"
+    )
+    SearchEngine.open(docs_dir, index_dir)
+    facts = SearchEngine.open(docs_dir, index_dir).facts
+
+    assert facts.resolve("AOV during 'Summer Beverages 1997'?") == {
+        "campaign": "Summer Beverages 1997",
+        "start_date": "1997-06-01",
+        "end_date": "1997-06-30",
+        "kpi": "Average Order Value",
+        "kpi_formula": "AOV = revenue / orders",
+    }
+    assert facts.resolve("Return window for unopened Beverages?")["return_windows"] == {
+        "Beverages": "Beverages unopened: 14 days; opened: no returns"
+    }
+    # Unknown campaigns go to the LLM planner
+    assert facts.resolve("Revenue during 'Spring Seafood 1997'?") is None
+    # A bare year is the full year; a shorter period is left to the planner
+    assert facts.resolve("Total revenue in 1997?") == {
+        "start_date": "1997-01-01",
+        "end_date": "1997-12-31",
+    }
+    for question in (
+        "Total revenue in June 1997?",
+        "Orders in Q4 1997?",
+        "AOV in December 1997?",
+        "Revenue in Summer 1997?",
+        "Beverages revenue in the first week of 1997?",
+        "Revenue from 1997-06-01 to 1997-06-30?",
+    ):
+        assert facts.resolve(question) is None, question
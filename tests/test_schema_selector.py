@@ -0,0 +1,45 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.schema_selector import select_tables
+from tools.sqlite_tool import get_db_schema
+from utils.db_client import NorthwindDB
+
+
+def test_selection_adds_join_path_and_skips_unrelated_views(northwind_db):
+    tables = NorthwindDB.describe_tables()
+
+    # category + quantity sold -> categories and order_items, joined via products
+    assert set(
+        select_tables(
+            tables,
+            "Which product category had the highest total quantity sold?",
+            {"start_date": "1997-06-01", "end_date": "1997-06-30"},
+        )
+    ) == {"orders", "order_items", "products", "categories"}
+    assert set(select_tables(tables, "Top 3 customers by revenue")) == {
+        "orders",
+        "order_items",
+        "customers",
+    }
+    # Nothing recognisable: the model gets the whole schema
+    assert len(select_tables(tables, "Hello?")) == len(tables)
+
+
+def test_pruned_schema_keeps_full_table_definitions(northwind_db):
+    full = get_db_schema()
+    pruned = get_db_schema("How many products are discontinued?")
+
+    assert (
+        pruned
+        == "Table: products\n" + full.split("Table: products\n")[1].split("\n\n")[0]
+    )
+    # A repair sees the views named in the failing query too
+    repair = get_db_schema(
+        "How many products are discontinued?",
+        sql="SELECT * FROM products JOIN suppliers USING (SupplierID)",
+    )
+    assert "Table: suppliers" in repair and "Table: orders" not in repair
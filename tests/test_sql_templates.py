@@ -0,0 +1,117 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import sql_templates
+from agent.nodes.executor import execute_sql_node
+from agent.sql_templates import SQLTemplateCache
+
+VOCABULARY = {"category": ["Beverages", "Condiments"], "country": ["France", "UK"]}
+
+
+def test_template_rebinds_slots_for_same_shaped_question(tmp_path):
+    cache = SQLTemplateCache(tmp_path / "templates.sqlite", vocabulary=VOCABULARY)
+    sql = (
+        "SELECT SUM(oi.UnitPrice * oi.Quantity) FROM order_items oi "
+        "JOIN orders o USING (OrderID) JOIN products p USING (ProductID) "
+        "JOIN categories c USING (CategoryID) WHERE c.CategoryName = 'Beverages' "
+        "AND o.OrderDate BETWEEN '1997-01-01' AND '1997-12-31 23:59:59' LIMIT 3"
+    )
+    template_id = cache.store(
+        "Top 3 revenue for Beverages in 1997?",
+        {"start_date": "1997-01-01", "end_date": "1997-12-31"},
+        "float",
+        sql,
+    )
+
+    hit = cache.lookup(
+        "Top 5 revenue for condiments in 1998?",
+        {"start_date": "1998-01-01", "end_date": "1998-12-31"},
+        "float",
+    )
+    assert hit == (
+        template_id,
+        sql.replace("Beverages", "Condiments")
+        .replace("1997", "1998")
+        .replace("LIMIT 3", "LIMIT 5"),
+    )
+    # Different shape, format hint, or untrusted planner output: no template
+    assert cache.lookup("Top 5 revenue for France in 1998?", {}, "float") is None
+    assert cache.lookup("Top 5 revenue for Condiments in 1998?", {}, "int") is None
+    assert cache.lookup("Top 5 revenue for Condiments?", "1998", "float") is None
+    assert cache.entries()[0]["hits"] == 1
+
+    assert cache.evict(template_id)
+    assert len(cache) == 0
+
+
+def test_literals_missing_from_sql_must_match(tmp_path):
+    cache = SQLTemplateCache(tmp_path / "templates.sqlite", vocabulary=VOCABULARY)
+    # The year is written as a strftime literal, so it can't be rebound
+    cache.store(
+        "How many orders shipped to UK in 1997?",
+        {},
+        "int",
+        "SELECT COUNT(*) FROM orders WHERE ShipCountry = 'UK' "
+        "AND strftime('%Y', OrderDate) = '1997'",
+    )
+
+    assert cache.lookup("How many orders shipped to France in 1998?", {}, "int") is None
+    _, sql = cache.lookup("How many orders shipped to France in 1997?", {}, "int")
+    assert "ShipCountry = 'France'" in sql and "= '1997'" in sql
+
+
+def test_constraints_outside_the_question_are_part_of_the_key(tmp_path):
+    cache = SQLTemplateCache(tmp_path / "templates.sqlite", vocabulary=VOCABULARY)
+    margin = {"kpi": "Gross Margin", "kpi_formula": "GM = revenue - 0.7 * revenue"}
+    sql = "SELECT SUM(oi.UnitPrice * oi.Quantity * 0.3) FROM order_items oi"
+    cache.store("Gross margin of our top customer?", margin, "float", sql)
+
+    assert cache.lookup("Gross margin of our top customer?", margin, "float")
+    # Same question, different planner output: the SQL may not apply
+    other = {**margin, "kpi_formula": "GM = revenue - 0.5 * revenue"}
+    assert cache.lookup("Gross margin of our top customer?", other, "float") is None
+    assert cache.lookup("Gross margin of our top customer?", {}, "float") is None
+
+    # Constraint values that are slots of the question still rebind
+    cache.store(
+        "Units of Beverages sold?",
+        {"categories": ["Beverages"]},
+        "int",
+        "SELECT SUM(Quantity) FROM order_items JOIN products USING (ProductID) "
+        "JOIN categories USING (CategoryID) WHERE CategoryName = 'Beverages'",
+    )
+    _, rebound = cache.lookup(
+        "Units of Condiments sold?", {"categories": ["Condiments"]}, "int"
+    )
+    assert "CategoryName = 'Condiments'" in rebound
+    assert (
+        cache.lookup("Units of Condiments sold?", {"categories": ["Seafood"]}, "int")
+        is None
+    )
+
+
+def test_executor_keeps_only_sql_that_found_something(tmp_path, northwind_db):
+    cache = SQLTemplateCache(tmp_path / "templates.sqlite", vocabulary=VOCABULARY)
+    sql_templates.set_template_cache(cache)
+    sql = (
+        "SELECT SUM(Quantity) AS units FROM order_items JOIN products "
+        "USING (ProductID) JOIN categories USING (CategoryID) "
+        "WHERE CategoryName = 'Beverages'"
+    )
+    state = {
+        "question": "Units of Beverages sold?",
+        "constraints": {"categories": ["Beverages"]},
+        "format_hint": "int",
+    }
+    try:
+        # SUM over no rows is one NULL row: nothing worth reusing
+        result = execute_sql_node({**state, "sql_query": sql + " AND Quantity < 0"})
+        assert result["sql_result"] == [{"units": None}] and len(cache) == 0
+
+        result = execute_sql_node({**state, "sql_query": sql})
+        assert result["sql_result"][0]["units"] > 0 and len(cache) == 1
+    finally:
+        sql_templates.set_template_cache(None)
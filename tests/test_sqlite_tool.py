@@ -0,0 +1,202 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import add_bulk_orders, create_northwind
+from tools import sqlite_tool
+from tools.sqlite_tool import analyze_query, execute_sql, run_query
+from utils import db_client
+from utils.db_client import NorthwindDB
+
+FK_JOIN = (
+    "SELECT c.CategoryName, SUM(oi.Quantity) AS quantity FROM order_items oi "
+    "JOIN products p ON oi.ProductID = p.ProductID "
+    "JOIN categories c ON p.CategoryID = c.CategoryID GROUP BY c.CategoryName"
+)
+# Cartesian joins the signatures warn against: no ON conditions at all
+CROSS_JOIN = "SELECT * FROM categories, orders, order_items"  # 5 * 5 * 8 rows
+RUNAWAY_JOIN = "SELECT COUNT(*) FROM " + ", ".join(
+    f"order_items t{i}" for i in range(8)
+)  # 8 ** 8 rows
+# Aggregates of the shapes the SQL generator writes for the eval questions
+REVENUE = "oi.UnitPrice * oi.Quantity * (1 - oi.Discount)"
+JOINS = (
+    "FROM orders o JOIN order_items oi ON o.OrderID = oi.OrderID "
+    "JOIN products p ON oi.ProductID = p.ProductID "
+)
+AGGREGATES = {
+    "top_category_qty": (
+        f"SELECT c.CategoryName, SUM(oi.Quantity) AS quantity {JOINS}"
+        "JOIN categories c ON p.CategoryID = c.CategoryID "
+        "WHERE o.OrderDate BETWEEN '1997-06-01' AND '1997-06-30' "
+        "GROUP BY c.CategoryName ORDER BY quantity DESC LIMIT 1"
+    ),
+    "aov": (
+        f"SELECT SUM({REVENUE}) / COUNT(DISTINCT o.OrderID) AS aov {JOINS}"
+        "WHERE o.OrderDate BETWEEN '1997-12-01' AND '1997-12-31'"
+    ),
+    "top3_products_by_revenue": (
+        f"SELECT p.ProductName AS product, SUM({REVENUE}) AS revenue {JOINS}"
+        "GROUP BY p.ProductName ORDER BY revenue DESC LIMIT 3"
+    ),
+    "category_revenue": (
+        f"SELECT SUM({REVENUE}) AS revenue {JOINS}"
+        "JOIN categories c ON p.CategoryID = c.CategoryID "
+        "WHERE c.CategoryName = 'Beverages' "
+        "AND o.OrderDate BETWEEN '1997-06-01' AND '1997-06-30'"
+    ),
+    "best_customer_margin": (
+        "SELECT cu.CompanyName, SUM((oi.UnitPrice - 0.7 * oi.UnitPrice) "
+        f"* oi.Quantity * (1 - oi.Discount)) AS margin {JOINS}"
+        "JOIN customers cu ON o.CustomerID = cu.CustomerID "
+        "WHERE strftime('%Y', o.OrderDate) = '1997' "
+        "GROUP BY cu.CompanyName ORDER BY margin DESC LIMIT 1"
+    ),
+}
+# The outer side is one row by key, so SQLite scans the inner table once
+SINGLE_ROW_JOINS = [
+    "SELECT COUNT(*) FROM customers c JOIN orders o "
+    "ON o.CustomerID = c.CustomerID WHERE c.CustomerID = 'ALFKI'",
+    "SELECT COUNT(*) FROM categories c JOIN products p "
+    "ON p.CategoryID = c.CategoryID WHERE c.CategoryID = 1",
+]
+
+
+def test_run_query_returns_typed_rows(northwind_db):
+    result = run_query(
+        "SELECT CategoryName AS name, COUNT(*) AS n, AVG(UnitPrice) AS price "
+        "FROM products JOIN categories USING (CategoryID) "
+        "GROUP BY CategoryName ORDER BY CategoryName LIMIT 2"
+    )
+    assert result.ok and result.columns == ("name", "n", "price")
+    assert result.row_count == len(result.rows) == 2
+    name, n, price = result.rows[0]
+    assert isinstance(name, str) and isinstance(n, int) and isinstance(price, float)
+    assert result.records()[0] == {"name": name, "n": n, "price": price}
+    assert result.elapsed_ms >= 0
+
+    assert json.loads(execute_sql("SELECT COUNT(*) AS count FROM orders"))["data"] == [
+        {"count": run_query("SELECT COUNT(*) FROM orders").rows[0][0]}
+    ]
+
+
+def test_errors_keep_the_tool_response_shape(northwind_db):
+    result = run_query("SELECT nope FROM orders")
+    assert not result.ok and result.rows == [] and "no such column" in result.error
+    assert json.loads(result.to_json()) == {
+        "status": "error",
+        "data": result.error,
+        "message": f"SQL Error: {result.error}",
+    }
+
+    blocked = json.loads(execute_sql("DROP TABLE orders"))
+    assert blocked["status"] == "error" and blocked["data"] is None
+    assert "forbidden" in blocked["message"]
+
+
+def test_runaway_join_is_stopped_at_the_deadline(northwind_db, monkeypatch):
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_GATE", "off")
+    monkeypatch.setattr(sqlite_tool, "SQL_TIMEOUT_MS", 50)
+    start = time.perf_counter()
+    result = run_query(RUNAWAY_JOIN)
+    assert time.perf_counter() - start < 1
+    assert not result.ok and result.limit == "timeout"
+    assert result.error == "interrupted" and "ON condition" in result.message
+
+    # The connection is usable again and later queries aren't cut short
+    assert run_query("SELECT COUNT(*) FROM orders").rows == [(5,)]
+
+
+def test_row_cap_truncates_and_asks_for_a_repair(northwind_db, monkeypatch):
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_GATE", "off")
+    monkeypatch.setattr(sqlite_tool, "SQL_MAX_ROWS", 50)
+    result = run_query(CROSS_JOIN)
+    assert not result.ok and result.limit == "max_rows"
+    assert result.row_count == len(result.rows) == 50
+    assert "more than 50 rows" in result.message
+    assert json.loads(result.to_json())["status"] == "error"
+
+    monkeypatch.setattr(sqlite_tool, "SQL_MAX_ROWS", None)
+    assert run_query(CROSS_JOIN).row_count == 200
+
+
+def test_query_plan_flags_joins_without_predicates(northwind_db, monkeypatch):
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_LARGE_TABLE_ROWS", 5)
+    conn = NorthwindDB.get_connection()
+
+    # Grouping the rows of a table is fine; sorting a join's fan-out isn't
+    assert analyze_query(conn, FK_JOIN).issues == []
+    plan = analyze_query(
+        conn,
+        "SELECT a.OrderID, b.OrderID FROM orders a "
+        "JOIN orders b ON a.CustomerID = b.CustomerID ORDER BY b.Freight",
+    )
+    assert [(i.kind, i.blocking) for i in plan.issues] == [("temp_btree", False)]
+
+    plan = analyze_query(conn, CROSS_JOIN)
+    assert plan.estimated_rows >= 5 * 5 * 8
+    assert [i.kind for i in plan.issues] == ["cartesian_join"] * 2
+    assert "links orders (5 rows)" in plan.issues[0].message
+
+    # Scanning the inner table once, behind a single outer row, is fine
+    for query in SINGLE_ROW_JOINS:
+        assert analyze_query(conn, query).issues == [], query
+
+    # Aliased base tables resolve too; a correlated subquery scans per row
+    plan = analyze_query(
+        conn,
+        'SELECT o.OrderID, (SELECT SUM(d.Quantity) FROM "Order Details" d '
+        "WHERE d.Quantity > o.Freight) FROM Orders o",
+    )
+    assert [i.kind for i in plan.issues] == ["nested_full_scan"]
+    assert "order_items (8 rows)" in plan.issues[0].message
+
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_MAX_ROWS", 100)
+    assert analyze_query(conn, RUNAWAY_JOIN).issues[-1].kind == "cost"
+
+
+def test_query_plan_at_northwind_size(tmp_path, monkeypatch):
+    # ~600k order lines: aggregates sort their input once, then only groups
+    path = add_bulk_orders(create_northwind(tmp_path / "northwind.sqlite"))
+    monkeypatch.setattr(db_client, "DB_PATH", str(path))
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_GATE", "reject")
+    try:
+        conn = NorthwindDB.get_connection()
+        for name, query in AGGREGATES.items():
+            plan = analyze_query(conn, query)
+            assert plan.issues == [], name
+            assert plan.estimated_rows < sqlite_tool.SQL_PLAN_MAX_ROWS / 2, name
+        assert run_query(AGGREGATES["top3_products_by_revenue"]).ok
+        for query in SINGLE_ROW_JOINS:
+            assert run_query(query).ok, query
+
+        rejected = run_query("SELECT COUNT(*) FROM categories, order_items")
+        assert rejected.limit == "plan"
+    finally:
+        NorthwindDB.close_all()
+
+
+def test_plan_gate_modes(northwind_db, monkeypatch, caplog):
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_GATE", "reject")
+    rejected = run_query(CROSS_JOIN)
+    assert not rejected.ok and rejected.limit == "plan" and rejected.rows == []
+    assert "Query Plan Error" in rejected.message
+    assert "no JOIN condition links" in rejected.message
+    assert run_query(FK_JOIN).ok
+
+    # Bad SQL fails while planning, with the usual error
+    broken = run_query("SELECT nope FROM orders")
+    assert broken.message == "SQL Error: no such column: nope"
+
+    monkeypatch.setattr(sqlite_tool, "SQL_PLAN_GATE", "warn")
+    assert run_query(CROSS_JOIN).row_count == 200
+    assert "no JOIN condition links" in caplog.text
+
+    with pytest.raises(ValueError):
+        sqlite_tool.set_plan_gate("block")
@@ -0,0 +1,63 @@
+import os
+import sys
+
+# Add the project root to the python path so imports work
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dspy
+
+from agent.dspy_signatures import GenerateSQLSignature, RepairSQLSignature
+from benchmarks.stub_llm_server import (
+    LOGS_DIR,
+    StubResponder,
+    load_replay,
+    parse_request,
+    render,
+)
+
+TOP3 = (
+    "Top 3 products by total revenue all-time. Revenue uses Order Details: "
+    "SUM(UnitPrice*Quantity*(1-Discount)). Return list[{product:str, revenue:float}]."
+)
+
+
+def stub_round_trip(responder, signature, **inputs):
+    """Formats a real DSPy request, answers it, parses it like DSPy does."""
+    signature = dspy.ChainOfThought(signature).predict.signature
+    adapter = dspy.ChatAdapter()
+    messages = adapter.format(signature, demos=[], inputs=inputs)
+    request = parse_request(messages)
+    return adapter.parse(
+        signature, render(responder.respond(request["outputs"], request["inputs"]))
+    )
+
+
+def test_replay_answers_recorded_questions_in_dspy_format():
+    replay = load_replay(sorted(LOGS_DIR.glob("baseline_*.txt")))
+    responder = StubResponder("replay", replay)
+    inputs = dict(question=TOP3, db_schema="", constraints="None", format_hint="list")
+
+    generated = stub_round_trip(responder, GenerateSQLSignature, **inputs)
+    assert generated["sql_query"] == replay[TOP3]["sql_query"]
+    # A repair gets the attempt recorded after the failing query
+    repaired = stub_round_trip(
+        responder,
+        RepairSQLSignature,
+        bad_query=generated["sql_query"],
+        error_message="syntax error",
+        **inputs,
+    )
+    assert repaired["fixed_sql"] == replay[TOP3]["fixed_sql"][0]
+
+
+def test_synthesize_mode_fills_every_output_field():
+    outputs = stub_round_trip(
+        StubResponder("synthesize", {}),
+        GenerateSQLSignature,
+        question="How many orders?",
+        db_schema="",
+        constraints="None",
+        format_hint="int",
+    )
+    assert outputs["sql_query"].startswith("SELECT")
+    assert outputs["reasoning"]
@@ -1,11 +1,65 @@
 import json
+import logging
+import re
 import sqlite3
-from typing import Any, Dict, List, Union
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field
 
+from agent.instrumentation import record_sql
+from agent.schema_selector import select_tables
 from utils.db_client import NorthwindDB
 
+logger = logging.getLogger("SQLTool")
+
+# Caps concurrent queries (batch workers share it); see set_sql_concurrency
+SQL_MAX_CONCURRENCY = 4
+_sql_slots = threading.BoundedSemaphore(SQL_MAX_CONCURRENCY)
+
+
+def set_sql_concurrency(max_queries: int):
+    """Sets how many queries may run at once across all threads."""
+    global _sql_slots
+    _sql_slots = threading.BoundedSemaphore(max_queries)
+
+
+# Per-query limits, against LLM SQL that joins without a predicate;
+# see set_sql_limits. None disables a limit.
+SQL_TIMEOUT_MS: Optional[float] = 5000
+SQL_MAX_ROWS: Optional[int] = 5000
+# SQLite VM instructions between deadline checks
+PROGRESS_INTERVAL = 1000
+
+
+def set_sql_limits(timeout_ms: Optional[float], max_rows: Optional[int]):
+    """Sets the wall-clock deadline and row cap of each query (None: no limit)."""
+    global SQL_TIMEOUT_MS, SQL_MAX_ROWS
+    SQL_TIMEOUT_MS = timeout_ms
+    SQL_MAX_ROWS = max_rows
+
+
+# EXPLAIN QUERY PLAN check before a query runs; see set_plan_gate.
+#   off: skip it; warn: log plan issues and run anyway;
+#   reject: don't run queries with a blocking issue (a join without a
+#   usable predicate, or more than SQL_PLAN_MAX_ROWS estimated row visits).
+PLAN_GATE_MODES = ("off", "warn", "reject")
+SQL_PLAN_GATE = "warn"
+SQL_PLAN_MAX_ROWS = 10_000_000
+# Tables at least this big are worth a warning when scanned repeatedly
+SQL_PLAN_LARGE_TABLE_ROWS = 10_000
+
+
+def set_plan_gate(mode: str, max_rows: Optional[int] = None):
+    """Sets the plan check mode (off/warn/reject) and its row budget."""
+    global SQL_PLAN_GATE, SQL_PLAN_MAX_ROWS
+    if mode not in PLAN_GATE_MODES:
+        raise ValueError(f"plan gate must be one of {PLAN_GATE_MODES}, not {mode!r}")
+    SQL_PLAN_GATE = mode
+    if max_rows is not None:
+        SQL_PLAN_MAX_ROWS = max_rows
+
 
 # Input Schema for the LLM
 class SqlQueryArgs(BaseModel):
@@ -14,7 +68,313 @@ class SqlQueryArgs(BaseModel):
     )
 
 
-def execute_sql(query: str) -> str:
+class QueryResult(NamedTuple):
+    """
+    Outcome of one query, with values as SQLite returned them.
+    On error, message says what went wrong and columns/rows are empty,
+    except when the row cap was hit: rows then holds the first
+    SQL_MAX_ROWS rows.
+    """
+
+    status: str  # "success" or "error"
+    columns: Tuple[str, ...]
+    rows: List[tuple]
+    row_count: int
+    elapsed_ms: float
+    message: str
+    error: Optional[str] = None  # SQLite's own error text, for repairs
+    limit: Optional[str] = None  # "timeout", "max_rows" or "plan" when hit
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "success"
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Rows as {column: value} dicts."""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def to_json(self) -> str:
+        """The execute_sql tool response."""
+        if not self.ok:
+            return json.dumps(
+                {"status": "error", "data": self.error, "message": self.message}
+            )
+        return json.dumps(
+            {"status": "success", "data": self.records(), "message": self.message},
+            default=str,
+        )
+
+
+class PlanIssue(NamedTuple):
+    kind: str  # "cartesian_join", "nested_full_scan", "temp_btree" or "cost"
+    message: str
+    blocking: bool  # rejected in "reject" mode
+
+
+class QueryPlan(NamedTuple):
+    estimated_rows: int  # row visits, from table sizes and loop nesting
+    issues: List[PlanIssue]
+
+
+# "SCAN main.Order Details USING COVERING INDEX ..." / "SEARCH p USING ..."
+LOOP_RE = re.compile(r"^(SCAN|SEARCH) (.+?)(?: USING (.+))?$")
+# Keywords that can follow a table reference, so they aren't its alias
+CLAUSE_KEYWORDS = (
+    "ON|USING|WHERE|GROUP|ORDER|HAVING|LIMIT|JOIN|INNER|LEFT|RIGHT|FULL|"
+    "CROSS|NATURAL|OUTER|UNION|EXCEPT|INTERSECT|WINDOW"
+)
+# Table references: FROM/JOIN/comma, name, optional alias
+TABLE_REF_RE = re.compile(
+    r'(?:\bFROM|\bJOIN|,)\s*("[^"]+"|\[[^\]]+\]|\w+)'
+    rf"(?:\s+(?:AS\s+)?(?!(?:{CLAUSE_KEYWORDS})\b)(\w+))?",
+    re.I,
+)
+
+
+# Lower-cased table name <-> the view the LLM sees
+VIEW_TABLES = {v: t.lower() for t, v in NorthwindDB.TABLE_MAP.items()}
+TABLE_VIEWS = {t: v for v, t in VIEW_TABLES.items()}
+
+
+def _aliases(query: str, known: Dict[str, int]) -> Dict[str, str]:
+    """Alias (or view name) -> lower-cased table name, for plan lines."""
+    aliases = dict(VIEW_TABLES)
+    for name, alias in TABLE_REF_RE.findall(query):
+        table = name.strip('"[]').lower()
+        table = VIEW_TABLES.get(table, table)
+        if table in known and alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+# "INDEX sqlite_autoindex_Customers_1 (CustomerID=?)": index and constraints
+INDEX_SEARCH_RE = re.compile(r"\bINDEX (\S+) \(([^)]*)\)")
+# GROUP BY terms, up to the next clause or the end of a subquery
+GROUP_BY_RE = re.compile(
+    r"\bGROUP\s+BY\s+(.+?)"
+    r"(?=\b(?:HAVING|ORDER|LIMIT|WINDOW|UNION|EXCEPT|INTERSECT)\b|\)|;|$)",
+    re.I | re.S,
+)
+COLUMN_REF_RE = re.compile(r"(?:(\w+)\.)?(\w+)")
+
+
+def _unique_search(conn: sqlite3.Connection, table: str, using: str) -> bool:
+    """True if an index SEARCH pins every column of a unique index."""
+    match = INDEX_SEARCH_RE.search(using)
+    if not match:
+        return False
+    index, constraints = match.groups()
+    # "main": the TEMP views would shadow tables of the same name
+    unique = conn.execute(
+        'SELECT "unique" FROM pragma_index_list(?, ?) WHERE name = ?',
+        (table, "main", index),
+    ).fetchone()
+    if not unique or not unique[0]:
+        return False
+    columns = conn.execute(
+        "SELECT COUNT(*) FROM pragma_index_info(?, ?)", (index, "main")
+    ).fetchone()[0]
+    return constraints.count("=?") == columns
+
+
+def _group_rows(
+    query: str, rows: Dict[str, int], aliases: Dict[str, str]
+) -> Optional[float]:
+    """
+    Upper bound on the groups a GROUP BY produces: the product of the
+    sizes of the tables its columns come from (grouping by
+    p.ProductName gives at most one group per product). None if a term
+    can't be traced to a table; the largest bound if there are several
+    GROUP BY clauses, as plan lines don't say which one they are for.
+    """
+    clauses = GROUP_BY_RE.findall(query)
+    if not clauses:
+        return None
+
+    def resolve(name: str) -> Optional[str]:
+        name = name.strip('"[]').lower()
+        return aliases.get(name, name if name in rows else None)
+
+    # Unqualified columns belong to whichever of the query's tables has
+    # them; read from the schema only if there are any
+    owners: Optional[Dict[str, set]] = None
+
+    def owner(column: str) -> Optional[str]:
+        nonlocal owners
+        if owners is None:
+            owners = {}
+            tables = {resolve(name) for name, _ in TABLE_REF_RE.findall(query)}
+            for info in NorthwindDB.describe_tables():
+                table = VIEW_TABLES.get(info.name.lower())
+                if table in tables:
+                    for col in info.columns:
+                        owners.setdefault(col.name.lower(), set()).add(table)
+        found = owners.get(column.lower(), set())
+        return next(iter(found)) if len(found) == 1 else None
+
+    bound = 0.0
+    for clause in clauses:
+        groups = 1.0
+        for term in clause.split(","):
+            refs = COLUMN_REF_RE.findall(term)
+            term_tables = set()
+            for qualifier, column in refs:
+                table = resolve(qualifier) if qualifier else owner(column)
+                if table is None:
+                    return None
+                term_tables.add(table)
+            if not term_tables:
+                return None  # a literal or a column position
+            for table in term_tables:
+                groups *= rows.get(table, 1)
+        bound = max(bound, groups)
+    return bound
+
+
+def analyze_query(conn: sqlite3.Connection, query: str) -> QueryPlan:
+    """
+    Estimates what a query will cost from its EXPLAIN QUERY PLAN and the
+    table row counts, without reading any data. Loops under the same plan
+    node are nested in order, so their row estimates multiply; correlated
+    subqueries run once per outer row. A temp B-tree costs one visit per
+    row it sorts (as a SEARCH by key costs one), and a GROUP BY leaves at
+    most one row per group for whatever comes after it.
+
+    Raises sqlite3.Error for queries that don't prepare (syntax, unknown
+    tables or columns).
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    rows = NorthwindDB.table_rows()
+    aliases: Optional[Dict[str, str]] = None  # parsed on first use
+    children: Dict[int, List[Tuple[int, str]]] = {}
+    for node_id, parent, _, detail in plan:
+        children.setdefault(parent, []).append((node_id, detail))
+
+    large_table, max_rows = SQL_PLAN_LARGE_TABLE_ROWS, SQL_PLAN_MAX_ROWS
+    issues: List[PlanIssue] = []
+    cost = 0.0
+
+    def walk(parent: int, repeats: float):
+        nonlocal aliases, cost
+        product = 1.0  # rows produced by the loops so far at this level
+        largest = 0  # biggest table looped over at this level
+        sorted_rows = None  # rows already in a temp B-tree, if unchanged since
+        loops = 0
+        for node_id, detail in children.get(parent, []):
+            loop = LOOP_RE.match(detail)
+            if loop:
+                kind, name, using = loop.groups()
+                using = using or ""
+                name = re.sub(r"^(main|temp)\.", "", name).lower()
+                if name in rows:
+                    table = name
+                else:
+                    # Views show as their table; only aliases need the SQL
+                    if aliases is None:
+                        aliases = _aliases(query, rows)
+                    table = aliases.get(name)
+                size = rows.get(table, 1)
+                # Messages name the views the LLM writes SQL against
+                view = TABLE_VIEWS.get(table, table)
+                if kind == "SCAN":
+                    fanout = size
+                elif "PRIMARY KEY" in using or "rowid=" in using:
+                    fanout = 1
+                elif "=?" in using:
+                    unique = table in rows and _unique_search(conn, table, using)
+                    fanout = 1 if unique else min(size, 10)
+                else:
+                    fanout = max(1, size / 4)  # range constraint
+                cost += repeats * product * fanout
+
+                if kind == "SCAN" and table in rows and loops and product > 1:
+                    # With an equality predicate SQLite would SEARCH (by
+                    # key or an automatic index) rather than SCAN, unless
+                    # the loops before it yield a single row: then the scan
+                    # runs once and nothing multiplies
+                    message = (
+                        f"no JOIN condition links {view} ({size:,} rows) to "
+                        "the tables before it, so every pair of rows is produced"
+                    )
+                    issues.append(PlanIssue("cartesian_join", message, True))
+                elif kind == "SCAN" and repeats > 1 and size >= large_table:
+                    message = (
+                        f"{view} ({size:,} rows) is scanned in full "
+                        f"~{repeats:,.0f} times by a correlated subquery"
+                    )
+                    issues.append(PlanIssue("nested_full_scan", message, False))
+                product *= fanout
+                largest = max(largest, size)
+                sorted_rows = None
+                loops += 1
+            elif detail.startswith("USE TEMP B-TREE"):
+                # e.g. DISTINCT then ORDER BY: the same rows, sorted once
+                if sorted_rows != product:
+                    cost += repeats * product
+                    # Sorting one big table's rows is normal; a join that
+                    # multiplied them past every table's size is suspect
+                    if repeats * product >= large_table and product > largest:
+                        message = (
+                            f"~{repeats * product:,.0f} rows go through a temp "
+                            f"B-tree ({detail[len('USE TEMP B-TREE ') :]})"
+                        )
+                        issues.append(PlanIssue("temp_btree", message, False))
+                sorted_rows = product
+                if "GROUP BY" in detail:
+                    if aliases is None:
+                        aliases = _aliases(query, rows)
+                    groups = _group_rows(query, rows, aliases)
+                    if groups is not None:
+                        product = min(product, groups)
+            walk(
+                node_id,
+                repeats * product if detail.startswith("CORRELATED") else repeats,
+            )
+
+    walk(0, 1.0)
+    if cost > max_rows:
+        message = f"~{cost:,.0f} row visits estimated (budget {max_rows:,})"
+        issues.append(PlanIssue("cost", message, True))
+    return QueryPlan(int(cost), issues)
+
+
+def _error(message: str, error: Optional[str] = None) -> QueryResult:
+    return QueryResult("error", (), [], 0, 0.0, message, error)
+
+
+# What the repair node is told when a limit stops a query
+TIMEOUT_MESSAGE = (
+    "Query Limit Error: the query was stopped after {timeout_ms:g} ms. "
+    "It is far too expensive: check that every JOIN has an ON condition "
+    "on the foreign keys (a missing one multiplies the rows), and filter "
+    "or aggregate as early as possible."
+)
+MAX_ROWS_MESSAGE = (
+    "Query Limit Error: the query returned more than {max_rows} rows. "
+    "Aggregate with GROUP BY / SUM / COUNT or add a LIMIT, and check that "
+    "every JOIN has an ON condition on the foreign keys."
+)
+PLAN_MESSAGE = (
+    "Query Plan Error: the query was not run, its plan (~{rows:,} row "
+    "visits estimated) shows:\n{issues}\n"
+    "Join each table ON its foreign key (see [FK -> ...] in the schema), "
+    "and filter or aggregate before joining large tables."
+)
+
+
+FORBIDDEN_KEYWORDS = [
+    "UPDATE ",
+    "INSERT ",
+    "DELETE ",
+    "DROP ",
+    "ALTER ",
+    "TRUNCATE ",
+    "REPLACE ",
+    "CREATE ",
+]
+
+
+def run_query(query: str) -> QueryResult:
     """
     Executes a SQL query against the Northwind database.
 
@@ -25,70 +385,132 @@ def execute_sql(query: str) -> str:
     """
     conn = NorthwindDB.get_connection()
     if not conn:
-        return json.dumps(
-            {
-                "status": "error",
-                "data": None,
-                "message": "System Error: Could not connect to database.",
-            }
-        )
+        return _error("System Error: Could not connect to database.")
 
     # --- SECURITY CHECKS ---
     clean_query = query.strip().upper()
 
-    forbidden_keywords = [
-        "UPDATE ",
-        "INSERT ",
-        "DELETE ",
-        "DROP ",
-        "ALTER ",
-        "TRUNCATE ",
-        "REPLACE ",
-        "CREATE ",
-    ]
-
-    if any(keyword in clean_query for keyword in forbidden_keywords):
-        return json.dumps(
-            {
-                "status": "error",
-                "data": None,
-                "message": "Security Error: Data modification commands are strictly forbidden.",
-            }
+    if any(keyword in clean_query for keyword in FORBIDDEN_KEYWORDS):
+        return _error(
+            "Security Error: Data modification commands are strictly forbidden."
         )
 
     if not (clean_query.startswith("SELECT") or clean_query.startswith("WITH")):
-        return json.dumps(
-            {
-                "status": "error",
-                "data": None,
-                "message": "Security Error: Only SELECT or WITH queries are allowed.",
-            }
-        )
+        return _error("Security Error: Only SELECT or WITH queries are allowed.")
 
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query)
+    plan_gate = SQL_PLAN_GATE
+    if plan_gate != "off":
+        # Preparing the plan also catches syntax/schema errors before any work
+        try:
+            plan = analyze_query(conn, query)
+        except sqlite3.Error as e:
+            return _error(f"SQL Error: {str(e)}", str(e))
+        blocking = [i for i in plan.issues if i.blocking]
+        if plan_gate == "reject" and blocking:
+            issues = "\n".join(f"- {i.message}" for i in blocking)
+            return QueryResult(
+                "error",
+                (),
+                [],
+                0,
+                0.0,
+                PLAN_MESSAGE.format(rows=plan.estimated_rows, issues=issues),
+                "; ".join(i.message for i in blocking),
+                "plan",
+            )
+        for issue in plan.issues:
+            logger.warning(f"⚠️ Query plan: {issue.message}")
 
-        # Fetch results
-        rows = cursor.fetchall()
-        results = [dict(row) for row in rows]
+    timeout_ms, max_rows = SQL_TIMEOUT_MS, SQL_MAX_ROWS
+    timed_out = False
+    try:
+        with _sql_slots:
+            start = time.perf_counter()
+            if timeout_ms is not None:
+                deadline = start + timeout_ms / 1000
 
-        return json.dumps(
-            {
-                "status": "success",
-                "data": results,
-                "message": f"Successfully retrieved {len(results)} rows.",
-            },
-            default=str,
-        )
+                def past_deadline() -> bool:
+                    # A truthy return makes SQLite abort with "interrupted"
+                    nonlocal timed_out
+                    timed_out = time.perf_counter() > deadline
+                    return timed_out
 
+                conn.set_progress_handler(past_deadline, PROGRESS_INTERVAL)
+            try:
+                cursor = conn.cursor()
+                cursor.row_factory = None  # plain tuples
+                cursor.execute(query)
+                if max_rows is None:
+                    rows = cursor.fetchall()
+                else:
+                    rows = cursor.fetchmany(max_rows + 1)
+            finally:
+                if timeout_ms is not None:
+                    conn.set_progress_handler(None, 0)
+                elapsed = time.perf_counter() - start
+                record_sql(elapsed)
     except Exception as e:
-        # Return the error in a way the LLM can easily read to fix its own code
-        return json.dumps(
-            {"status": "error", "data": str(e), "message": f"SQL Error: {str(e)}"}
+        if timed_out:
+            return QueryResult(
+                "error",
+                (),
+                [],
+                0,
+                round(elapsed * 1000, 3),
+                TIMEOUT_MESSAGE.format(timeout_ms=timeout_ms),
+                str(e),
+                "timeout",
+            )
+        # Worded so the LLM can easily read it to fix its own code
+        return _error(f"SQL Error: {str(e)}", str(e))
+
+    columns = tuple(d[0] for d in cursor.description or ())
+    if max_rows is not None and len(rows) > max_rows:
+        # Unread rows are dropped with the statement
+        cursor.close()
+        return QueryResult(
+            "error",
+            columns,
+            rows[:max_rows],
+            max_rows,
+            round(elapsed * 1000, 3),
+            MAX_ROWS_MESSAGE.format(max_rows=max_rows),
+            f"more than {max_rows} rows",
+            "max_rows",
         )
+    return QueryResult(
+        "success",
+        columns,
+        rows,
+        len(rows),
+        round(elapsed * 1000, 3),
+        f"Successfully retrieved {len(rows)} rows.",
+    )
+
+
+def execute_sql(query: str) -> str:
+    """
+    JSON form of run_query for LLM tool use:
+    {"status", "data": rows as dicts (or the SQL error), "message"}.
+    """
+    return run_query(query).to_json()
 
 
-def get_db_schema() -> str:
-    """Helper for the agent to see the database structure."""
-    return NorthwindDB.get_schema()
+def get_db_schema(
+    question: Optional[str] = None,
+    constraints: Optional[Dict[str, Any]] = None,
+    sql: str = "",
+) -> str:
+    """
+    Helper for the agent to see the database structure.
+    With a question, only the views it needs (plus their join path) are
+    included; see agent.schema_selector.
+    """
+    if question is None:
+        return NorthwindDB.get_schema()
+    try:
+        tables = NorthwindDB.describe_tables()
+    except sqlite3.Error as e:
+        return f"Error retrieving schema: {e}"
+    keep = set(select_tables(tables, question, constraints, sql))
+    return NorthwindDB.format_schema([t for t in tables if t.name in keep])
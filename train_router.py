@@ -0,0 +1,77 @@
+import argparse
+import json
+import logging
+import random
+from collections import Counter
+
+from agent.fast_router import (
+    CONFIDENCE_THRESHOLD,
+    MODEL_PATH,
+    SQL_CONFIDENCE_THRESHOLD,
+    FastRouter,
+    is_confident,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("RouterTrainer")
+
+
+def load_labelled(paths):
+    """Reads {"question": ..., "route": ...} rows from JSONL files."""
+    rows = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            rows.extend(json.loads(line) for line in f if line.strip())
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local route classifier.")
+    parser.add_argument(
+        "--data",
+        nargs="+",
+        default=["data/router_questions.jsonl"],
+        help="Labelled JSONL files with 'question' and 'route' fields.",
+    )
+    parser.add_argument("--out", default=str(MODEL_PATH))
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = load_labelled(args.data)
+    print(f"📚 Loaded {len(rows)} labelled questions.")
+
+    # K-fold accuracy, so the saved model's quality is known before shipping
+    random.seed(42)
+    random.shuffle(rows)
+    correct = confident = confident_correct = 0
+    misroutes = Counter()
+    for fold in range(args.folds):
+        test = rows[fold :: args.folds]
+        train = [r for i, r in enumerate(rows) if i % args.folds != fold]
+        router = FastRouter.train(
+            [r["question"] for r in train], [r["route"] for r in train]
+        )
+        for row in test:
+            route, probability = router.predict(row["question"])
+            correct += route == row["route"]
+            if is_confident(route, probability):
+                confident += 1
+                confident_correct += route == row["route"]
+                if route != row["route"]:
+                    misroutes[f"{row['route']} -> {route}"] += 1
+    print(f"🎯 {args.folds}-fold accuracy: {correct / len(rows):.1%}")
+    print(
+        f"   At threshold {CONFIDENCE_THRESHOLD} (sql {SQL_CONFIDENCE_THRESHOLD}): "
+        f"{confident / len(rows):.1%} answered locally, "
+        f"{confident_correct / max(confident, 1):.1%} of those correct"
+    )
+    if misroutes:
+        print(f"⚠️ Held-out misroutes: {dict(misroutes)}")
+
+    router = FastRouter.train([r["question"] for r in rows], [r["route"] for r in rows])
+    router.save(args.out)
+    print(f"💾 Saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
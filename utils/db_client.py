@@ -1,12 +1,48 @@
+import atexit
 import os
 import sqlite3
-from typing import Optional
+import threading
+from urllib.parse import quote
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 # Define path relative to THIS file
 # Logic: utils/ -> agent/ -> root -> data/
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "data", "northwind.sqlite")
 
+# Applied to every pooled connection (all are read-only)
+CONNECTION_PRAGMAS = (
+    "PRAGMA mmap_size = 268435456",  # 256 MiB memory-mapped reads
+    "PRAGMA cache_size = -65536",  # 64 MiB page cache, kept between queries
+    "PRAGMA temp_store = MEMORY",  # sorts / GROUP BY temp tables in RAM
+)
+
+# Simplified names the AI sees, as TEMP views on each connection. They live
+# in the connection's temp schema (searched before main), so the database
+# file itself is never written and can be opened immutable.
+COMPAT_VIEWS = (
+    'CREATE TEMP VIEW IF NOT EXISTS orders AS SELECT * FROM main."Orders"',
+    'CREATE TEMP VIEW IF NOT EXISTS order_items AS SELECT * FROM main."Order Details"',
+    'CREATE TEMP VIEW IF NOT EXISTS products AS SELECT * FROM main."Products"',
+    'CREATE TEMP VIEW IF NOT EXISTS customers AS SELECT * FROM main."Customers"',
+    'CREATE TEMP VIEW IF NOT EXISTS categories AS SELECT * FROM main."Categories"',
+    'CREATE TEMP VIEW IF NOT EXISTS suppliers AS SELECT * FROM main."Suppliers"',
+)
+
+
+class ColumnInfo(NamedTuple):
+    name: str
+    type: str
+    pk: bool
+
+
+class TableInfo(NamedTuple):
+    """One simplified view; foreign_keys maps column -> "view.column"."""
+
+    name: str
+    columns: Tuple[ColumnInfo, ...]
+    foreign_keys: Dict[str, str]
+
 
 class NorthwindDB:
     """
@@ -14,119 +50,250 @@ class NorthwindDB:
     Handles connection lifecycle, view setup, and schema abstraction.
     """
 
-    _views_setup = False
+    # (file identity + schema_version, tables, rendered text)
+    _schema_cache: Optional[Tuple[tuple, List[TableInfo], str]] = None
+    _schema_lock = threading.Lock()
+
+    # One read-only connection per thread, reused across queries
+    _local = threading.local()
+    _pool: List[sqlite3.Connection] = []
+    _pool_lock = threading.Lock()
+    _pool_generation = 0
+    # File identity the pooled connections were opened against
+    _pool_identity: Optional[tuple] = None
+    # ((pool generation, path), row count per lower-cased table name)
+    _row_counts: Optional[Tuple[tuple, Dict[str, int]]] = None
+    _row_counts_lock = threading.Lock()
 
     @classmethod
     def get_connection(cls) -> Optional[sqlite3.Connection]:
-        """Establishes a connection and ensures views are ready."""
-        if not cls._views_setup:
-            cls._setup_views()
-            cls._views_setup = True
+        """
+        Returns this thread's pooled read-only connection, opening it on
+        first use. Callers must not close it; close_all() does. None if the
+        database can't be opened.
+        """
+        pooled = getattr(cls._local, "pooled", None)
+        if pooled is not None:
+            if pooled[:2] == (cls._pool_generation, DB_PATH):
+                return pooled[2]
+            # Stale (file changed or path switched); only this thread uses it
+            cls._discard(pooled[2])
+            cls._local.pooled = None
 
         try:
-            conn = sqlite3.connect(DB_PATH)
-            conn.row_factory = sqlite3.Row
-            return conn
+            conn = cls._open_read_only(DB_PATH)
         except sqlite3.Error as e:
             print(f"DB Connection Error: {e}")
             return None
+        with cls._pool_lock:
+            if cls._pool_identity is None:
+                cls._pool_identity = cls._file_identity(DB_PATH)
+            cls._pool.append(conn)
+            cls._local.pooled = (cls._pool_generation, DB_PATH, conn)
+        return conn
+
+    @staticmethod
+    def _open_read_only(path: str) -> sqlite3.Connection:
+        # mode=ro: no writes and no empty file created for a missing path.
+        # immutable=1: no file locks or change checks on any read; a file
+        # changed underneath needs its connections reopened (close_all()).
+        conn = sqlite3.connect(
+            f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1",
+            uri=True,
+            check_same_thread=False,  # only so close_all() can close it
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        for view in COMPAT_VIEWS:
+            conn.execute(view)
+        # After the views: query_only also refuses temp schema changes
+        conn.execute("PRAGMA query_only = ON")
+        return conn
 
     @classmethod
-    def _setup_views(cls):
-        """Creates compatibility views to simplify table names for the AI."""
-        conn = None
-        try:
-            # Connect directly to avoid recursion loop
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-            views = [
-                "CREATE VIEW IF NOT EXISTS orders AS SELECT * FROM Orders;",
-                'CREATE VIEW IF NOT EXISTS order_items AS SELECT * FROM "Order Details";',
-                "CREATE VIEW IF NOT EXISTS products AS SELECT * FROM Products;",
-                "CREATE VIEW IF NOT EXISTS customers AS SELECT * FROM Customers;",
-                "CREATE VIEW IF NOT EXISTS categories AS SELECT * FROM Categories;",
-                "CREATE VIEW IF NOT EXISTS suppliers AS SELECT * FROM Suppliers;",
-            ]
-            for v in views:
-                cursor.execute(v)
-            conn.commit()
-        except Exception as e:
-            print(f"View setup error: {e}")
-        finally:
-            if conn:
-                conn.close()
+    def _discard(cls, conn: sqlite3.Connection):
+        with cls._pool_lock:
+            if conn in cls._pool:
+                cls._pool.remove(conn)
+        conn.close()
 
     @classmethod
-    def get_schema(cls) -> str:
+    def invalidate_pool(cls):
         """
-        Returns schema using SIMPLIFIED view names but ORIGINAL table metadata.
+        Makes every thread reopen its connection on its next
+        get_connection(), which also closes the stale one there. Safe while
+        other threads have queries in flight, unlike close_all().
         """
+        with cls._pool_lock:
+            cls._pool_generation += 1
+            cls._pool_identity = None
+
+    @classmethod
+    def close_all(cls):
+        """
+        Closes every pooled connection; threads open a fresh one on their
+        next query. Must not run while other threads are querying (use
+        invalidate_pool()); registered to run at exit.
+        """
+        with cls._pool_lock:
+            cls._pool_generation += 1
+            cls._pool_identity = None
+            pool, cls._pool = cls._pool, []
+        for conn in pool:
+            conn.close()
+
+    # Map Original Tables (Source of Truth) -> Simplified Views (What AI sees)
+    TABLE_MAP = {
+        "Orders": "orders",
+        "Order Details": "order_items",
+        "Products": "products",
+        "Customers": "customers",
+        "Categories": "categories",
+        "Suppliers": "suppliers",
+    }
+
+    @classmethod
+    def describe_tables(cls) -> List[TableInfo]:
+        """
+        Structured schema of the simplified views, in sqlite_master order.
+        Metadata (PKs, FKs) comes from the original tables.
+
+        Cached per database file and PRAGMA schema_version, so it is only
+        re-read after the file is replaced or its schema changes (which
+        also has each thread reopen its connection, as they are immutable).
+        Empty if there is no connection; raises sqlite3.Error if the
+        database can't be read.
+        """
+        return cls._cached_schema()[0]
+
+    @staticmethod
+    def _file_identity(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (
+            os.path.realpath(path),
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    @classmethod
+    def _cached_schema(cls) -> Tuple[List[TableInfo], str]:
+        identity = cls._file_identity(DB_PATH)
+        # Checked once per schema read rather than per query
+        if cls._pool_identity is not None and identity != cls._pool_identity:
+            cls.invalidate_pool()
         conn = cls.get_connection()
         if not conn:
-            return ""
-
-        # Map Original Tables (Source of Truth) -> Simplified Views (What AI sees)
-        TABLE_MAP = {
-            "Orders": "orders",
-            "Order Details": "order_items",
-            "Products": "products",
-            "Customers": "customers",
-            "Categories": "categories",
-            "Suppliers": "suppliers",
-        }
+            return [], ""
 
-        schema = []
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type IN ('table','view') AND name NOT LIKE 'sqlite_%'"
-            )
-            tables = cursor.fetchall()
-
-            for row in tables:
-                original_name = row["name"]
-                if original_name not in TABLE_MAP:
-                    continue
-
-                # Get Metadata (FKs) from original table
-                cursor.execute(f"PRAGMA foreign_key_list('{original_name}')")
-                fk_rows = cursor.fetchall()
-
-                fk_map = {}
-                for fk in fk_rows:
-                    local_col = fk[3]
-                    target_table_raw = fk[2]
-                    target_col = fk[4] if fk[4] else "PK"
-                    target_table_view = TABLE_MAP.get(
-                        target_table_raw, target_table_raw
-                    )
-                    fk_map[local_col] = f"{target_table_view}.{target_col}"
-
-                # Get Columns
-                cursor.execute(f"PRAGMA table_info('{original_name}')")
-                cols = cursor.fetchall()
-
-                col_definitions = []
-                for c in cols:
-                    name = c["name"]
-                    type_ = c["type"]
-                    is_pk = c["pk"]
-                    col_str = f"{name} ({type_})"
-                    if is_pk:
-                        col_str += " [PK]"
-                    if name in fk_map:
-                        col_str += f" [FK -> {fk_map[name]}]"
-                    col_definitions.append(col_str)
-
-                view_name = TABLE_MAP[original_name]
-                schema.append(
-                    f"Table: {view_name}\nColumns: {', '.join(col_definitions)}"
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        key = (identity, version)
+        with cls._schema_lock:
+            if cls._schema_cache is not None and cls._schema_cache[0] == key:
+                return cls._schema_cache[1], cls._schema_cache[2]
+
+        tables = cls._read_tables(conn)
+        text = cls.format_schema(tables)
+        with cls._schema_lock:
+            cls._schema_cache = (key, tables, text)
+        return tables, text
+
+    @classmethod
+    def _read_tables(cls, conn: sqlite3.Connection) -> List[TableInfo]:
+        tables = []
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT name FROM main.sqlite_master WHERE type IN ('table','view') AND name NOT LIKE 'sqlite_%'"
+        )
+        for row in cursor.fetchall():
+            original_name = row["name"]
+            if original_name not in cls.TABLE_MAP:
+                continue
+
+            # Get Metadata (FKs) from original table; main. skips the
+            # same-named temp view ("orders" matches "Orders")
+            cursor.execute(f"PRAGMA main.foreign_key_list('{original_name}')")
+            fk_map = {}
+            for fk in cursor.fetchall():
+                local_col = fk[3]
+                target_table_raw = fk[2]
+                target_col = fk[4] if fk[4] else "PK"
+                target_table_view = cls.TABLE_MAP.get(
+                    target_table_raw, target_table_raw
                 )
+                fk_map[local_col] = f"{target_table_view}.{target_col}"
 
+            # Get Columns
+            cursor.execute(f"PRAGMA main.table_info('{original_name}')")
+            columns = tuple(
+                ColumnInfo(c["name"], c["type"], bool(c["pk"]))
+                for c in cursor.fetchall()
+            )
+            tables.append(TableInfo(cls.TABLE_MAP[original_name], columns, fk_map))
+        return tables
+
+    @staticmethod
+    def format_schema(tables: List[TableInfo]) -> str:
+        """Renders describe_tables() output as the prompt text."""
+        schema = []
+        for table in tables:
+            col_definitions = []
+            for c in table.columns:
+                col_str = f"{c.name} ({c.type})"
+                if c.pk:
+                    col_str += " [PK]"
+                if c.name in table.foreign_keys:
+                    col_str += f" [FK -> {table.foreign_keys[c.name]}]"
+                col_definitions.append(col_str)
+            schema.append(f"Table: {table.name}\nColumns: {', '.join(col_definitions)}")
+        return "\n\n".join(schema)
+
+    @classmethod
+    def get_schema(cls) -> str:
+        """
+        Returns schema using SIMPLIFIED view names but ORIGINAL table metadata.
+        """
+        try:
+            return cls._cached_schema()[1]
         except sqlite3.Error as e:
             return f"Error retrieving schema: {e}"
-        finally:
-            conn.close()
 
-        return "\n\n".join(schema)
+    @classmethod
+    def table_rows(cls) -> Dict[str, int]:
+        """
+        Row count of every table, keyed by lower-cased original name.
+        Counted once per pool generation: the immutable connections can't
+        see changes until close_all() anyway. Empty without a connection.
+        """
+        conn = cls.get_connection()
+        if not conn:
+            return {}
+        # The generation this thread's connection was opened in
+        key = (cls._local.pooled[0], DB_PATH)
+        cached = cls._row_counts
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # Workers asking at once wait for a single count
+        with cls._row_counts_lock:
+            cached = cls._row_counts
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            counts = {}
+            for (name,) in conn.execute(
+                "SELECT name FROM main.sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                quoted = name.replace('"', '""')
+                counts[name.lower()] = conn.execute(
+                    f'SELECT COUNT(*) FROM main."{quoted}"'
+                ).fetchone()[0]
+            cls._row_counts = (key, counts)
+        return counts
+
+
+atexit.register(NorthwindDB.close_all)